@@ -0,0 +1,456 @@
+"""
+Delivery of alerts to external sinks, off the collector thread.
+
+The collector only appends each alert to a bounded queue (the oldest queued
+alert is dropped when it is full), so sampling never waits on a slow or
+unreachable sink. A worker thread, started with the first alert, drains the
+queue and
+    * coalesces alerts per key: the first alert of a key is sent at once, and
+      later ones within the window are folded into one notification (with a
+      count) sent when the window ends
+    * rate-limits notifications with a token bucket. Notifications over the
+      limit stay pending and keep absorbing alerts of their key
+    * hands the due notifications as one batch to every sink
+Each sink has its own delivery thread, which retries a failed delivery with
+exponential backoff, so a slow or failing sink never delays the others.
+
+Sinks are created from URLs:
+    http://host:port/path       JSON POST of each batch (webhook)
+    syslog:///dev/log           one datagram per notification (syslog://host:514 over UDP)
+    file:///var/log/alerts.log  one JSON line per notification
+"""
+import json
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ('info', 'warning', 'critical')
+
+# Syslog priority = facility * 8 + severity (RFC 5424)
+SYSLOG_FACILITY_USER = 1
+SYSLOG_SEVERITIES = {'critical': 2, 'warning': 4, 'info': 6}
+
+# Failed batches kept for retry, per sink
+MAX_RETRY_BATCHES = 100
+
+
+class WebhookSink:
+    """POST batches of notifications as JSON."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        parsed = urlparse(url)
+        # Keep credentials out of the statistics
+        self.name = f"{parsed.scheme}://{parsed.netloc.rpartition('@')[2]}{parsed.path}"
+
+    def send(self, notifications):
+        body = json.dumps({'notifications': notifications}).encode('utf-8')
+        request = Request(self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        # Raises HTTPError for 4xx/5xx responses
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class SyslogSink:
+    """Send each notification as a syslog datagram."""
+
+    def __init__(self, address='/dev/log', tag='memory-tracker'):
+        """
+        Args:
+            address: Path of a Unix socket, or a (host, port) tuple for UDP
+            tag: Program name put in front of each message
+        """
+        self.address = address
+        self.tag = tag
+        self.name = f"syslog://{address if isinstance(address, str) else '%s:%d' % address}"
+        self.socket = None
+
+    def send(self, notifications):
+        if self.socket is None:
+            family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+            self.socket = socket.socket(family, socket.SOCK_DGRAM)
+            try:
+                self.socket.connect(self.address)
+            except OSError:
+                self.close()
+                raise
+
+        try:
+            for notification in notifications:
+                priority = SYSLOG_FACILITY_USER * 8 + SYSLOG_SEVERITIES.get(notification['level'], 4)
+                message = notification['message']
+                if notification['count'] > 1:
+                    message += f" ({notification['count']} alerts since {notification['first_timestamp']})"
+                self.socket.send(f"<{priority}>{self.tag}: {message}".encode('utf-8'))
+        except OSError:
+            # Reconnect on the next attempt, syslogd may have restarted
+            self.close()
+            raise
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+class FileSink:
+    """Append each notification to a file as a JSON line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"file://{path}"
+
+    def send(self, notifications):
+        with open(self.path, 'a') as f:
+            for notification in notifications:
+                f.write(json.dumps(notification) + '\n')
+
+
+def create_sink(url):
+    """
+    Create a sink from its URL.
+
+    Args:
+        url: http(s)://..., syslog:///path/to/socket, syslog://host[:port] or
+            file:///path (file://./relative also works)
+
+    Raises:
+        ValueError: Unknown scheme
+    """
+    parsed = urlparse(url)
+    if parsed.scheme in ('http', 'https'):
+        return WebhookSink(url)
+    if parsed.scheme == 'syslog':
+        if parsed.hostname:
+            return SyslogSink((parsed.hostname, parsed.port or 514))
+        return SyslogSink(parsed.path or '/dev/log')
+    if parsed.scheme == 'file':
+        return FileSink(parsed.netloc + parsed.path)
+    raise ValueError(f"Unknown alert sink '{url}', use http(s)://, syslog:// or file://")
+
+
+class SinkWorker:
+    """Deliver the batches of one sink on its own thread, with its own retries."""
+
+    def __init__(self, dispatcher, sink):
+        self.dispatcher = dispatcher
+        self.sink = sink
+        self.outbox = deque()
+        self.retries = []      # (due, attempt, batch)
+        self.wakeup = threading.Event()
+        self.busy = False      # Between taking a batch and settling it
+        self.thread = None
+
+    def start(self):
+        """Start the delivery thread, unless it is still running."""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name=f'alert-sink-{self.sink.name}')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def join(self, timeout):
+        """Wait for the delivery thread to exit; returns False if it did not."""
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False
+            self.thread = None
+        return True
+
+    def put(self, batch):
+        """Queue a batch for delivery."""
+        self.outbox.append(batch)
+        self.wakeup.set()
+
+    def idle(self):
+        return not (self.outbox or self.retries or self.busy)
+
+    def _run(self):
+        """Delivery loop: new batches first, then the retries that are due."""
+        while self.dispatcher.running:
+            self.busy = True
+            try:
+                while self.outbox:
+                    self._send(self.outbox.popleft(), 0)
+                now = time.monotonic()
+                due = [retry for retry in self.retries if retry[0] <= now]
+                if due:
+                    self.retries = [retry for retry in self.retries if retry[0] > now]
+                    for _, attempt, batch in due:
+                        self._send(batch, attempt)
+            except Exception as e:
+                logger.error(f"Error delivering alerts to {self.sink.name}: {str(e)}")
+            finally:
+                self.busy = False
+
+            timeout = max(min(retry[0] for retry in self.retries) - time.monotonic(), 0.01) \
+                if self.retries else None
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+
+    def _send(self, batch, attempt):
+        """Deliver a batch, scheduling a retry if it fails."""
+        dispatcher = self.dispatcher
+        try:
+            self.sink.send(batch)
+            dispatcher._count(self.sink, sent=len(batch))
+        except Exception as e:
+            error_time = time.strftime('%Y-%m-%d %H:%M:%S')
+            if attempt < dispatcher.max_retries and len(self.retries) < MAX_RETRY_BATCHES:
+                delay = min(dispatcher.retry_backoff * 2 ** attempt, dispatcher.max_backoff)
+                self.retries.append((time.monotonic() + delay, attempt + 1, batch))
+                dispatcher._count(self.sink, error=(str(e), error_time), retried=1)
+            else:
+                dispatcher._count(self.sink, error=(str(e), error_time), failed=len(batch))
+                logger.error(f"Error delivering {len(batch)} alert notifications to {self.sink.name}: {str(e)}")
+
+
+class AlertDispatcher:
+    def __init__(self, sinks, queue_size=1000, coalesce_seconds=30, rate_limit=30,
+                 max_retries=5, retry_backoff=1.0, max_backoff=60, max_pending=1000):
+        """
+        Initialize the dispatcher; its worker thread starts with the first alert.
+
+        Args:
+            sinks: Sink objects (with name and send(notifications)) or sink URLs
+            queue_size: Alerts queued before the oldest are dropped
+            coalesce_seconds: Window during which alerts of one key are folded
+                into a single notification
+            rate_limit: Notifications per minute across all keys (None for no limit)
+            max_retries: Delivery attempts per batch and sink after the first
+            retry_backoff: Delay before the first retry, doubled for each next one
+            max_backoff: Longest delay between retries
+            max_pending: Keys coalesced at once; alerts of further keys are dropped
+        """
+        self.sinks = [create_sink(sink) if isinstance(sink, str) else sink for sink in sinks]
+        self.coalesce_seconds = coalesce_seconds
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending
+
+        self.queue = deque(maxlen=queue_size)
+        self.wakeup = threading.Event()
+        self.pending = {}      # key -> notification being coalesced, with its '_due' time
+        self.last_sent = {}    # key -> monotonic time the key was last sent
+        self.workers = [SinkWorker(self, sink) for sink in self.sinks]
+        self.busy = False      # The worker is between taking alerts and settling them
+        self.tokens = float(rate_limit or 0)
+        self.token_time = time.monotonic()
+
+        self.stats = {'queued': 0, 'dropped': 0, 'coalesced': 0, 'rate_limited': 0,
+                      'sent': 0, 'retried': 0, 'failed': 0}
+        self.sink_stats = {sink.name: {'sent': 0, 'failed': 0, 'last_error': None, 'last_error_time': None}
+                           for sink in self.sinks}
+        self.stats_lock = threading.Lock()
+        self.remote_stats = None
+
+        self.running = False
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread."""
+        with self.start_lock:
+            self.running = True
+            # A worker that outlived stop()'s timeout picks up again on its own
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='alert-dispatcher')
+                self.thread.daemon = True
+                self.thread.start()
+            for worker in self.workers:
+                worker.start()
+
+    def stop(self, timeout=5):
+        """Stop the worker thread; undelivered notifications are discarded."""
+        self.running = False
+        self.wakeup.set()
+        for worker in self.workers:
+            worker.wakeup.set()
+        deadline = time.monotonic() + timeout
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+            with self.start_lock:
+                if self.thread is thread and not thread.is_alive():
+                    # The next alert starts a new worker
+                    self.thread = None
+        for worker in self.workers:
+            # A sink stuck in a delivery is left to its daemon thread
+            worker.join(max(deadline - time.monotonic(), 0))
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+    def flush(self, timeout=10):
+        """
+        Wait until every queued alert has been delivered or given up on.
+
+        Pending notifications are sent when their coalescing window ends and
+        the rate limit allows, and failed batches after their backoff, so this
+        can take a while.
+
+        Returns:
+            True if nothing is left to deliver
+        """
+        deadline = time.monotonic() + timeout
+        while self.queue or self.pending or self.busy or not all(worker.idle() for worker in self.workers):
+            if time.monotonic() >= deadline or self.thread is None:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def submit(self, alert):
+        """
+        Queue an alert for delivery, without ever waiting on the sinks.
+
+        Args:
+            alert: Alert dictionary with type, level, message and timestamp,
+                and a 'key' for alerts tracked per key
+        """
+        if len(self.queue) == self.queue.maxlen:
+            # The deque discards the oldest alert
+            self.stats['dropped'] += 1
+        self.queue.append(alert)
+        self.stats['queued'] += 1
+        if not self.running:
+            self.start()
+        self.wakeup.set()
+
+    def _run(self):
+        """Worker loop: coalesce, rate-limit and hand batches to the sinks."""
+        while self.running:
+            now = time.monotonic()
+            self.busy = True
+            try:
+                self._drain(now)
+                self._deliver_due(now)
+            except Exception as e:
+                logger.error(f"Error dispatching alerts: {str(e)}")
+            finally:
+                self.busy = False
+
+            self.wakeup.wait(self._next_wakeup(time.monotonic()))
+            self.wakeup.clear()
+
+    def _drain(self, now):
+        """Move queued alerts into the pending notifications of their keys."""
+        while self.queue:
+            alert = self.queue.popleft()
+            key = f"{alert['type']}:{alert['key']}" if alert.get('key') else alert['type']
+
+            notification = self.pending.get(key)
+            if notification is not None:
+                notification['count'] += 1
+                notification['message'] = alert['message']
+                notification['value'] = alert.get('value')
+                notification['last_timestamp'] = alert['timestamp']
+                if LEVELS.index(alert.get('level', 'warning')) > LEVELS.index(notification['level']):
+                    notification['level'] = alert['level']
+                self.stats['coalesced'] += 1
+                continue
+
+            if len(self.pending) >= self.max_pending:
+                self.stats['dropped'] += 1
+                continue
+
+            # The first alert of a key goes out at once, later ones wait for the window to end
+            last = self.last_sent.get(key)
+            due = now if last is None or now - last >= self.coalesce_seconds else last + self.coalesce_seconds
+            self.pending[key] = {
+                'key': key,
+                'type': alert['type'],
+                'level': alert.get('level', 'warning'),
+                'message': alert['message'],
+                'value': alert.get('value'),
+                'count': 1,
+                'first_timestamp': alert['timestamp'],
+                'last_timestamp': alert['timestamp'],
+                '_due': due,
+                '_deferred': False
+            }
+
+    def _refill(self, now):
+        if self.rate_limit:
+            self.tokens = min(self.tokens + (now - self.token_time) * self.rate_limit / 60, self.rate_limit)
+        self.token_time = now
+
+    def _deliver_due(self, now):
+        """Send the due notifications the rate limit allows, as one batch."""
+        due = sorted((n for n in self.pending.values() if n['_due'] <= now), key=lambda n: n['_due'])
+        if not due:
+            return
+
+        self._refill(now)
+        if self.rate_limit:
+            allowed = int(self.tokens)
+            for notification in due[allowed:]:
+                if not notification['_deferred']:
+                    notification['_deferred'] = True
+                    self.stats['rate_limited'] += 1
+            due = due[:allowed]
+            self.tokens -= len(due)
+        if not due:
+            return
+
+        batch = []
+        for notification in due:
+            del self.pending[notification['key']]
+            self.last_sent[notification['key']] = now
+            batch.append({k: v for k, v in notification.items() if not k.startswith('_')})
+
+        # Forget keys whose window has passed
+        if len(self.last_sent) > self.max_pending:
+            self.last_sent = {k: t for k, t in self.last_sent.items() if now - t < self.coalesce_seconds}
+
+        for worker in self.workers:
+            worker.put(batch)
+
+    def _count(self, sink, sent=0, retried=0, failed=0, error=None):
+        """Update the counters of the dispatcher and of a sink, from its delivery thread."""
+        with self.stats_lock:
+            stats = self.sink_stats[sink.name]
+            stats['sent'] += sent
+            self.stats['sent'] += sent
+            self.stats['retried'] += retried
+            self.stats['failed'] += failed
+            if error is not None:
+                stats['failed'] += 1
+                stats['last_error'], stats['last_error_time'] = error
+
+    def _next_wakeup(self, now):
+        """Seconds until the worker has something to do, None to wait for an alert."""
+        times = []
+        if self.pending:
+            next_due = min(n['_due'] for n in self.pending.values())
+            if self.rate_limit and self.tokens < 1:
+                # Wait for the next token
+                next_due = max(next_due, now + (1 - self.tokens) * 60 / self.rate_limit)
+            times.append(next_due)
+        if not times:
+            return None
+        return max(min(times) - now, 0.01)
+
+    def get_stats(self):
+        """Counters of the dispatcher and of each sink."""
+        if self.remote_stats is not None:
+            return self.remote_stats
+        with self.stats_lock:
+            return dict(self.stats, **{
+                'queue': len(self.queue),
+                'pending': len(self.pending),
+                'retrying': sum(len(worker.retries) for worker in self.workers),
+                'sinks': [dict(stats, name=name) for name, stats in self.sink_stats.items()]
+            })
+
+    def load_stats(self, stats):
+        """Report the statistics of a dispatcher running in another process (from get_stats())."""
+        self.remote_stats = stats
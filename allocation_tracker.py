@@ -0,0 +1,297 @@
+"""
+Python allocation sites of the running process, with tracemalloc.
+
+When the tracker is embedded in a Python service, this shows which lines of
+that service hold memory, not just how large its RSS is. Snapshots are taken
+on a schedule, and each one is reduced once to the live size and count per
+allocation traceback. Sites by line and by file are summed from those, then
+every grouping is diffed against the previous snapshot and against the first
+one, keeping the top N sites by change. Requests only read those results.
+
+Overhead is controlled by
+    * frames:   traceback depth recorded per allocation. Tracing cost grows
+                with it, and 1 is enough to group by file and line
+    * interval: seconds between snapshots. A snapshot walks every live trace
+    * sampling: fraction of the time tracing is on. Below 1, tracing starts
+                sampling * interval seconds before each snapshot and stops
+                after it, so a snapshot holds what was allocated during that
+                window and is still alive (there is no comparison to 'start')
+"""
+import linecache
+import logging
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from heapq import nlargest
+
+logger = logging.getLogger(__name__)
+
+ALLOCATION_GROUPINGS = ('filename', 'lineno', 'traceback')
+ALLOCATION_BASELINES = ('previous', 'start', 'none')
+
+# Allocations made by tracemalloc, this module and the import system, not by the application
+IGNORED_FILES = frozenset((
+    tracemalloc.__file__,
+    __file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+))
+
+
+def traceback_sizes(snapshot):
+    """
+    Sum the traces of a snapshot per traceback.
+
+    Returns:
+        Dictionary {frames: [size, count]}, frames being (filename, lineno)
+        tuples with the allocating frame first
+    """
+    sizes = {}
+    for stat in snapshot.statistics('traceback'):
+        # Tracebacks list the oldest frame first
+        frames = tuple((frame.filename, frame.lineno) for frame in reversed(stat.traceback))
+        sizes[frames] = [stat.size, stat.count]
+    return sizes
+
+
+def _site(grouping, key):
+    """Describe a grouping key for clients."""
+    if grouping == 'filename':
+        return {'site': key}
+    filename, lineno = key if grouping == 'lineno' else key[0]
+    site = {
+        'site': f"{filename}:{lineno}",
+        'line': linecache.getline(filename, lineno).strip()
+    }
+    if grouping == 'traceback':
+        # Oldest frame first, the allocating line last
+        site['traceback'] = [f"{f}:{n}" for f, n in reversed(key)]
+    return site
+
+
+class AllocationTracker:
+    def __init__(self, interval=60, frames=1, sampling=1.0, top_n=50, history_size=120):
+        """
+        Initialize the tracker; tracing starts with start().
+
+        Args:
+            interval: Seconds between snapshots
+            frames: Frames recorded per allocation traceback
+            sampling: Fraction of each interval during which allocations are
+                traced, ending at the snapshot (1 to trace continuously)
+            top_n: Sites kept per grouping and baseline at each snapshot
+            history_size: Number of snapshot summaries kept
+        """
+        if not 1 <= frames <= 1000:
+            raise ValueError("frames must be between 1 and 1000")
+        if not 0 < sampling <= 1:
+            raise ValueError("sampling must be greater than 0 and at most 1")
+
+        self.interval = interval
+        self.frames = frames
+        self.sampling = sampling
+        self.top_n = top_n
+
+        self.running = False
+        self.owns_tracing = False   # Whether we started tracemalloc (and may stop it)
+        self.external = False       # tracemalloc was already started by someone else
+        self.next_snapshot = None
+        self.snapshot_count = 0
+        self.snapshot_time = None
+        self.previous_time = None
+
+        self.first = None      # Grouping -> {key: [size, count]} of the first snapshot
+        self.previous = None   # Same, of the latest snapshot
+        self.tops = {}         # (grouping, baseline) -> top changes at the latest snapshot
+        self.history = deque(maxlen=history_size)
+
+    def start(self, now=None):
+        """Start tracing (unless sampling waits for its window) and schedule snapshots."""
+        now = time.time() if now is None else now
+        if tracemalloc.is_tracing() and not self.owns_tracing:
+            # PYTHONTRACEMALLOC or a profiler: use its settings and never stop it
+            self.external = True
+            self.frames = tracemalloc.get_traceback_limit()
+            if self.sampling < 1:
+                logger.warning("tracemalloc is already tracing, allocation sampling is disabled")
+                self.sampling = 1.0
+        elif self.sampling >= 1:
+            self._start_tracing()
+        self.next_snapshot = now + self.interval
+        self.running = True
+
+    def stop(self):
+        """Stop snapshots, and tracing if we started it."""
+        self.running = False
+        self._stop_tracing()
+
+    def _start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.owns_tracing = True
+
+    def _stop_tracing(self):
+        if self.owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.owns_tracing = False
+
+    def tick(self, now):
+        """
+        Advance the schedule, called on every collector sample.
+
+        Args:
+            now: Current time in epoch seconds
+
+        Returns:
+            True if a snapshot was taken
+        """
+        if not self.running:
+            return False
+
+        # Open the tracing window ahead of a sampled snapshot
+        if self.sampling < 1 and not self.owns_tracing and now >= self.next_snapshot - self.interval * self.sampling:
+            self._start_tracing()
+        if now < self.next_snapshot:
+            return False
+
+        self.next_snapshot += self.interval
+        if self.next_snapshot <= now:
+            # Samples were missed (the process was suspended), don't catch up
+            self.next_snapshot = now + self.interval
+        if not tracemalloc.is_tracing():
+            return False
+
+        self.snapshot(now)
+        if self.sampling < 1:
+            self._stop_tracing()
+        return True
+
+    def snapshot(self, now):
+        """Take a snapshot and compute the top changes of every grouping."""
+        started = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot()
+        traced, peak = tracemalloc.get_traced_memory()
+        by_traceback = traceback_sizes(snapshot)
+        del snapshot
+
+        # Lines and files are summed from the (far fewer) distinct tracebacks
+        groups = {grouping: {} for grouping in ALLOCATION_GROUPINGS}
+        traces = 0
+        for frames, (size, count) in by_traceback.items():
+            site = frames[0]
+            if site[0] in IGNORED_FILES:
+                continue
+            traces += count
+            groups['traceback'][frames] = [size, count]
+            for grouping, key in (('lineno', site), ('filename', site[0])):
+                entry = groups[grouping].get(key)
+                if entry is None:
+                    groups[grouping][key] = [size, count]
+                else:
+                    entry[0] += size
+                    entry[1] += count
+
+        first = self.first if self.sampling >= 1 else None
+        for grouping, current in groups.items():
+            self.tops[(grouping, 'none')] = self._top_changes(current, None)
+            self.tops[(grouping, 'previous')] = self._top_changes(
+                current, self.previous[grouping] if self.previous else {})
+            if first is not None:
+                self.tops[(grouping, 'start')] = self._top_changes(current, first[grouping])
+        if self.first is None and self.sampling >= 1:
+            self.first = groups
+            self.tops.update({(grouping, 'start'): [] for grouping in ALLOCATION_GROUPINGS})
+
+        self.previous = groups
+        self.previous_time = self.snapshot_time
+        self.snapshot_time = now
+        self.snapshot_count += 1
+        self.history.append({
+            'timestamp': datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'),
+            'traced_mb': round(traced / (1024 * 1024), 2),
+            'peak_mb': round(peak / (1024 * 1024), 2),
+            'tracemalloc_mb': round(tracemalloc.get_tracemalloc_memory() / (1024 * 1024), 2),
+            'traces': traces,
+            'sites': len(groups['lineno']),
+            'snapshot_ms': round((time.perf_counter() - started) * 1000, 1)
+        })
+        if self.sampling >= 1:
+            # Peaks are per interval
+            tracemalloc.reset_peak()
+
+    def _top_changes(self, current, baseline):
+        """
+        The top_n sites by absolute size change against a baseline.
+
+        Args:
+            current: {key: [size, count]} of the latest snapshot
+            baseline: Same, of the snapshot compared to (None to rank by size)
+
+        Returns:
+            List of (key, size, count, size change, count change)
+        """
+        if baseline is None:
+            return nlargest(self.top_n, ((key, size, count, 0, 0) for key, (size, count) in current.items()),
+                            key=lambda change: change[1])
+
+        changes = []
+        for key, (size, count) in current.items():
+            old_size, old_count = baseline.get(key, (0, 0))
+            if size != old_size or count != old_count:
+                changes.append((key, size, count, size - old_size, count - old_count))
+        for key, (old_size, old_count) in baseline.items():
+            if key not in current:
+                changes.append((key, 0, 0, -old_size, -old_count))
+        return nlargest(self.top_n, changes, key=lambda change: abs(change[3]))
+
+    def get_top(self, grouping='lineno', compare='previous', top_n=20):
+        """
+        Get the allocation sites that changed most at the latest snapshot.
+
+        Args:
+            grouping: One of ALLOCATION_GROUPINGS
+            compare: 'previous' or 'start' snapshot, or 'none' to rank by size
+            top_n: Number of sites to return (at most the tracker's top_n)
+
+        Returns:
+            List of site dictionaries with size and count, and their changes
+        """
+        if grouping not in ALLOCATION_GROUPINGS:
+            raise ValueError(f"Unknown grouping '{grouping}', use one of {', '.join(ALLOCATION_GROUPINGS)}")
+        if compare not in ALLOCATION_BASELINES:
+            raise ValueError(f"Unknown baseline '{compare}', use one of {', '.join(ALLOCATION_BASELINES)}")
+        if compare == 'start' and self.sampling < 1:
+            raise ValueError("Comparing with the first snapshot needs continuous tracing (sampling 1)")
+
+        sites = []
+        for key, size, count, size_diff, count_diff in self.tops.get((grouping, compare), [])[:top_n]:
+            site = _site(grouping, key)
+            site.update({
+                'size_kb': round(size / 1024, 1),
+                'count': count,
+                'size_diff_kb': round(size_diff / 1024, 1),
+                'count_diff': count_diff
+            })
+            sites.append(site)
+        return sites
+
+    def get_status(self):
+        """Settings and state of the tracing."""
+        def timestamp(t):
+            return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S') if t else None
+
+        return {
+            'enabled': True,
+            'tracing': tracemalloc.is_tracing(),
+            'external': self.external,
+            'frames': self.frames,
+            'interval': self.interval,
+            'sampling': self.sampling,
+            'snapshots': self.snapshot_count,
+            'snapshot_time': timestamp(self.snapshot_time),
+            'previous_time': timestamp(self.previous_time),
+            'next_snapshot': timestamp(self.next_snapshot) if self.running else None,
+            'latest': self.history[-1] if self.history else None
+        }
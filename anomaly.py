@@ -0,0 +1,250 @@
+"""
+Streaming anomaly detection over memory metrics.
+
+Every metric column of each sample (RAM and swap fields, per-process RSS,
+per-cgroup usage) is a series fed to three detectors:
+
+    * EWMA/EWMVar: exponentially weighted mean and variance with a time
+      constant, so variable-rate samples weigh by the time they cover.
+    * Robust median/MAD over a sliding window of the latest values, which
+      a single outlier cannot drag along like a mean.
+    * Seasonal baseline: mean per hour of day from the hourly rollups, for
+      series that have them (RAM and swap percent), and the spread of the
+      raw samples around it: the variance within each hour plus that of
+      the hourly means, so the noise of a single sample is not scored as
+      a deviation from the usual day.
+
+A value is anomalous when both the EWMA and the median/MAD scores exceed the
+threshold (a sudden cache drop, a swap spike), or when it is far from what is
+usual for this hour of the day. Scales have a floor relative to the series
+magnitude, so flat series do not fire on noise.
+
+Updates cost O(1) apart from the window, a sorted list of fixed size kept with
+bisect, so the cost per series is bounded and does not grow with time. The
+median/MAD is only computed to confirm values the EWMA already flags.
+"""
+import math
+from bisect import bisect_left, insort
+from collections import deque
+
+# Consistency constant making the MAD an estimate of the standard deviation
+MAD_SCALE = 1.4826
+
+
+class SeriesState:
+    """Detector state of one series."""
+
+    __slots__ = ('label', 'floor', 'mean', 'var', 'last_time', 'count',
+                 'window', 'sorted_window', 'last_seen')
+
+    def __init__(self, label, floor, window_size):
+        self.label = label
+        self.floor = floor
+        self.mean = None
+        self.var = 0.0
+        self.last_time = None
+        self.count = 0
+        self.window = deque(maxlen=window_size)
+        self.sorted_window = []
+        self.last_seen = None
+
+    def median_mad(self):
+        """Median and median absolute deviation of the window."""
+        values = self.sorted_window
+        n = len(values)
+        median = (values[(n - 1) // 2] + values[n // 2]) / 2
+        deviations = sorted(abs(v - median) for v in values)
+        return median, (deviations[(n - 1) // 2] + deviations[n // 2]) / 2
+
+
+class SeasonalBaseline:
+    """Mean and spread of a series per hour of the day (Welford's algorithm)."""
+
+    def __init__(self):
+        self.counts = [0] * 24
+        self.means = [0.0] * 24
+        self.m2 = [0.0] * 24
+        self.within = [0.0] * 24   # Sum of the variances of the samples within each rollup
+        # Samples of the hour being rolled up
+        self.sample_count = 0
+        self.sample_mean = 0.0
+        self.sample_m2 = 0.0
+
+    def add_sample(self, value):
+        """Add a raw sample of the current hour."""
+        self.sample_count += 1
+        delta = value - self.sample_mean
+        self.sample_mean += delta / self.sample_count
+        self.sample_m2 += delta * (value - self.sample_mean)
+
+    def add(self, hour, value):
+        """Add one rollup value for an hour of the day, closing the hour's samples."""
+        if self.sample_count > 1:
+            self.within[hour] += self.sample_m2 / (self.sample_count - 1)
+        self.sample_count = 0
+        self.sample_mean = self.sample_m2 = 0.0
+
+        self.counts[hour] += 1
+        delta = value - self.means[hour]
+        self.means[hour] += delta / self.counts[hour]
+        self.m2[hour] += delta * (value - self.means[hour])
+
+    def expected(self, hour, min_count):
+        """Mean and standard deviation of the samples of an hour, None until min_count days are known."""
+        count = self.counts[hour]
+        if count < min_count:
+            return None
+        between = self.m2[hour] / (count - 1) if count > 1 else 0.0
+        return self.means[hour], math.sqrt(between + self.within[hour] / count)
+
+
+class AnomalyDetector:
+    def __init__(self, threshold=5.0, seasonal_threshold=4.0, time_constant=60,
+                 window_size=120, warmup=30, hold_seconds=60, seasonal_min_days=3,
+                 relative_floor=0.01, expire_seconds=600):
+        """
+        Initialize the anomaly detector.
+
+        Args:
+            threshold: Score (in standard deviations) both the EWMA and the
+                median/MAD detectors must reach
+            seasonal_threshold: Score against the hour-of-day baseline
+            time_constant: EWMA time constant in seconds
+            window_size: Number of latest values in the median/MAD window
+            warmup: Samples a series needs before it can be flagged
+            hold_seconds: How long an anomaly stays active after its last
+                anomalous value, so alerts do not flap
+            seasonal_min_days: Rollups an hour needs before its baseline is used
+            relative_floor: Minimum scale as a fraction of the series magnitude
+            expire_seconds: Forget series not updated for this long
+        """
+        self.threshold = threshold
+        self.seasonal_threshold = seasonal_threshold
+        self.time_constant = time_constant
+        self.window_size = window_size
+        self.warmup = warmup
+        self.hold_seconds = hold_seconds
+        self.seasonal_min_days = seasonal_min_days
+        self.relative_floor = relative_floor
+        self.expire_seconds = expire_seconds
+
+        self.series = {}      # key -> SeriesState
+        self.seasonal = {}    # key -> SeasonalBaseline
+        self.active = {}      # key -> anomaly dictionary
+        self.last_expiry = None
+
+    def update(self, key, value, now, label=None, floor=0.0, hour=None):
+        """
+        Feed one value of a series and score it.
+
+        Args:
+            key: Series key, e.g. 'memory.cached' or 'process:1234'
+            value: New value
+            now: Sample time in epoch seconds
+            label: Human readable series name (defaults to the key)
+            floor: Absolute minimum scale of the series
+            hour: Hour of the day, to compare against the seasonal baseline
+                (the value also adds to the spread of that baseline)
+
+        Returns:
+            The anomaly dictionary if the value is anomalous, else None
+        """
+        state = self.series.get(key)
+        if state is None:
+            state = self.series[key] = SeriesState(label or key, floor, self.window_size)
+        state.last_seen = now
+
+        anomaly = None
+        if state.count >= self.warmup:
+            anomaly = self._score(key, state, value, hour)
+
+        # EWMA/EWMVar with a weight for the time since the previous value
+        if state.mean is None:
+            state.mean = value
+        else:
+            dt = now - state.last_time
+            alpha = 1 - math.exp(-dt / self.time_constant) if dt > 0 else 0.0
+            diff = value - state.mean
+            increment = alpha * diff
+            state.mean += increment
+            state.var = (1 - alpha) * (state.var + diff * increment)
+        state.last_time = now
+        state.count += 1
+
+        # Sliding window, kept sorted alongside the arrival order
+        if len(state.window) == state.window.maxlen:
+            oldest = state.window[0]
+            del state.sorted_window[bisect_left(state.sorted_window, oldest)]
+        state.window.append(value)
+        insort(state.sorted_window, value)
+
+        if hour is not None:
+            baseline = self.seasonal.get(key)
+            if baseline is None:
+                baseline = self.seasonal[key] = SeasonalBaseline()
+            baseline.add_sample(value)
+
+        if anomaly:
+            anomaly['time'] = now
+            self.active[key] = anomaly
+        return anomaly
+
+    def _score(self, key, state, value, hour):
+        """Score a value against the state before it is added."""
+        scale_floor = max(state.floor, abs(state.mean) * self.relative_floor, 1e-9)
+
+        ewma_score = abs(value - state.mean) / max(math.sqrt(state.var), scale_floor)
+        if ewma_score >= self.threshold:
+            # Only confirm with the window when the cheap detector fires
+            median, mad = state.median_mad()
+            robust_score = abs(value - median) / max(mad * MAD_SCALE, scale_floor)
+            if robust_score >= self.threshold:
+                return {
+                    'key': key,
+                    'label': state.label,
+                    'detector': 'ewma+mad',
+                    'value': value,
+                    'expected': median,
+                    'score': round(min(ewma_score, robust_score), 1),
+                }
+
+        baseline = self.seasonal.get(key)
+        expected = baseline.expected(hour, self.seasonal_min_days) if baseline and hour is not None else None
+        if expected:
+            mean, std = expected
+            seasonal_score = abs(value - mean) / max(std, scale_floor)
+            if seasonal_score >= self.seasonal_threshold:
+                return {
+                    'key': key,
+                    'label': state.label,
+                    'detector': 'seasonal',
+                    'value': value,
+                    'expected': mean,
+                    'score': round(seasonal_score, 1),
+                }
+        return None
+
+    def add_seasonal(self, key, hour, value):
+        """Add an hourly rollup value to the seasonal baseline of a series, closing its samples of the hour."""
+        baseline = self.seasonal.get(key)
+        if baseline is None:
+            baseline = self.seasonal[key] = SeasonalBaseline()
+        baseline.add(hour, value)
+
+    def get_active(self, now):
+        """
+        Get the anomalies active at a time, dropping expired ones.
+
+        Returns:
+            List of anomaly dictionaries, highest score first
+        """
+        for key in [k for k, a in self.active.items() if now - a['time'] > self.hold_seconds]:
+            del self.active[key]
+
+        # Forget series that stopped reporting (exited processes, removed cgroups)
+        if self.last_expiry is None or now - self.last_expiry >= self.expire_seconds:
+            self.last_expiry = now
+            for key in [k for k, s in self.series.items() if now - s.last_seen > self.expire_seconds]:
+                del self.series[key]
+
+        return sorted(self.active.values(), key=lambda a: a['score'], reverse=True)
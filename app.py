@@ -1,7 +1,10 @@
 import os
 import logging
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file
+from config import TRACKER_CONFIG
 from memory_tracker import MemoryTracker
+from shared_state import SHARED_DIR_ENV, SharedMemoryTracker
+from wire_format import COLUMNAR_MIMETYPE, encode_history
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -12,13 +15,33 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
 # Initialize memory tracker with expanded parameters
-memory_tracker = MemoryTracker(
-    history_minutes=10,             # 10 minutes of real-time history 
-    sample_interval=1,              # 1 second sampling
-    long_term_history_days=7,       # 7 days of history
-    alert_threshold=75,             # Alert at 75% usage
-    export_dir='./exports'          # Directory for exports
-)
+shared_dir = os.environ.get(SHARED_DIR_ENV)
+if shared_dir:
+    # Production mode: read the state published by the single collector process
+    memory_tracker = SharedMemoryTracker(shared_dir, **TRACKER_CONFIG)
+else:
+    # The collector thread starts with the first request, so importing the app stays cheap
+    tracker_config = dict(TRACKER_CONFIG)
+    autostart = tracker_config.pop('autostart', True)
+    memory_tracker = MemoryTracker(**tracker_config, autostart=False)
+
+    if autostart:
+        @app.before_request
+        def start_collector(collector=memory_tracker):
+            """Start sampling when the app serves its first request."""
+            if not collector.running:
+                collector.start()
+
+def wants_columnar():
+    """Check whether the client negotiated the compact columnar encoding."""
+    best = request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE])
+    return best == COLUMNAR_MIMETYPE
+
+def columnar_response(payload):
+    """Wrap an encoded columnar payload in a response."""
+    response = Response(payload, mimetype=COLUMNAR_MIMETYPE)
+    response.vary.add('Accept')
+    return response
 
 @app.route('/')
 def index():
@@ -39,8 +62,15 @@ def get_current_memory():
 def get_memory_history():
     """API endpoint to get historical memory usage data."""
     try:
-        data = memory_tracker.get_history()
-        return jsonify(data)
+        max_points = request.args.get('max_points', type=int)
+        if wants_columnar():
+            data = memory_tracker.get_history(with_times=True, max_points=max_points)
+            return columnar_response(encode_history(data))
+
+        data = memory_tracker.get_history(max_points=max_points)
+        response = jsonify(data)
+        response.vary.add('Accept')
+        return response
     except Exception as e:
         logger.error(f"Error getting memory history: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -50,11 +80,90 @@ def get_memory_by_process():
     """API endpoint to get memory usage by process."""
     try:
         data = memory_tracker.get_process_memory_usage()
-        return jsonify(data)
+        response = jsonify(data)
+        sweep_age = memory_tracker.get_process_sweep_age() if shared_dir else None
+        if sweep_age is not None:
+            # Workers serve the collector's last sweep, say how old it is
+            response.headers['X-Sweep-Age'] = str(sweep_age)
+        return response
     except Exception as e:
         logger.error(f"Error getting process memory data: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/memory/groups')
+def get_memory_by_group():
+    """API endpoint to get memory usage by application (process group)."""
+    try:
+        group_by = request.args.get('by', 'name')
+        top_n = request.args.get('top_n', type=int)
+        data = memory_tracker.get_process_groups(group_by=group_by, top_n=top_n)
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting process group data: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/groups/history')
+def get_group_memory_history():
+    """API endpoint to get the memory history of one process group."""
+    try:
+        group_by = request.args.get('by', 'name')
+        name = request.args.get('name', '')
+        data = memory_tracker.get_process_group_history(group_by, name)
+        if data is None:
+            return jsonify({"error": f"Unknown {group_by} group {name}"}), 404
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting process group history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/groups/leaks')
+def get_group_memory_leaks():
+    """API endpoint to get process groups with potential memory leaks."""
+    try:
+        group_by = request.args.get('by', 'name')
+        min_growth = int(request.args.get('min_growth', 20))
+        min_time = int(request.args.get('min_time', 120))
+        data = memory_tracker.get_process_group_leaks(
+            group_by=group_by,
+            min_growth_percent=min_growth,
+            min_time_seconds=min_time
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting process group leaks: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/groups/top')
+def get_top_memory_consumers():
+    """API endpoint to get the names or users that used the most memory over a time window."""
+    try:
+        group_by = request.args.get('by', 'name')
+        hours = float(request.args.get('hours', 24))
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        top_n = int(request.args.get('top_n', 10))
+        name = request.args.get('name')
+        data = memory_tracker.get_heavy_hitters(
+            group_by=group_by,
+            hours=hours,
+            start=start,
+            end=end,
+            top_n=top_n,
+            name=name
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting top memory consumers: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/memory/system-info')
 def get_system_information():
     """API endpoint to get system information."""
@@ -70,23 +179,130 @@ def get_memory_alerts():
     """API endpoint to get memory usage alerts."""
     try:
         active_only = request.args.get('active_only', 'false').lower() == 'true'
-        data = memory_tracker.get_alerts(active_only=active_only)
+        alert_type = request.args.get('type')
+        data = memory_tracker.get_alerts(active_only=active_only, alert_type=alert_type)
         return jsonify(data)
     except Exception as e:
         logger.error(f"Error getting alerts: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/memory/notifications')
+def get_notification_information():
+    """API endpoint to get the delivery state of alert notifications."""
+    try:
+        return jsonify(memory_tracker.get_notification_stats())
+    except Exception as e:
+        logger.error(f"Error getting notification statistics: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/sampling')
+def get_sampling_information():
+    """API endpoint to get the sampling rate and memory pressure."""
+    try:
+        data = memory_tracker.get_sampling_info()
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting sampling information: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/paging-rates')
+def get_paging_rates():
+    """API endpoint to get the page fault, swap and reclaim rates and the processes faulting most."""
+    try:
+        top_n = int(request.args.get('top_n', 10))
+        return jsonify(memory_tracker.get_paging_rates(top_n=top_n))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting paging rates: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/batch')
+def get_memory_batch():
+    """API endpoint to get several dashboard sections in a single response."""
+    try:
+        sections = request.args.get('sections')
+        sections = sections.split(',') if sections else None
+
+        # Per-section cursors, e.g. ?history_cursor=120&alerts_cursor=3
+        cursors = {}
+        for section in ('history', 'alerts'):
+            cursor = request.args.get(f'{section}_cursor')
+            if cursor is not None:
+                cursors[section] = int(cursor)
+
+        active_only = request.args.get('active_only', 'false').lower() == 'true'
+        top_n = int(request.args.get('top_n', 10))
+        group_by = request.args.get('group_by', 'name')
+        data = memory_tracker.get_batch(
+            sections=sections,
+            cursors=cursors,
+            active_alerts_only=active_only,
+            top_n=top_n,
+            group_by=group_by
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting memory batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/memory/long-term')
 def get_long_term_memory_history():
     """API endpoint to get long-term memory usage history."""
     try:
         period = request.args.get('period', 'daily')
-        data = memory_tracker.get_long_term_history(period=period)
+        max_points = request.args.get('max_points', type=int)
+        data = memory_tracker.get_long_term_history(period=period, max_points=max_points)
         return jsonify(data)
     except Exception as e:
         logger.error(f"Error getting long-term history: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/memory/forecast')
+def get_memory_forecast():
+    """API endpoint to forecast when memory usage reaches a threshold."""
+    try:
+        threshold = request.args.get('threshold', type=float)
+        horizon = int(request.args.get('horizon', 168))
+        top_n = int(request.args.get('top_n', 5))
+        data = memory_tracker.get_forecast(
+            threshold=threshold,
+            horizon_hours=horizon,
+            top_n=top_n
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error forecasting memory usage: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/allocations')
+def get_allocation_sites():
+    """API endpoint to get the Python allocation sites that changed most between snapshots."""
+    try:
+        group_by = request.args.get('group_by', 'lineno')
+        compare = request.args.get('compare', 'previous')
+        top_n = int(request.args.get('top_n', 20))
+        data = memory_tracker.get_allocations(group_by=group_by, compare=compare, top_n=top_n)
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting allocation sites: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/allocations/history')
+def get_allocation_history():
+    """API endpoint to get the traced memory and tracing overhead of recent allocation snapshots."""
+    try:
+        return jsonify(memory_tracker.get_allocation_history())
+    except Exception as e:
+        logger.error(f"Error getting allocation history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/memory/leaks')
 def get_memory_leaks():
     """API endpoint to get potential memory leaks."""
@@ -102,6 +318,45 @@ def get_memory_leaks():
         logger.error(f"Error getting memory leaks: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/memory/cgroups')
+def get_memory_by_cgroup():
+    """API endpoint to get memory usage by cgroup (container)."""
+    try:
+        top_n = request.args.get('top_n', type=int)
+        data = memory_tracker.get_cgroup_usage(top_n=top_n)
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting cgroup memory data: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/cgroups/history')
+def get_cgroup_memory_history():
+    """API endpoint to get the memory history of one cgroup."""
+    try:
+        path = request.args.get('path', '/')
+        data = memory_tracker.get_cgroup_history(path)
+        if data is None:
+            return jsonify({"error": f"Unknown cgroup {path}"}), 404
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting cgroup history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memory/cgroups/leaks')
+def get_cgroup_memory_leaks():
+    """API endpoint to get cgroups with potential memory leaks."""
+    try:
+        min_growth = int(request.args.get('min_growth', 20))
+        min_time = int(request.args.get('min_time', 120))
+        data = memory_tracker.get_cgroup_leaks(
+            min_growth_percent=min_growth,
+            min_time_seconds=min_time
+        )
+        return jsonify(data)
+    except Exception as e:
+        logger.error(f"Error getting cgroup memory leaks: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/memory/filter-processes')
 def filter_processes():
     """API endpoint to filter processes."""
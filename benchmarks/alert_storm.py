@@ -0,0 +1,165 @@
+"""
+Collector latency and alert delivery during an alert storm.
+
+A local HTTP server stands in for a webhook receiver; it can answer slowly
+and fail a fraction of the requests. The tracker is driven sample by sample
+against a simulated system (fake_system.py) while every other sample raises
+--keys keyed alerts, once without alert sinks and once delivering to the
+stand-in, and the collector iteration times of both runs are compared. The
+stand-in records what it received, so delivery, coalescing and retries can
+be checked without any external service.
+
+Usage:
+    python benchmarks/alert_storm.py --keys 200 --samples 200 --sink-delay 0.5 --fail-rate 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from fake_system import FakeSystem  # noqa: E402
+from tracker_suite import percentiles  # noqa: E402
+
+
+class StandIn(ThreadingHTTPServer):
+    """Webhook receiver recording the notifications it accepts."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, fail_rate=0.0):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.random = random.Random(1)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.notifications = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/alerts"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        time.sleep(server.delay)
+        with server.lock:
+            server.requests += 1
+            fail = server.random.random() < server.fail_rate
+            if fail:
+                server.failures += 1
+            else:
+                server.notifications.extend(json.loads(body)['notifications'])
+        self.send_response(500 if fail else 204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(system, export_dir, samples, keys, sinks, drain_seconds):
+    """Drive a tracker through the storm; return its iteration times and delivery counters."""
+    from memory_tracker import MemoryTracker
+    tracker = MemoryTracker(history_minutes=10, sample_interval=1, export_dir=export_dir, cgroup_root=None,
+                            alert_sinks=sinks, alert_coalesce_seconds=1, alert_rate_limit=600,
+                            autostart=False)
+    tracker.process_interval = 3600
+    dispatcher = tracker.alert_dispatcher
+    if dispatcher:
+        dispatcher.retry_backoff = 0.2
+
+    iteration_times = []
+    alerts = 0
+    for sample in range(samples):
+        system.tick()
+        start = time.perf_counter()
+        tracker.collect_sample()
+        # Every key fires on even samples and clears on odd ones, so it fires again and again
+        firing = []
+        if sample % 2 == 0:
+            firing = [{'type': 'storm', 'key': f'cgroup-{i}', 'level': 'warning', 'value': sample,
+                       'message': f'cgroup-{i} over its limit', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+                      for i in range(keys)]
+            alerts += keys
+        tracker._update_keyed_alerts('storm', firing)
+        iteration_times.append(time.perf_counter() - start)
+
+    stats = None
+    if dispatcher:
+        # Let the worker deliver the coalesced tail and the retries
+        dispatcher.flush(drain_seconds)
+        dispatcher.stop()
+        stats = tracker.get_notification_stats()
+    return iteration_times, alerts, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=1000)
+    parser.add_argument('--samples', type=int, default=100, help='collector iterations per run')
+    parser.add_argument('--keys', type=int, default=100, help='alert keys firing during the storm')
+    parser.add_argument('--sink-delay', type=float, default=0.2, help='seconds the stand-in takes to answer')
+    parser.add_argument('--fail-rate', type=float, default=0.2, help='fraction of requests the stand-in fails')
+    parser.add_argument('--drain', type=float, default=15, help='seconds allowed to deliver after the storm')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    export_dir = tempfile.mkdtemp(prefix='memtrack-bench-')
+    stand_in = StandIn(delay=args.sink_delay, fail_rate=args.fail_rate)
+    threading.Thread(target=stand_in.serve_forever, daemon=True).start()
+
+    system = FakeSystem(processes=args.processes)
+    system.install()
+    try:
+        # Warm up, so the order of the runs does not matter
+        run(system, export_dir, args.samples, args.keys, None, 0)
+        quiet_times, alerts, _ = run(system, export_dir, args.samples, args.keys, None, 0)
+        storm_times, _, stats = run(system, export_dir, args.samples, args.keys, [stand_in.url], args.drain)
+    finally:
+        system.uninstall()
+        stand_in.shutdown()
+
+    received = stand_in.notifications
+    result = {
+        'alerts': alerts,
+        'without_sinks': percentiles(quiet_times),
+        'with_webhook': percentiles(storm_times),
+        'dispatcher': stats,
+        'stand_in': {
+            'requests': stand_in.requests,
+            'failed_requests': stand_in.failures,
+            'notifications': len(received),
+            'alerts_covered': sum(n['count'] for n in received),
+            'keys': len({n['key'] for n in received}),
+        },
+    }
+
+    print(f"{'':<16} {'iter p50':>9} {'iter p99':>9} {'mean':>9}")
+    for name in ('without_sinks', 'with_webhook'):
+        row = result[name]
+        print(f"{name:<16} {row['p50_ms']:>9} {row['p99_ms']:>9} {row['mean_ms']:>9}")
+    print(f"{alerts} alerts -> {len(received)} notifications received covering "
+          f"{result['stand_in']['alerts_covered']} alerts, {stand_in.requests} requests "
+          f"({stand_in.failures} failed), dispatcher: " +
+          ', '.join(f"{k} {stats[k]}" for k in ('queued', 'dropped', 'coalesced', 'rate_limited', 'sent', 'retried', 'failed')))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Cold start of the memtrack commands and of the library.
+
+Runs each command in a fresh interpreter several times and reports the median
+wall time until it exits, next to the time an empty interpreter and a bare
+"import psutil" take (the floor the tracker cannot go below). Sources are
+compiled first, as they are in an installed package, since compiling them on
+every run would dominate the figures.
+
+Usage:
+    python benchmarks/cold_start.py --runs 20 --budget 100
+"""
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> interpreter arguments; the commands are the ones the budget applies to
+BASELINES = {
+    'python': ['-c', 'pass'],
+    'import psutil': ['-c', 'import psutil'],
+}
+COMMANDS = {
+    'import memory_tracker': ['-c', 'import memory_tracker'],
+    'library start/stop': ['-c', 'import memory_tracker\n'
+                                 'with memory_tracker.MemoryTracker(cgroup_root=None, anomaly_detection=False,'
+                                 ' uss_budget=0, track_processes=False, autostart=False) as t: t.collect_sample()'],
+    'memtrack tail -c 1': ['-m', 'memtrack', 'tail', '--count', '1'],
+    'memtrack top': ['-m', 'memtrack', 'top'],
+    'memtrack record -c 1': ['-m', 'memtrack', 'record', os.devnull, '--count', '1'],
+}
+
+
+def measure(args, runs):
+    """Median and maximum wall time of a fresh interpreter running args, in ms."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=PROJECT_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return {
+        'median_ms': round(statistics.median(times) * 1000, 1),
+        'max_ms': round(max(times) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15, help='runs per command')
+    parser.add_argument('--budget', type=float, default=100, help='median milliseconds a command may take')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    compileall.compile_dir(PROJECT_DIR, maxlevels=0, quiet=1)
+    results = {}
+    for name, command in {**BASELINES, **COMMANDS}.items():
+        results[name] = measure(command, args.runs)
+
+    print(f"{'':<24} {'median ms':>10} {'max ms':>8}")
+    over = []
+    for name, row in results.items():
+        flag = ''
+        if name in COMMANDS and row['median_ms'] > args.budget:
+            flag = '  over budget'
+            over.append(name)
+        print(f"{name:<24} {row['median_ms']:>10} {row['max_ms']:>8}{flag}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'budget_ms': args.budget, 'results': results}, f, indent=2)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Synthetic system for benchmarks: a stand-in for the psutil module.
+
+FakeSystem generates N processes in application trees (a parent and its
+children running the same program) with lognormal RSS sizes, and evolves them
+on every tick():
+    * churn: a fraction of the processes exit and as many new ones start
+    * noise: every process' RSS takes a small random walk
+    * leaks: designated processes grow by a fixed percentage per tick
+
+It implements the parts of the psutil API the tracker uses (virtual_memory,
+swap_memory, process_iter, Process, cpu_count) and delegates anything else
+to the real psutil, so it can replace the module the tracker imported:
+
+    system = FakeSystem(processes=10000, churn=0.01, leaks=5)
+    system.install()    # memory_tracker.psutil (and friends) now see the fake
+    ...
+    system.tick()
+"""
+import random
+from collections import namedtuple
+
+import psutil
+
+MB = 1024 * 1024
+
+svmem = namedtuple('svmem', 'total available percent used free active inactive buffers cached shared slab')
+sswap = namedtuple('sswap', 'total used free percent sin sout')
+pmem = namedtuple('pmem', 'rss vms shared text lib data dirty')
+pfullmem = namedtuple('pfullmem', 'rss vms shared text lib data dirty uss pss swap')
+
+# Programs the processes run; the weight sets how many processes run each
+PROGRAMS = (
+    ('chrome', 30), ('postgres', 15), ('gunicorn', 15), ('python', 10), ('node', 10),
+    ('java', 5), ('nginx', 5), ('bash', 5), ('sshd', 3), ('systemd', 2),
+)
+USERS = ('root', 'www-data', 'postgres', 'alice', 'bob')
+
+# Modules whose psutil reference install() replaces
+PATCHED_MODULES = ('memory_tracker', 'uss_collector')
+
+
+class FakeProcess:
+    """Process object handed out by process_iter() and Process()."""
+
+    def __init__(self, system, pid, attrs=None):
+        self._system = system
+        self.pid = pid
+        if attrs is not None:
+            self.info = {attr: self._attribute(attr) for attr in attrs}
+
+    def _entry(self):
+        entry = self._system.processes.get(self.pid)
+        if entry is None:
+            raise psutil.NoSuchProcess(self.pid)
+        return entry
+
+    def _attribute(self, attr):
+        entry = self._entry()
+        if attr == 'pid':
+            return self.pid
+        if attr == 'memory_percent':
+            return entry['rss'] / self._system.total * 100
+        return entry[attr]
+
+    def memory_info(self):
+        rss = self._entry()['rss']
+        return pmem(rss, rss * 2, rss // 4, 0, 0, rss, 0)
+
+    def memory_full_info(self):
+        rss = self._entry()['rss']
+        uss = rss * 3 // 4
+        return pfullmem(rss, rss * 2, rss // 4, 0, 0, rss, 0, uss, uss + rss // 8, 0)
+
+    def memory_percent(self):
+        return self._attribute('memory_percent')
+
+
+class FakeSystem:
+    def __init__(self, processes=1000, churn=0.01, leaks=5, leak_rate=0.03,
+                 noise=0.005, total_gb=None, swap_gb=8, seed=1):
+        """
+        Generate the initial process table.
+
+        Args:
+            processes: Number of processes
+            churn: Fraction of processes replaced on every tick
+            leaks: Number of leaking processes (each runs its own program,
+                'leaky0', 'leaky1', ...)
+            leak_rate: Fraction a leaking process grows by on every tick
+            noise: Standard deviation of the RSS random walk per tick
+            total_gb: Simulated RAM size, by default 1.5 times the initial total RSS
+            swap_gb: Simulated swap size
+            seed: Random seed, so runs are repeatable
+        """
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.leak_rate = leak_rate
+        self.noise = noise
+        self.total = total_gb * 1024 * MB if total_gb else None
+        self.swap_total = swap_gb * 1024 * MB
+        self.swap_used = 0
+        self.ticks = 0
+
+        self.processes = {}   # pid -> {'ppid', 'name', 'username', 'rss'}
+        self.leaking = set()
+        self.next_pid = 2
+        self.processes[1] = {'ppid': 0, 'name': 'init', 'username': 'root', 'rss': 12 * MB}
+
+        self._names = [name for name, _ in PROGRAMS]
+        self._weights = [weight for _, weight in PROGRAMS]
+        while len(self.processes) < processes - leaks:
+            self._spawn()
+        for i in range(leaks):
+            pid = self._spawn(name=f'leaky{i}', parent=1, rss=50 * MB)
+            self.leaking.add(pid)
+        self.process_count = len(self.processes)
+        if self.total is None:
+            self.total = int(sum(entry['rss'] for entry in self.processes.values()) * 1.5)
+
+        self._originals = {}
+
+    def _spawn(self, name=None, parent=None, rss=None):
+        """Start a process, as a child of a same-program process half of the time."""
+        name = name or self.random.choices(self._names, self._weights)[0]
+        if parent is None:
+            parent = 1
+            siblings = [pid for pid in self._sample_pids(8) if self.processes[pid]['name'] == name]
+            if siblings and self.random.random() < 0.5:
+                parent = siblings[0]
+
+        pid = self.next_pid
+        self.next_pid += 1
+        self.processes[pid] = {
+            'ppid': parent,
+            'name': name,
+            'username': self.random.choice(USERS),
+            'rss': rss or int(self.random.lognormvariate(3, 1.2) * MB)
+        }
+        return pid
+
+    def _sample_pids(self, count):
+        """A few random live pids, cheap even with a large process table."""
+        pids = []
+        for _ in range(count):
+            pid = self.random.randrange(1, self.next_pid)
+            if pid in self.processes:
+                pids.append(pid)
+        return pids
+
+    def tick(self):
+        """Advance the simulation by one sample."""
+        self.ticks += 1
+
+        # Churn: exit some processes (never init or the leaking ones) and start as many
+        exits = int(len(self.processes) * self.churn)
+        for pid in self._sample_pids(exits * 2)[:exits]:
+            if pid != 1 and pid not in self.leaking:
+                self.processes.pop(pid, None)
+        while len(self.processes) < self.process_count:
+            self._spawn()
+
+        for pid, entry in self.processes.items():
+            if pid in self.leaking:
+                entry['rss'] = int(entry['rss'] * (1 + self.leak_rate))
+            elif self.noise:
+                entry['rss'] = max(int(entry['rss'] * (1 + self.random.gauss(0, self.noise))), 4096)
+
+    # psutil API
+
+    def virtual_memory(self):
+        used = min(sum(entry['rss'] for entry in self.processes.values()), self.total)
+        cached = (self.total - used) // 3
+        free = self.total - used - cached
+        available = free + cached
+        return svmem(self.total, available, round(used / self.total * 100, 1), used, free,
+                     used, cached, 0, cached, 0, 0)
+
+    def swap_memory(self):
+        free = self.swap_total - self.swap_used
+        percent = round(self.swap_used / self.swap_total * 100, 1) if self.swap_total else 0.0
+        return sswap(self.swap_total, self.swap_used, free, percent, 0, 0)
+
+    def process_iter(self, attrs=None):
+        for pid in list(self.processes):
+            try:
+                yield FakeProcess(self, pid, attrs or ['pid', 'name'])
+            except psutil.NoSuchProcess:
+                pass
+
+    def Process(self, pid):
+        if pid not in self.processes:
+            raise psutil.NoSuchProcess(pid)
+        return FakeProcess(self, pid)
+
+    def cpu_count(self, logical=True):
+        return 16
+
+    def __getattr__(self, name):
+        # Exceptions, constants and anything not simulated come from psutil
+        return getattr(psutil, name)
+
+    # Installation
+
+    def install(self):
+        """Make the tracker modules use this system instead of psutil."""
+        import importlib
+        for module_name in PATCHED_MODULES:
+            module = importlib.import_module(module_name)
+            self._originals[module_name] = module.psutil
+            module.psutil = self
+
+    def uninstall(self):
+        """Restore the real psutil."""
+        import importlib
+        for module_name, original in self._originals.items():
+            importlib.import_module(module_name).psutil = original
+        self._originals = {}
@@ -0,0 +1,319 @@
+"""
+End-to-end benchmark of the tracker against a synthetic system.
+
+For each process count, a FakeSystem (see fake_system.py) replaces psutil and
+a MemoryTracker is driven sample by sample, without its collector thread, to
+measure
+    * collector iteration time (every iteration includes a process sweep)
+    * p50/p99 latency of the Flask routes, through the test client
+    * memory footprint of the tracker (tracemalloc)
+    * leak-detection precision and recall, per process and per process group
+    * with --allocations, the cost of tracemalloc allocation tracking: the
+      collector iteration time while tracing and the time of each snapshot
+
+Everything runs offline. Results are written as JSON so two versions can be
+compared; --compare reports metrics that got worse by more than --tolerance.
+
+Usage:
+    python benchmarks/tracker_suite.py --processes 100 1000 10000 50000 --output after.json
+    python benchmarks/tracker_suite.py --allocations --allocation-frames 1 5 --allocation-sampling 0.25
+    python benchmarks/tracker_suite.py --compare before.json after.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from fake_system import FakeSystem  # noqa: E402
+
+RESULTS_VERSION = 1
+
+ENDPOINTS = (
+    '/api/memory/current',
+    '/api/memory/history',
+    '/api/memory/processes',
+    '/api/memory/batch?sections=current,history,processes,groups,alerts&active_only=true',
+    '/api/memory/groups?by=tree&top_n=20',
+    '/api/memory/leaks',
+    '/api/memory/alerts',
+    '/api/memory/forecast',
+)
+
+# Metrics compared by --compare: path in a scenario and whether higher is better
+COMPARED_METRICS = (
+    (('collector', 'p50_ms'), False),
+    (('collector', 'p99_ms'), False),
+    (('footprint_mb',), False),
+    (('leaks', 'process', 'recall'), True),
+    (('leaks', 'group', 'recall'), True),
+)
+
+
+def percentiles(values):
+    """p50, p99 and mean of a list of seconds, in milliseconds."""
+    values = sorted(values)
+    return {
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(values[len(values) // 2] * 1000, 3),
+        'p99_ms': round(values[min(int(len(values) * 0.99), len(values) - 1)] * 1000, 3),
+    }
+
+
+def precision_recall(detected, truth):
+    """Precision and recall of a detected set against the true set."""
+    hits = len(detected & truth)
+    return {
+        'detected': len(detected),
+        'expected': len(truth),
+        'precision': round(hits / len(detected), 3) if detected else 1.0,
+        'recall': round(hits / len(truth), 3) if truth else 1.0,
+    }
+
+
+def make_tracker(export_dir, **kwargs):
+    """A tracker that is only driven by the benchmark."""
+    from memory_tracker import MemoryTracker
+    tracker = MemoryTracker(history_minutes=10, sample_interval=1, export_dir=export_dir,
+                            cgroup_root=None, autostart=False, **kwargs)
+    if tracker.uss_collector:
+        # The fake system has no procfs, read USS/PSS through the psutil API
+        tracker.uss_collector.use_rollup = False
+    # Sweep processes on every iteration, the worst case of the collector
+    tracker.process_interval = 0
+    return tracker
+
+
+def measure_allocation_tracking(system, export_dir, iterations, baseline_p50, frames, sampling, interval):
+    """
+    Drive a tracker with allocation tracking on, snapshots following the wall clock.
+
+    Returns:
+        Dictionary with the collector iteration time while tracking (iterations
+        that took a snapshot excluded) and the snapshot statistics, for one
+        frames/sampling setting
+    """
+    tracker = make_tracker(export_dir, allocation_tracking=True, allocation_frames=frames,
+                           allocation_sampling=sampling, allocation_interval=interval)
+    allocation_tracker = tracker.allocation_tracker
+    try:
+        iteration_times = []
+        for _ in range(iterations):
+            system.tick()
+            count = allocation_tracker.snapshot_count
+            start = time.perf_counter()
+            tracker.collect_sample()
+            if allocation_tracker.snapshot_count == count:
+                iteration_times.append(time.perf_counter() - start)
+        snapshots = list(allocation_tracker.history)
+    finally:
+        allocation_tracker.stop()
+
+    collector = percentiles(iteration_times) if iteration_times else None
+    result = {
+        'frames': frames,
+        'sampling': sampling,
+        'interval': interval,
+        'collector': collector,
+        'overhead_percent': round((collector['p50_ms'] / baseline_p50 - 1) * 100, 1) if collector else None,
+        'snapshots': len(snapshots),
+    }
+    if snapshots:
+        result.update({
+            'snapshot_mean_ms': round(sum(s['snapshot_ms'] for s in snapshots) / len(snapshots), 1),
+            'snapshot_max_ms': max(s['snapshot_ms'] for s in snapshots),
+            'traced_mb': snapshots[-1]['traced_mb'],
+            'tracemalloc_mb': snapshots[-1]['tracemalloc_mb'],
+        })
+    return result
+
+
+def run_scenario(app_module, processes, iterations, requests, churn, leaks, footprint_iterations,
+                 allocation_settings=()):
+    """Benchmark one process count."""
+    export_dir = tempfile.mkdtemp(prefix='memtrack-bench-')
+
+    system = FakeSystem(processes=processes, churn=churn, leaks=leaks)
+    system.install()
+    try:
+        tracker = make_tracker(export_dir)
+        iteration_times = []
+        for _ in range(iterations):
+            system.tick()
+            start = time.perf_counter()
+            tracker.collect_sample()
+            iteration_times.append(time.perf_counter() - start)
+
+        leaking_pids = {pid for pid in system.leaking if pid in system.processes}
+        process_leaks = {leak['pid'] for leak in tracker.get_possible_memory_leaks(min_time_seconds=0)}
+        group_leaks = {leak['name'] for leak in tracker.get_process_group_leaks(group_by='name', min_time_seconds=0)}
+        leaking_names = {system.processes[pid]['name'] for pid in leaking_pids}
+
+        # Serve the routes from this tracker, with the usual sweep cadence
+        tracker.process_interval = tracker.sample_interval * 5
+        app_module.memory_tracker = tracker
+        client = app_module.app.test_client()
+        api = {}
+        for endpoint in ENDPOINTS:
+            latencies = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get(endpoint)
+                response.get_data()
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.get_data()[:200]}")
+            api[endpoint] = percentiles(latencies)
+
+        # Cost of allocation tracking, before tracemalloc is used for the footprint
+        baseline_p50 = percentiles(iteration_times)['p50_ms']
+        allocations = [
+            measure_allocation_tracking(system, export_dir, iterations, baseline_p50, frames, sampling, interval)
+            for frames, sampling, interval in allocation_settings
+        ]
+        
+        # Footprint of a fresh tracker, traced from its creation
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        traced = make_tracker(export_dir)
+        for _ in range(footprint_iterations):
+            system.tick()
+            traced.collect_sample()
+        footprint = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del traced
+    finally:
+        system.uninstall()
+
+    result = {
+        'processes': processes,
+        'iterations': iterations,
+        'collector': percentiles(iteration_times),
+        'api': api,
+        'footprint_mb': round(footprint / (1024 * 1024), 2),
+        'leaks': {
+            'process': precision_recall(process_leaks, leaking_pids),
+            'group': precision_recall(group_leaks, leaking_names),
+        },
+    }
+    if allocations:
+        result['allocations'] = allocations
+    return result
+
+
+def git_commit():
+    """Commit of the benchmarked tree, if it is a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metric(scenario, path):
+    value = scenario
+    for key in path:
+        value = value[key]
+    return value
+
+
+def compare(before_path, after_path, tolerance):
+    """Print the changes between two result files; returns the number of regressions."""
+    with open(before_path) as f:
+        before = {s['processes']: s for s in json.load(f)['scenarios']}
+    with open(after_path) as f:
+        after = {s['processes']: s for s in json.load(f)['scenarios']}
+
+    regressions = 0
+    print(f"{'processes':>9}  {'metric':<42} {'before':>10} {'after':>10} {'change':>8}")
+    for processes in sorted(before.keys() & after.keys()):
+        rows = [(path, higher_is_better) for path, higher_is_better in COMPARED_METRICS]
+        rows += [(('api', endpoint, 'p99_ms'), False)
+                 for endpoint in before[processes]['api'] if endpoint in after[processes]['api']]
+        for path, higher_is_better in rows:
+            old = metric(before[processes], path)
+            new = metric(after[processes], path)
+            change = (new - old) / old if old else 0.0
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            regressions += worse
+            name = '.'.join(path)[:42]
+            print(f"{processes:>9}  {name:<42} {old:>10} {new:>10} {change:>+7.0%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--iterations', type=int, default=30, help='collector iterations per scenario')
+    parser.add_argument('--requests', type=int, default=20, help='requests per endpoint')
+    parser.add_argument('--churn', type=float, default=0.01, help='fraction of processes replaced per sample')
+    parser.add_argument('--leaks', type=int, default=5, help='number of leaking processes')
+    parser.add_argument('--footprint-iterations', type=int, default=10)
+    parser.add_argument('--allocations', action='store_true',
+                        help='also measure the overhead of tracemalloc allocation tracking')
+    parser.add_argument('--allocation-frames', type=int, nargs='+', default=[1],
+                        help='traceback depths to measure')
+    parser.add_argument('--allocation-sampling', type=float, nargs='+', default=[1.0],
+                        help='tracing duty cycles to measure')
+    parser.add_argument('--allocation-interval', type=float, default=1.0,
+                        help='seconds between allocation snapshots')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files instead of running')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.tolerance) else 0)
+
+    # The app must not start its own collector or touch the real exports
+    logging.disable(logging.WARNING)
+    from config import TRACKER_CONFIG
+    TRACKER_CONFIG.update(autostart=False, history_file=None, cgroup_root=None,
+                          export_dir=tempfile.mkdtemp(prefix='memtrack-bench-'))
+    import app as app_module
+
+    allocation_settings = []
+    if args.allocations:
+        allocation_settings = [(frames, sampling, args.allocation_interval)
+                               for frames in args.allocation_frames for sampling in args.allocation_sampling]
+
+    scenarios = []
+    print(f"{'processes':>9} {'iter p50':>9} {'iter p99':>9} {'batch p99':>10} {'MB':>7} {'leak recall':>12}")
+    for processes in args.processes:
+        result = run_scenario(app_module, processes, args.iterations, args.requests,
+                              args.churn, args.leaks, args.footprint_iterations, allocation_settings)
+        scenarios.append(result)
+        batch = next(v for k, v in result['api'].items() if k.startswith('/api/memory/batch'))
+        print(f"{processes:>9} {result['collector']['p50_ms']:>9} {result['collector']['p99_ms']:>9} "
+              f"{batch['p99_ms']:>10} {result['footprint_mb']:>7} "
+              f"{result['leaks']['process']['recall']:>5}/{result['leaks']['group']['recall']:<6}")
+        for allocation in result.get('allocations', []):
+            print(f"{'':>9} tracemalloc frames={allocation['frames']} sampling={allocation['sampling']}: "
+                  f"iter p50 {(allocation['collector'] or {}).get('p50_ms')} ms ({allocation['overhead_percent']}%), "
+                  f"{allocation['snapshots']} snapshots of {allocation.get('snapshot_mean_ms', '-')} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+                'scenarios': scenarios,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Requests/s versus gunicorn worker count in production serving mode.
+
+Starts gunicorn with gunicorn.conf.py (one shared collector process) for each
+worker count and drives the batch endpoint the dashboard polls.
+
+Usage:
+    python benchmarks/worker_scaling.py --workers 1 2 4 8 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINT = '/api/memory/batch?sections=current,history,processes,alerts&active_only=true'
+
+
+def wait_until_ready(port, timeout=30):
+    """Wait for the server to answer the benchmark endpoint."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', ENDPOINT)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def client(port, duration):
+    """Issue requests over one keep-alive connection; return the latencies."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        conn.request('GET', ENDPOINT)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def run(workers, port, duration, clients):
+    """Benchmark one worker count."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}')
+    env.pop('MEMTRACK_SHARED_DIR', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--log-level', 'warning', 'main:app'],
+        cwd=PROJECT_DIR, env=env
+    )
+    try:
+        wait_until_ready(port)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.starmap(client, [(port, duration)] * clients)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    latencies = sorted(l for result in results for l in result)
+    return {
+        'workers': workers,
+        'clients': clients,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / duration, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=10, help='seconds per run')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client processes')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in args.workers:
+        result = run(workers, args.port, args.duration, args.clients)
+        results.append(result)
+        print(f"{workers:>8} {result['requests_per_second']:>10} "
+              f"{result['p50_ms']:>8} {result['p99_ms']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
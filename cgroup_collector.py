@@ -0,0 +1,366 @@
+"""
+cgroup v2 memory accounting.
+
+Samples memory.current of every cgroup under a cgroup v2 hierarchy each tick
+and keeps a per-cgroup ring of (time, bytes) next to the tracker's history.
+memory.stat, memory.max and memory.events change slowly or are costly to
+parse, so they are refreshed every stat_interval seconds, and the directory
+tree is re-walked every discovery_interval seconds.
+
+To keep hundreds of cgroups cheap at 1 s sampling, memory.current is opened
+once and re-read with pread() on the cached descriptor; a tick costs one
+syscall per cgroup. The slow files are opened and closed at each refresh, so
+a cgroup holds a single descriptor however many files it has. The root
+directory is a parameter, so the collector can run against a fake sysfs tree.
+"""
+import errno
+import logging
+import os
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CGROUP_ROOT = '/sys/fs/cgroup'
+
+# memory.stat keys exposed per cgroup
+STAT_KEYS = ('anon', 'file', 'kernel', 'kernel_stack', 'slab', 'sock', 'shmem',
+             'file_mapped', 'file_dirty', 'file_writeback')
+
+EVENT_KEYS = ('low', 'high', 'max', 'oom', 'oom_kill')
+
+READ_SIZE = 16384
+
+# Errors of a read that mean the cgroup was removed; others skip the cgroup for one sample
+REMOVED_ERRNOS = (errno.ENOENT, errno.ENODEV)
+
+
+def _parse_key_values(text):
+    """Parse 'key value' lines into a dictionary of integers."""
+    values = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(' ')
+        if value.isdigit():
+            values[key] = int(value)
+    return values
+
+
+def _thin(history, max_points):
+    """Keep max_points evenly spaced points of a history, the last one included."""
+    if len(history) <= max_points:
+        return history
+    step = len(history) / max_points
+    return [history[int(i * step)] for i in range(max_points - 1)] + [history[-1]]
+
+
+class CgroupState:
+    """Cached memory.current descriptor and samples of one cgroup."""
+
+    def __init__(self, path, directory, history_size):
+        self.path = path
+        self.directory = directory
+        self.current_fd = None
+        self.history = deque(maxlen=history_size)  # (epoch seconds, bytes)
+        self.current = 0
+        self.max = None  # None means unlimited
+        self.stat = {}
+        self.events = {}
+        self.reported_events = {}
+
+    def read_current(self):
+        """Read memory.current through the cached descriptor."""
+        if self.current_fd is None:
+            self.current_fd = os.open(os.path.join(self.directory, 'memory.current'), os.O_RDONLY)
+        return os.pread(self.current_fd, READ_SIZE, 0).decode('ascii', 'replace')
+
+    def read(self, filename):
+        """Read another cgroup file, without keeping it open."""
+        fd = os.open(os.path.join(self.directory, filename), os.O_RDONLY)
+        try:
+            return os.pread(fd, READ_SIZE, 0).decode('ascii', 'replace')
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Close the cached descriptor."""
+        if self.current_fd is not None:
+            try:
+                os.close(self.current_fd)
+            except OSError:
+                pass
+            self.current_fd = None
+
+
+class CgroupCollector:
+    def __init__(self, root=DEFAULT_CGROUP_ROOT, history_size=600, alert_threshold=80,
+                 stat_interval=10, discovery_interval=30):
+        """
+        Initialize the cgroup collector.
+
+        Args:
+            root: Mount point of the cgroup v2 hierarchy
+            history_size: Number of samples kept per cgroup
+            alert_threshold: Percentage of memory.max that raises an alert
+            stat_interval: Seconds between memory.stat/max/events refreshes
+            discovery_interval: Seconds between re-walks of the cgroup tree
+        """
+        self.root = root
+        self.history_size = history_size
+        self.alert_threshold = alert_threshold
+        self.stat_interval = stat_interval
+        self.discovery_interval = discovery_interval
+
+        self.cgroups = {}  # path relative to root ('/system.slice/...') -> CgroupState
+        self.last_discovery = None
+        self.last_stat_refresh = None
+
+    @staticmethod
+    def is_available(root=DEFAULT_CGROUP_ROOT):
+        """Check whether root is a cgroup v2 hierarchy."""
+        return os.path.exists(os.path.join(root, 'cgroup.controllers'))
+
+    def discover(self):
+        """Walk the hierarchy and track every cgroup with memory accounting."""
+        found = set()
+        errors = []
+        for directory, _, filenames in os.walk(self.root, onerror=errors.append):
+            if 'memory.current' not in filenames:
+                continue
+            path = '/' + os.path.relpath(directory, self.root).replace(os.sep, '/')
+            path = '/' if path == '/.' else path
+            found.add(path)
+            if path not in self.cgroups:
+                self.cgroups[path] = CgroupState(path, directory, self.history_size)
+
+        if errors:
+            # An unreadable directory (e.g. no descriptor left) does not mean its cgroups are gone
+            logger.warning(f"Incomplete walk of {self.root}: {str(errors[0])}")
+            return
+        for path in list(self.cgroups):
+            if path not in found:
+                self.cgroups.pop(path).close()
+
+    def sample(self, now):
+        """
+        Sample memory.current of every cgroup.
+
+        Args:
+            now: Sample time in epoch seconds
+        """
+        if self.last_discovery is None or now - self.last_discovery >= self.discovery_interval:
+            self.discover()
+            self.last_discovery = now
+
+        refresh_stats = self.last_stat_refresh is None or \
+            now - self.last_stat_refresh >= self.stat_interval
+        if refresh_stats:
+            self.last_stat_refresh = now
+
+        removed = []
+        skipped = []
+        for path, cgroup in self.cgroups.items():
+            try:
+                cgroup.current = int(cgroup.read_current())
+                cgroup.history.append((now, cgroup.current))
+
+                if refresh_stats:
+                    self._refresh_stats(cgroup)
+            except OSError as e:
+                if e.errno in REMOVED_ERRNOS:
+                    # The cgroup was removed between discovery and this read
+                    removed.append(path)
+                else:
+                    # E.g. EMFILE: keep the cgroup and try again next sample
+                    skipped.append(e)
+            except ValueError as e:
+                skipped.append(e)
+
+        for path in removed:
+            self.cgroups.pop(path).close()
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} cgroups this sample: {str(skipped[0])}")
+
+    def _refresh_stats(self, cgroup):
+        """Refresh the slowly changing files of one cgroup."""
+        try:
+            stat = _parse_key_values(cgroup.read('memory.stat'))
+            cgroup.stat = {key: stat[key] for key in STAT_KEYS if key in stat}
+
+            limit = cgroup.read('memory.max').strip()
+            cgroup.max = int(limit) if limit.isdigit() else None
+
+            events = _parse_key_values(cgroup.read('memory.events'))
+        except FileNotFoundError:
+            # Not every cgroup (e.g. the root) has all the files
+            return
+
+        cgroup.events = {key: events.get(key, 0) for key in EVENT_KEYS}
+        if not cgroup.reported_events:
+            # Only report events that happen while we are watching
+            cgroup.reported_events = dict(cgroup.events)
+
+    def check_alerts(self, timestamp):
+        """
+        Evaluate the alert conditions of every cgroup.
+
+        Args:
+            timestamp: Formatted alert time
+
+        Returns:
+            List of currently firing alerts, keyed by cgroup path
+        """
+        alerts = []
+        for path, cgroup in self.cgroups.items():
+            if cgroup.max:
+                percent = round(cgroup.current / cgroup.max * 100, 1)
+                if percent >= self.alert_threshold:
+                    alerts.append({
+                        'type': 'cgroup',
+                        'key': path,
+                        'level': 'warning' if percent < 90 else 'critical',
+                        'message': f'cgroup {path} at {percent}% of its memory.max',
+                        'value': percent,
+                        'timestamp': timestamp
+                    })
+
+            for event in ('oom', 'oom_kill'):
+                count = cgroup.events.get(event, 0)
+                new_events = count - cgroup.reported_events.get(event, 0)
+                if new_events > 0:
+                    cgroup.reported_events[event] = count
+                    alerts.append({
+                        'type': 'cgroup',
+                        'key': f'{path}:{event}',
+                        'level': 'critical',
+                        'message': f'cgroup {path} had {new_events} new {event} event(s)',
+                        'value': count,
+                        'timestamp': timestamp
+                    })
+        return alerts
+
+    def get_cgroups(self, top_n=None):
+        """
+        Get the latest memory accounting per cgroup, largest first.
+
+        Args:
+            top_n: Number of cgroups to return (all if None)
+
+        Returns:
+            List of dictionaries with cgroup info
+        """
+        cgroups = []
+        for path, cgroup in self.cgroups.items():
+            cgroups.append({
+                'path': path,
+                'memory_mb': round(cgroup.current / (1024 * 1024), 2),
+                'max_mb': round(cgroup.max / (1024 * 1024), 2) if cgroup.max else None,
+                'percent_of_max': round(cgroup.current / cgroup.max * 100, 2) if cgroup.max else None,
+                'stat_mb': {key: round(value / (1024 * 1024), 2) for key, value in cgroup.stat.items()},
+                'events': cgroup.events
+            })
+
+        cgroups.sort(key=lambda c: c['memory_mb'], reverse=True)
+        return cgroups[:top_n] if top_n else cgroups
+
+    def get_history(self, path):
+        """Get the sampled (time, bytes) history of one cgroup."""
+        cgroup = self.cgroups.get(path)
+        if cgroup is None:
+            return None
+        return {
+            'path': path,
+            'times': [t for t, _ in cgroup.history],
+            'memory_mb': [round(b / (1024 * 1024), 2) for _, b in cgroup.history]
+        }
+
+    def get_possible_leaks(self, now, min_growth_percent=20, min_time_seconds=120):
+        """
+        Identify cgroups whose memory grew steadily over the tracked window.
+
+        Args:
+            now: Current time in epoch seconds
+            min_growth_percent: Minimum percent growth to consider a leak
+            min_time_seconds: Minimum tracking time to consider valid
+
+        Returns:
+            List of cgroups with possible memory leaks
+        """
+        leaks = []
+        for path, cgroup in self.cgroups.items():
+            if len(cgroup.history) < 2:
+                continue
+
+            first_time, first_bytes = cgroup.history[0]
+            last_bytes = cgroup.history[-1][1]
+            if now - first_time < min_time_seconds or first_bytes <= 0:
+                continue
+
+            growth_percent = (last_bytes - first_bytes) / first_bytes * 100
+            if growth_percent >= min_growth_percent:
+                leaks.append({
+                    'path': path,
+                    'start_memory_mb': round(first_bytes / (1024 * 1024), 2),
+                    'current_memory_mb': round(last_bytes / (1024 * 1024), 2),
+                    'growth_percent': round(growth_percent, 2),
+                    'tracking_seconds': round(now - first_time, 0)
+                })
+
+        leaks.sort(key=lambda x: x['growth_percent'], reverse=True)
+        return leaks
+
+    def export_state(self, max_points=60):
+        """
+        Export the per-cgroup state for other processes.
+
+        Args:
+            max_points: Maximum history points exported per cgroup (thinned
+                evenly); 0 leaves the histories out, see export_histories()
+        """
+        state = {}
+        for path, cgroup in self.cgroups.items():
+            state[path] = {
+                'current': cgroup.current,
+                'max': cgroup.max,
+                'stat': cgroup.stat,
+                'events': cgroup.events
+            }
+            if max_points:
+                state[path]['history'] = _thin(list(cgroup.history), max_points)
+        return state
+
+    def export_histories(self, max_points=60):
+        """Export only the per-cgroup histories, thinned to max_points each."""
+        return {path: _thin(list(cgroup.history), max_points) for path, cgroup in self.cgroups.items()}
+
+    def load_state(self, state):
+        """
+        Replace the per-cgroup state with one from export_state().
+
+        Cgroups exported without a history keep the one they have.
+        """
+        cgroups = {}
+        for path, data in state.items():
+            cgroup = CgroupState(path, None, self.history_size)
+            cgroup.current = data['current']
+            cgroup.max = data['max']
+            cgroup.stat = data['stat']
+            cgroup.events = data['events']
+            if 'history' in data:
+                cgroup.history.extend(tuple(point) for point in data['history'])
+            elif path in self.cgroups:
+                cgroup.history = self.cgroups[path].history
+            cgroups[path] = cgroup
+        self.cgroups = cgroups
+
+    def load_histories(self, histories):
+        """Replace the histories of the known cgroups with ones from export_histories()."""
+        for path, history in histories.items():
+            cgroup = self.cgroups.get(path)
+            if cgroup is not None:
+                cgroup.history.clear()
+                cgroup.history.extend(tuple(point) for point in history)
+
+    def close(self):
+        """Close every cached descriptor."""
+        for cgroup in self.cgroups.values():
+            cgroup.close()
+        self.cgroups = {}
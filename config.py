@@ -0,0 +1,17 @@
+"""Tracker configuration shared by the web app and the collector process."""
+
+TRACKER_CONFIG = {
+    'history_minutes': 10,          # 10 minutes of real-time history
+    'sample_interval': 1,           # 1 second sampling
+    'long_term_history_days': 7,    # 7 days of history
+    'alert_threshold': 75,          # Alert at 75% usage
+    'export_dir': './exports',      # Directory for exports
+    'history_file': './exports/memory_history.ring',  # Crash-safe real-time history
+    'adaptive_sampling': False,     # Opt in to sample faster under memory pressure...
+    'min_interval': 0.1,            # ...down to every 100 ms
+    'max_interval': 5,              # ...and back off to 5 seconds when calm
+    'allocation_tracking': False,   # tracemalloc allocation sites of this Python process
+    'heavy_hitters': True,          # Memory-seconds per process name and user, over the long-term history
+    'thrashing_threshold': 500,     # Alert above this many major page faults/s (averaged over 10 s)
+    'alert_sinks': [],              # e.g. ['http://localhost:9000/alerts', 'syslog:///dev/log']
+}
@@ -0,0 +1,69 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for chart payloads.
+
+LTTB keeps the first and last points and, for every bucket in between, the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket. Spikes and dips therefore survive the reduction,
+unlike with plain averaging or striding.
+
+Only indices are computed, from a single driving series, so every column of
+a history buffer can be gathered with the same selection.
+"""
+
+
+def lttb_indices(xs, ys, max_points):
+    """
+    Select the indices of the points to keep.
+
+    Args:
+        xs: Sequence of x values (e.g. epoch seconds), ascending
+        ys: Sequence of y values driving the selection
+        max_points: Maximum number of points to keep
+
+    Returns:
+        Ascending list of indices into xs/ys
+    """
+    n = len(ys)
+    if max_points is None or max_points >= n:
+        return list(range(n))
+    if max_points < 3:
+        return [0, n - 1][:max(max_points, 0)]
+
+    bucket_size = (n - 2) / (max_points - 2)
+    indices = [0]
+    a = 0
+
+    for i in range(max_points - 2):
+        # Average point of the next bucket (the last point for the final bucket)
+        avg_start = int((i + 1) * bucket_size) + 1
+        avg_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_count
+        avg_y = sum(ys[avg_start:avg_end]) / avg_count
+
+        # Pick the point in this bucket with the largest triangle area
+        range_start = int(i * bucket_size) + 1
+        range_end = int((i + 1) * bucket_size) + 1
+        ax = xs[a]
+        ay = ys[a]
+        dx = ax - avg_x
+        dy = avg_y - ay
+
+        max_area = -1.0
+        selected = range_start
+        for j in range(range_start, range_end):
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > max_area:
+                max_area = area
+                selected = j
+
+        indices.append(selected)
+        a = selected
+
+    indices.append(n - 1)
+    return indices
+
+
+def take(values, indices):
+    """Gather the selected entries of a sequence."""
+    return [values[i] for i in indices]
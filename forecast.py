@@ -0,0 +1,299 @@
+"""
+Memory exhaustion forecasting from the hourly rollups.
+
+Each series (RAM and swap percent) is modelled by least squares as
+
+    y(t) = a + b*t + daily harmonics + weekly harmonics
+
+where the harmonics are sin/cos pairs with periods of 24 and 168 hours. The
+fit is recursive: every new hourly point adds its outer product to the normal
+equations (X'X and X'y) with a forgetting factor, so a refit costs O(k^2) for
+k terms instead of revisiting the whole history, and old behaviour fades out.
+Seasonal terms join the fit once the effective number of points (what is
+left of their weight after forgetting) is enough to identify them.
+
+The fitted model is projected over a horizon to find the first hour it
+crosses a threshold, which gives the time to threshold. A crossing further
+ahead than MAX_EXTRAPOLATION times the history the fit rests on is not
+reported: a trend fitted to a few hours says little about next week.
+"""
+import math
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+
+DAILY_HARMONICS = 2
+WEEKLY_HARMONICS = 1
+
+# Effective points needed before a group of terms is fitted; the weekly terms
+# need two weeks, which the forgetting factor has to leave room for
+MIN_POINTS_TREND = 6
+MIN_POINTS_DAILY = 48
+MIN_POINTS_WEEKLY = 336
+
+# How far beyond its effective history a model's crossing is still reported
+MAX_EXTRAPOLATION = 4
+
+
+def local_hours(moment):
+    """Hours since the epoch on the local wall clock, so seasons follow local time."""
+    return (moment - EPOCH).total_seconds() / 3600
+
+
+def solve(matrix, vector):
+    """Solve a small linear system by Gaussian elimination with partial pivoting."""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise ValueError("Singular system")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            if factor:
+                for c in range(col, n + 1):
+                    rows[r][c] -= factor * rows[col][c]
+
+    solution = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        solution[r] = (rows[r][n] - sum(rows[r][c] * solution[c] for c in range(r + 1, n))) / rows[r][r]
+    return solution
+
+
+def linear_trend(times, values):
+    """
+    Least squares line through (time, value) points.
+
+    Returns:
+        Tuple of (slope per time unit, fitted value at the last time)
+    """
+    n = len(times)
+    mean_t = sum(times) / n
+    mean_v = sum(values) / n
+    var_t = sum((t - mean_t) ** 2 for t in times)
+    if var_t == 0:
+        return 0.0, mean_v
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / var_t
+    return slope, mean_v + slope * (times[-1] - mean_t)
+
+
+class SeasonalTrendModel:
+    def __init__(self, forgetting=0.998, ridge=1e-6):
+        """
+        Initialize an empty model.
+
+        Args:
+            forgetting: Weight kept by past points at each new point (0.998 per
+                hour halves the weight of a point in about 14 days, and the
+                effective window of 1 / (1 - forgetting) = 500 points holds the
+                two weeks the weekly terms need)
+            ridge: Regularization added to the diagonal of the normal equations
+        """
+        self.forgetting = forgetting
+        self.ridge = ridge
+        self.size = 2 + 2 * DAILY_HARMONICS + 2 * WEEKLY_HARMONICS
+        self.xtx = [[0.0] * self.size for _ in range(self.size)]
+        self.xty = [0.0] * self.size
+        self.yty = 0.0
+        self.weight = 0.0
+        self.count = 0
+        self.origin = None
+        self.last = None
+        self._coefficients = None
+
+    def _features(self, t):
+        """Feature vector for a time in local hours."""
+        features = [1.0, t - self.origin]
+        for k in range(1, DAILY_HARMONICS + 1):
+            angle = 2 * math.pi * k * t / 24
+            features += [math.sin(angle), math.cos(angle)]
+        for k in range(1, WEEKLY_HARMONICS + 1):
+            angle = 2 * math.pi * k * t / 168
+            features += [math.sin(angle), math.cos(angle)]
+        return features
+
+    def _active_terms(self):
+        """Indices of the terms the data can identify so far."""
+        # Forgotten points do not count: with a short effective window, a
+        # season longer than the window would be fitted to noise
+        terms = [0]
+        if self.weight >= MIN_POINTS_TREND:
+            terms.append(1)
+        if self.weight >= MIN_POINTS_DAILY:
+            terms += list(range(2, 2 + 2 * DAILY_HARMONICS))
+        if self.weight >= MIN_POINTS_WEEKLY:
+            terms += list(range(2 + 2 * DAILY_HARMONICS, self.size))
+        return terms
+
+    def add(self, t, y):
+        """
+        Add one point.
+
+        Args:
+            t: Time in local hours (see local_hours)
+            y: Observed value
+        """
+        if self.origin is None:
+            self.origin = t
+        self.last = t
+        x = self._features(t)
+        decay = self.forgetting
+        for i in range(self.size):
+            row = self.xtx[i]
+            xi = x[i]
+            for j in range(self.size):
+                row[j] = decay * row[j] + xi * x[j]
+            self.xty[i] = decay * self.xty[i] + xi * y
+        self.yty = decay * self.yty + y * y
+        self.weight = decay * self.weight + 1
+        self.count += 1
+        self._coefficients = None
+
+    def fit(self):
+        """
+        Solve the normal equations of the identifiable terms.
+
+        Returns:
+            List of coefficients (zero for terms not fitted yet), None without data
+        """
+        if self.count == 0:
+            return None
+        if self._coefficients is None:
+            terms = self._active_terms()
+            matrix = [[self.xtx[i][j] + (self.ridge if i == j else 0.0) for j in terms] for i in terms]
+            solution = solve(matrix, [self.xty[i] for i in terms])
+            coefficients = [0.0] * self.size
+            for term, value in zip(terms, solution):
+                coefficients[term] = value
+            self._coefficients = coefficients
+        return self._coefficients
+
+    def predict(self, t):
+        """Predicted value at a time in local hours."""
+        return sum(c * x for c, x in zip(self.fit(), self._features(t)))
+
+    def history_hours(self):
+        """Hours of history the fit rests on: the points fed, less what was forgotten."""
+        if self.count == 0:
+            return 0.0
+        return min(self.weight, self.last - self.origin + 1)
+
+    def seasonality(self):
+        """Names of the seasons fitted so far ('daily', 'weekly')."""
+        terms = self._active_terms()
+        seasons = []
+        if 2 in terms:
+            seasons.append('daily')
+        if self.size - 1 in terms:
+            seasons.append('weekly')
+        return seasons
+
+    def residual_std(self):
+        """Weighted standard deviation of the residuals of the fit."""
+        beta = self.fit()
+        sse = self.yty - 2 * sum(b * v for b, v in zip(beta, self.xty)) + \
+            sum(beta[i] * self.xtx[i][j] * beta[j] for i in range(self.size) for j in range(self.size))
+        return math.sqrt(max(sse, 0.0) / max(self.weight, 1.0))
+
+
+class Forecaster:
+    def __init__(self, series=('memory_percent', 'swap_percent'), forgetting=0.998):
+        """
+        Initialize models for the hourly rollup fields.
+
+        Args:
+            series: Fields of the hourly rollup dictionaries to model
+            forgetting: Forgetting factor of every model
+        """
+        self.models = {name: SeasonalTrendModel(forgetting=forgetting) for name in series}
+        self.last_fed = None  # Datetime of the last hourly point fed to the models
+        self.cache = {}
+
+    def update(self, hourly_data):
+        """
+        Feed the hourly points newer than the last one fed.
+
+        Args:
+            hourly_data: List of hourly rollup dictionaries, oldest first
+
+        Returns:
+            True if new points were fed (and the cached forecasts dropped)
+        """
+        # Walk back from the newest point to the last one already fed
+        new_points = []
+        for point in reversed(hourly_data):
+            moment = datetime.strptime(point['timestamp'], '%Y-%m-%d %H:00:00')
+            if self.last_fed is not None and moment <= self.last_fed:
+                break
+            new_points.append((moment, point))
+
+        for moment, point in reversed(new_points):
+            t = local_hours(moment)
+            for name, model in self.models.items():
+                model.add(t, point[name])
+            self.last_fed = moment
+
+        if new_points:
+            self.cache = {}
+        return bool(new_points)
+
+    def forecast(self, name, threshold, now, horizon_hours=168):
+        """
+        Project one series and find when it first reaches a threshold.
+
+        Args:
+            name: Series name, e.g. 'memory_percent'
+            threshold: Value whose crossing is reported
+            now: Current datetime
+            horizon_hours: How far ahead to project
+
+        Returns:
+            Dictionary with the projection, or None without enough data
+        """
+        key = (name, threshold, horizon_hours)
+        if key not in self.cache:
+            self.cache[key] = self._project(name, threshold, now, horizon_hours)
+        result = self.cache[key]
+        if result is None:
+            return None
+
+        # The projection is cached until the next rollup, the countdown is not
+        hours_to_threshold = None
+        if result['threshold_time']:
+            crossing = datetime.strptime(result['threshold_time'], '%Y-%m-%d %H:00:00')
+            hours_to_threshold = round(max((crossing - now).total_seconds() / 3600, 0.0), 1)
+        return dict(result, hours_to_threshold=hours_to_threshold)
+
+    def _project(self, name, threshold, now, horizon_hours):
+        """Project one series over the horizon, None without enough data."""
+        model = self.models[name]
+        if model.weight < MIN_POINTS_TREND:
+            return None
+
+        coefficients = model.fit()
+        start = now.replace(minute=0, second=0, microsecond=0)
+        # Crossings past this point are extrapolation the history cannot support
+        reliable_hours = int(model.history_hours() * MAX_EXTRAPOLATION)
+        times = []
+        values = []
+        crossing = None
+        for hour in range(horizon_hours + 1):
+            moment = start + timedelta(hours=hour)
+            value = model.predict(local_hours(moment))
+            times.append(moment.strftime('%Y-%m-%d %H:00:00'))
+            values.append(round(value, 2))
+            if crossing is None and value >= threshold and hour <= reliable_hours:
+                crossing = moment
+
+        return {
+            'threshold': threshold,
+            'points': model.count,
+            'trend_per_day': round(coefficients[1] * 24, 3),
+            'residual_std': round(model.residual_std(), 3),
+            'seasonality': model.seasonality(),
+            'reliable_hours': min(reliable_hours, horizon_hours),
+            'threshold_time': crossing.strftime('%Y-%m-%d %H:00:00') if crossing else None,
+            'timestamps': times,
+            'values': values
+        }
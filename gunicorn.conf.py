@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for production serving.
+
+The master starts one collector process before forking the workers (and
+restarts it if it exits), so the psutil load does not grow with the worker
+count and every worker serves the same history. Workers find the collector's shared files through
+MEMTRACK_SHARED_DIR; set it yourself to use an externally managed collector
+(python -m shared_state <dir>).
+"""
+import os
+
+import shared_state
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+
+def on_starting(server):
+    server.memtrack_collector = shared_state.start_collector_process()
+
+
+def on_exit(server):
+    shared_state.stop_collector_process(server.memtrack_collector)
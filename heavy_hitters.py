@@ -0,0 +1,363 @@
+"""
+Memory-seconds of process names and users over days, in fixed memory.
+
+Each process sweep adds, for every name and user, its memory times the time
+since the previous sweep (MB-seconds) to the bucket of the current hour.
+A bucket summarizes each dimension with
+    * Space-Saving: the capacity heaviest keys with an upper bound of their
+      weight and the error of that bound, however many keys go through it
+    * Count-Min: a width x depth table of counters, so the weight of any key
+      can be estimated, heavy or not (conservative update, which keeps the
+      overestimate small)
+Both are mergeable, so a time window is answered by merging the buckets it
+covers. Hourly buckets older than a day are merged into daily ones, which
+are kept for the long-term history days: the memory used is bounded by
+(24 + days) buckets whatever the process churn.
+
+Keys are hashed with blake2b rather than hash(), so persisted sketches stay
+valid across restarts.
+"""
+import base64
+import struct
+import sys
+from array import array
+from datetime import datetime
+from hashlib import blake2b
+from heapq import nlargest
+
+HEAVY_HITTER_DIMENSIONS = ('name', 'username')
+STATE_VERSION = 1
+
+HOUR = 3600
+DAY = 86400
+
+
+class SpaceSaving:
+    """Heaviest keys of a weighted stream, in a fixed number of counters."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # key -> [upper bound of the weight, error of the bound]
+
+    def add(self, key, weight):
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0.0]
+        else:
+            # The newcomer takes over the smallest counter, which bounds what it missed
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[key] = [floor + weight, floor]
+
+    def floor(self):
+        """Most a key missing from the summary can weigh."""
+        if len(self.counters) < self.capacity:
+            return 0.0
+        return min(entry[0] for entry in self.counters.values())
+
+    def merge(self, other):
+        """Add another summary of the same capacity to this one."""
+        mine, theirs = self.floor(), other.floor()
+        merged = {}
+        for key in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(key, (mine, mine))
+            other_count, other_error = other.counters.get(key, (theirs, theirs))
+            merged[key] = [count + other_count, error + other_error]
+        self.counters = dict(nlargest(self.capacity, merged.items(), key=lambda item: item[1][0]))
+
+    def export_state(self):
+        return [[key, count, error] for key, (count, error) in self.counters.items()]
+
+    def load_state(self, state):
+        self.counters = {key: [count, error] for key, count, error in state}
+
+
+class CountMinSketch:
+    """Upper-bound estimate of the weight of any key, in width x depth counters."""
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.table = array('d', bytes(8 * width * depth))
+
+    def _cells(self, key):
+        # Double hashing: row i uses h1 + i * h2
+        h1, h2 = struct.unpack('<II', blake2b(str(key).encode('utf-8', 'surrogatepass'), digest_size=8).digest())
+        h2 |= 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, key, weight):
+        table = self.table
+        cells = self._cells(key)
+        # Conservative update: raise each counter only as far as the new minimum
+        target = min(table[cell] for cell in cells) + weight
+        for cell in cells:
+            if table[cell] < target:
+                table[cell] = target
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += value
+
+    def export_state(self):
+        table = self.table
+        if sys.byteorder == 'big':
+            table = array('d', table)
+            table.byteswap()
+        return base64.b64encode(table.tobytes()).decode('ascii')
+
+    def load_state(self, state):
+        table = array('d')
+        table.frombytes(base64.b64decode(state))
+        if sys.byteorder == 'big':
+            table.byteswap()
+        if len(table) != self.width * self.depth:
+            raise ValueError(f"Sketch of {len(table)} counters, expected {self.width * self.depth}")
+        self.table = table
+
+
+class Bucket:
+    """Summaries of one hour or one day."""
+
+    __slots__ = ('start', 'length', 'seconds', 'totals', 'top', 'sketches')
+
+    def __init__(self, start, length, capacity, width, depth):
+        self.start = start
+        self.length = length
+        self.seconds = 0.0   # Time covered by sweeps
+        self.totals = dict.fromkeys(HEAVY_HITTER_DIMENSIONS, 0.0)
+        self.top = {dimension: SpaceSaving(capacity) for dimension in HEAVY_HITTER_DIMENSIONS}
+        self.sketches = {dimension: CountMinSketch(width, depth) for dimension in HEAVY_HITTER_DIMENSIONS}
+
+    def merge(self, other):
+        self.seconds += other.seconds
+        for dimension in HEAVY_HITTER_DIMENSIONS:
+            self.totals[dimension] += other.totals[dimension]
+            self.top[dimension].merge(other.top[dimension])
+            self.sketches[dimension].merge(other.sketches[dimension])
+
+    def export_state(self):
+        return {
+            'start': self.start,
+            'length': self.length,
+            'seconds': self.seconds,
+            'totals': self.totals,
+            'top': {dimension: summary.export_state() for dimension, summary in self.top.items()},
+            'sketches': {dimension: sketch.export_state() for dimension, sketch in self.sketches.items()}
+        }
+
+
+class HeavyHitters:
+    def __init__(self, capacity=50, width=128, depth=4, hours=24, days=7, max_gap=300):
+        """
+        Initialize empty summaries.
+
+        Args:
+            capacity: Keys kept per dimension and bucket (Space-Saving counters)
+            width: Count-Min counters per row; estimates exceed the true weight
+                by at most e / width of the window's total, with probability
+                1 - exp(-depth)
+            depth: Count-Min rows
+            hours: Hourly buckets kept before merging into daily ones
+            days: Daily buckets kept
+            max_gap: Longest time between sweeps counted, in seconds (a
+                suspended collector does not attribute the gap to anyone)
+        """
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.hours = hours
+        self.days = days
+        self.max_gap = max_gap
+
+        self.hourly = []   # Oldest first
+        self.daily = []
+        self.last_update = None
+        self.rotations = 0  # Bumped whenever the closed buckets change
+
+    def _new_bucket(self, start, length):
+        return Bucket(start, length, self.capacity, self.width, self.depth)
+
+    def update(self, totals, now):
+        """
+        Add a sweep.
+
+        Args:
+            totals: {dimension: {key: memory MB}} of the sweep
+            now: Time of the sweep in epoch seconds
+
+        Returns:
+            True if an hour was completed (a good time to persist the state)
+        """
+        elapsed = now - self.last_update if self.last_update is not None else 0
+        self.last_update = now
+        rotated = self._rotate(now)
+        if not 0 < elapsed <= self.max_gap:
+            return rotated
+
+        bucket = self.hourly[-1]
+        bucket.seconds += elapsed
+        for dimension in HEAVY_HITTER_DIMENSIONS:
+            top = bucket.top[dimension]
+            sketch = bucket.sketches[dimension]
+            total = 0.0
+            # Heaviest first, so light keys are the ones competing for the last counters
+            for key, memory_mb in sorted(totals.get(dimension, {}).items(), key=lambda item: item[1], reverse=True):
+                if memory_mb <= 0:
+                    continue
+                weight = memory_mb * elapsed
+                top.add(key, weight)
+                sketch.add(key, weight)
+                total += weight
+            bucket.totals[dimension] += total
+        return rotated
+
+    def _rotate(self, now):
+        """Open the bucket of the current hour, folding expired hours into days."""
+        hour = now - now % HOUR
+        if self.hourly and self.hourly[-1].start == hour:
+            return False
+
+        rotated = bool(self.hourly)
+        self.rotations += 1
+        self.hourly.append(self._new_bucket(hour, HOUR))
+        while self.hourly and self.hourly[0].start <= hour - self.hours * HOUR:
+            expired = self.hourly.pop(0)
+            day = expired.start - expired.start % DAY
+            if not self.daily or self.daily[-1].start != day:
+                self.daily.append(self._new_bucket(day, DAY))
+            self.daily[-1].merge(expired)
+        while self.daily and self.daily[0].start <= now - (self.days + 1) * DAY:
+            self.daily.pop(0)
+        return rotated
+
+    def query(self, dimension, start, end, top_n=10, key=None):
+        """
+        Get the heaviest keys of a time window.
+
+        The window is widened to the buckets it touches: whole hours within
+        the last day, whole days before that.
+
+        Args:
+            dimension: One of HEAVY_HITTER_DIMENSIONS
+            start: Window start in epoch seconds
+            end: Window end in epoch seconds
+            top_n: Number of keys to return (at most the capacity)
+            key: Also estimate the weight of this key
+
+        Returns:
+            Dictionary with the covered window and the heavy hitters
+        """
+        if dimension not in HEAVY_HITTER_DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}', use one of {', '.join(HEAVY_HITTER_DIMENSIONS)}")
+
+        buckets = [b for b in self.daily + self.hourly if b.start < end and b.start + b.length > start]
+        merged = self._new_bucket(buckets[0].start if buckets else start, 0)
+        for bucket in buckets:
+            merged.merge(bucket)
+        covered_end = max((b.start + b.length for b in buckets), default=end)
+
+        total = merged.totals[dimension]
+        seconds = merged.seconds
+        counters = merged.top[dimension].counters
+        sketch = merged.sketches[dimension]
+
+        def describe(name):
+            # The counter and the sketch are both upper bounds, the counter
+            # minus its error a lower one (0 for keys the summary lacks)
+            count, error = counters.get(name, (None, 0))
+            weight = sketch.estimate(name) if count is None else min(count, sketch.estimate(name))
+            lower = 0 if count is None else count - error
+            return {
+                'key': name,
+                'mb_seconds': round(weight, 1),
+                'error_mb_seconds': round(max(weight - lower, 0), 1),
+                'average_mb': round(weight / seconds, 2) if seconds else 0,
+                'share_percent': round(weight / total * 100, 2) if total else 0
+            }
+
+        def timestamp(t):
+            return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S')
+
+        hitters = sorted((describe(name) for name in counters), key=lambda hitter: hitter['mb_seconds'], reverse=True)
+        result = {
+            'by': dimension,
+            'start': timestamp(merged.start),
+            'end': timestamp(covered_end),
+            'observed_seconds': round(seconds, 1),
+            'total_mb_seconds': round(total, 1),
+            'buckets': len(buckets),
+            'hitters': hitters[:top_n]
+        }
+        if key is not None:
+            result['estimate'] = describe(key)
+        return result
+
+    def export_state(self, closed_only=False):
+        """
+        JSON-serializable state, for persistence and other processes.
+
+        Args:
+            closed_only: Leave out the bucket of the current hour, the only
+                one sweeps change between rotations (see export_open_bucket())
+        """
+        return {
+            'version': STATE_VERSION,
+            'capacity': self.capacity,
+            'width': self.width,
+            'depth': self.depth,
+            'last_update': self.last_update,
+            'hourly': [bucket.export_state() for bucket in (self.hourly[:-1] if closed_only else self.hourly)],
+            'daily': [bucket.export_state() for bucket in self.daily]
+        }
+
+    def export_open_bucket(self):
+        """JSON-serializable bucket of the current hour, None before the first sweep."""
+        return self.hourly[-1].export_state() if self.hourly else None
+
+    def _load_bucket(self, exported):
+        bucket = self._new_bucket(exported['start'], exported['length'])
+        bucket.seconds = exported['seconds']
+        for dimension in HEAVY_HITTER_DIMENSIONS:
+            bucket.totals[dimension] = exported['totals'][dimension]
+            bucket.top[dimension].load_state(exported['top'][dimension])
+            bucket.sketches[dimension].load_state(exported['sketches'][dimension])
+        return bucket
+
+    def load_state(self, state):
+        """
+        Replace the summaries with exported ones (of the same sizes).
+
+        A bucket of the current hour loaded by load_open_bucket() is kept if
+        it is newer than the exported ones.
+        """
+        if state.get('version') != STATE_VERSION or \
+                (state['capacity'], state['width'], state['depth']) != (self.capacity, self.width, self.depth):
+            raise ValueError("Heavy hitter state of another version or size")
+
+        hourly = [self._load_bucket(exported) for exported in state['hourly']]
+        if self.hourly and (not hourly or self.hourly[-1].start > hourly[-1].start):
+            hourly.append(self.hourly[-1])
+        self.hourly = hourly
+        self.daily = [self._load_bucket(exported) for exported in state['daily']]
+        self.last_update = state['last_update']
+        self.rotations += 1
+
+    def load_open_bucket(self, exported):
+        """Replace the bucket of the current hour with one from export_open_bucket()."""
+        if exported is None:
+            return
+        bucket = self._load_bucket(exported)
+        if self.hourly and self.hourly[-1].start == bucket.start:
+            self.hourly[-1] = bucket
+        elif not self.hourly or self.hourly[-1].start < bucket.start:
+            self.hourly.append(bucket)
@@ -2,22 +2,81 @@ import psutil
 import time
 import os
 import json
-import platform
-import csv
-import random
 from datetime import datetime, timedelta
 import logging
 from collections import deque, defaultdict
+from itertools import islice
 import threading
-import statistics
 import math
 
+from downsampling import lttb_indices, take
+from sample_ring import SampleRing
+from cgroup_collector import CgroupCollector, DEFAULT_CGROUP_ROOT
+from pressure import PressureMonitor
+from anomaly import AnomalyDetector
+from forecast import Forecaster, linear_trend
+from process_groups import ProcessGroups
+from uss_collector import UssCollector
+from heavy_hitters import HeavyHitters, HEAVY_HITTER_DIMENSIONS
+from vmstat import VmstatCollector, ProcessFaults, VMSTAT_PATH, VMSTAT_COUNTERS
+
+# Modules only some configurations use (platform, csv, random, statistics,
+# tracemalloc, urllib) are imported where they are needed, to start quickly
+
 logger = logging.getLogger(__name__)
 
+# Sections that can be requested together from get_batch()
+BATCH_SECTIONS = ('current', 'history', 'processes', 'groups', 'system-info', 'alerts', 'cgroups')
+
+# Adaptive sampling: signals that switch the collector to its fastest rate
+PSI_SOME_THRESHOLD = 5.0        # Percent of the last 10 s some task stalled on memory
+PERCENT_RATE_THRESHOLD = 1.0    # Change of memory percent per second
+PRESSURE_HOLD_SECONDS = 10      # Keep sampling fast this long after the last signal
+
+# Anomaly detection: sample fields watched, and the smallest change in bytes worth reporting
+ANOMALY_MEMORY_FIELDS = ('available', 'used', 'free', 'buffers', 'cached', 'percent')
+ANOMALY_SWAP_FIELDS = ('used', 'percent')
+ANOMALY_BYTES_FLOOR = 16 * 1024 * 1024
+ANOMALY_PERCENT_FLOOR = 1.0
+
+# Heavy hitter summaries, saved in the export directory next to the daily rollups
+HEAVY_HITTERS_FILENAME = 'heavy_hitters.json'
+
+# Paging: the thrashing alert averages major faults over this window, and
+# each process sweep keeps the processes faulting the most
+PAGING_WINDOW_SECONDS = 10
+FAULTING_PROCESSES = 10
+
+# Process forecasts: the history span needed before a time to exhaustion is
+# reported, and how far beyond that span it may be extrapolated
+PROCESS_FORECAST_MIN_SPAN = 240
+PROCESS_FORECAST_MAX_EXTRAPOLATION = 12
+
+# Top processes of each sweep whose memory history is kept, and the top ones
+# published to web workers, which never sweep themselves
+TRACKED_PROCESSES = 20
+PUBLISHED_PROCESSES = 100
+
+# Sections of the state published to web workers, each in its own segment,
+# and the seconds between publications of the cgroup histories, which change
+# with every sample but are only read over hours
+SHARED_STATE_SECTIONS = ('state', 'rollups', 'cgroup_history', 'heavy_hitters')
+SHARED_HISTORY_INTERVAL = 60
+
+# Paging fields of the hourly and daily rollups: average rates per second, and the OOM kills counted
+ROLLUP_PAGING_FIELDS = tuple(f'{counter}_per_sec' for counter in VMSTAT_COUNTERS if counter != 'oom_kill') + ('oom_kills',)
+
 class MemoryTracker:
     def __init__(self, history_minutes=5, sample_interval=1, 
                  long_term_history_days=7, alert_threshold=80,
-                 export_dir='./exports'):
+                 export_dir='./exports', history_file=None,
+                 cgroup_root=DEFAULT_CGROUP_ROOT, adaptive_sampling=False,
+                 min_interval=0.1, max_interval=5, anomaly_detection=True,
+                 uss_budget=0.02, allocation_tracking=False, allocation_interval=60,
+                 allocation_frames=1, allocation_sampling=1.0, alert_sinks=None,
+                 alert_coalesce_seconds=30, alert_rate_limit=30, track_processes=True,
+                 heavy_hitters=True, vmstat_path=VMSTAT_PATH, process_faults=True,
+                 thrashing_threshold=500, autostart=True):
         """
         Initialize the memory tracker.
         
@@ -27,107 +86,473 @@ class MemoryTracker:
             long_term_history_days: How many days of history to keep for trend analysis
             alert_threshold: Percentage threshold for memory alerts
             export_dir: Directory to store exported data
+            history_file: Optional memory-mapped ring file backing the real-time
+                history, so it survives restarts and can be read by other tools
+            cgroup_root: cgroup v2 mount point for per-container accounting
+                (ignored if it is not a cgroup v2 hierarchy, None to disable)
+            adaptive_sampling: Vary the interval with memory pressure instead of
+                sampling every sample_interval seconds
+            min_interval: Adaptive interval under memory pressure (in seconds)
+            max_interval: Adaptive interval the collector backs off to when calm
+            anomaly_detection: Raise alerts when a metric behaves unusually,
+                even below alert_threshold
+            uss_budget: Seconds per sample spent reading the USS/PSS of processes
+                (0 or None to disable)
+            allocation_tracking: Snapshot the Python allocations of this process
+                with tracemalloc, for when the tracker is embedded in a service
+            allocation_interval: Seconds between allocation snapshots
+            allocation_frames: Traceback depth recorded per allocation
+            allocation_sampling: Fraction of each allocation interval during which
+                allocations are traced (1 to trace continuously)
+            alert_sinks: URLs (or sink objects) alerts are delivered to, e.g.
+                'http://localhost:9000/alerts', 'syslog:///dev/log', 'file://./exports/alerts.log'
+            alert_coalesce_seconds: Window during which repeated alerts of one
+                key are folded into a single notification
+            alert_rate_limit: Notifications delivered per minute at most
+            track_processes: Sweep all processes every few samples, for process
+                and group leak detection, forecasts and USS/PSS
+            heavy_hitters: Summarize the memory-seconds of process names and
+                users over the long-term history, in fixed memory
+            vmstat_path: Kernel event counters the page fault, swap and reclaim
+                rates of each sample are computed from (None to disable)
+            process_faults: Compute the page fault rates of every process in
+                each process sweep
+            thrashing_threshold: Major page faults per second, averaged over
+                PAGING_WINDOW_SECONDS, that raise a thrashing alert (0 or None
+                to disable)
+            autostart: Start the background collector thread immediately
+                (otherwise call start(), or use the tracker as a context manager)
         """
         self.history_minutes = history_minutes
         self.sample_interval = sample_interval
         self.max_samples = int((history_minutes * 60) / sample_interval)
+        
+        # Adaptive sampling keeps history_minutes by age, sized for the fastest rate
+        self.adaptive_sampling = adaptive_sampling
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.current_interval = sample_interval
+        if adaptive_sampling:
+            self.max_samples = int((history_minutes * 60) / min(min_interval, sample_interval))
+        self.pressure_monitor = None
+        self.last_pressure_time = None
+        self.rate_checkpoint = None  # (epoch seconds, memory percent)
+        
+        # Time-weighted sums of the current hour, so uneven samples average correctly
+        self.rollup_seconds = 0.0
+        self.rollup_memory_sum = 0.0
+        self.rollup_swap_sum = 0.0
+        self.rollup_paging_seconds = 0.0  # Paging rates are unknown for some samples
+        self.rollup_paging_sums = {}
+        self.last_sample_time = None
         self.alert_threshold = alert_threshold
-        self.export_dir = export_dir
+        self.export_dir = export_dir  # Created by the first export
         self.long_term_history_days = long_term_history_days
         
-        # Create export directory if it doesn't exist
-        if not os.path.exists(export_dir):
-            os.makedirs(export_dir)
-        
         # Initialize history storage
         self.memory_history = deque(maxlen=self.max_samples)
         self.swap_history = deque(maxlen=self.max_samples)
+        self.paging_history = deque(maxlen=self.max_samples)  # Rates per second, None if unknown
         self.timestamps = deque(maxlen=self.max_samples)
+        self.sample_times = deque(maxlen=self.max_samples)  # Epoch seconds
+        
+        # Guards the history deques so readers always see one consistent sample
+        self.lock = threading.Lock()
+        
+        # Total samples collected so far, used as the history cursor for clients
+        self.sample_count = 0
+        
+        # Most recent sample, served to clients instead of re-reading psutil
+        self.latest_sample = None
         
         # Initialize process history tracking - for memory leak detection
         self.process_history = {}  # pid -> {timestamps: [], memory_usage: []}
         
+        # Memory-mapped ring file mirroring the real-time history, opened by the first sample
+        self.history_file = history_file
+        self.history_ring = None
+        self.history_opened = False
+        
+        # Per-cgroup accounting, when running on a cgroup v2 host
+        self.cgroup_collector = None
+        if cgroup_root and CgroupCollector.is_available(cgroup_root):
+            self.cgroup_collector = CgroupCollector(
+                cgroup_root,
+                history_size=int((history_minutes * 60) / sample_interval),
+                alert_threshold=alert_threshold
+            )
+        
+        # Streaming anomaly detection over every metric series
+        self.anomaly_detector = AnomalyDetector() if anomaly_detection else None
+        
+        # Forecasts fitted incrementally to the hourly rollups
+        self.forecaster = Forecaster()
+        self.forecast_lock = threading.Lock()
+        self.process_forecast_cache = (None, None)  # (sweep time, forecasts)
+        
+        # Processes aggregated by name, user and process tree, updated by each sweep
+        self.process_groups = ProcessGroups()
+        
+        # Memory-seconds per name and user over days, loaded from the export directory by the first sweep
+        self.heavy_hitters = HeavyHitters(days=long_term_history_days) if heavy_hitters else None
+        self.heavy_hitters_lock = threading.Lock()
+        self.heavy_hitters_loaded = False
+        
+        # Paging, swap and reclaim rates from the kernel's event counters
+        self.vmstat_collector = None
+        if vmstat_path:
+            collector = VmstatCollector(vmstat_path)
+            self.vmstat_collector = collector if collector.available else None
+        self.thrashing_threshold = thrashing_threshold
+        
+        # Page fault rates of every process, computed by each sweep
+        self.process_faults = None
+        if process_faults:
+            faults = ProcessFaults()
+            self.process_faults = faults if faults.available else None
+        self.faulting_processes = []
+        
+        # USS/PSS read within a time budget per sample, cached per process
+        self.uss_collector = UssCollector(budget=uss_budget) if uss_budget else None
+        
+        # Allocation sites of this Python process, snapshotted on a schedule
+        self.allocation_tracker = None
+        if allocation_tracking:
+            from allocation_tracker import AllocationTracker
+            self.allocation_tracker = AllocationTracker(
+                interval=allocation_interval,
+                frames=allocation_frames,
+                sampling=allocation_sampling
+            )
+        
+        # Most recent process sweeps made by the collector: all processes, the top
+        # ones for web workers, and the top ones with history
+        self.process_snapshot = []
+        self.process_ranking = []
+        self.latest_processes = []
+        self.latest_processes_time = None
+        self.process_interval = sample_interval * 5
+        self.track_processes = track_processes
+        
         # Long-term storage (hourly averages)
         self.hourly_memory_data = []
         self.daily_memory_data = []
         self.last_hourly_store = datetime.now()
         self.last_daily_store = datetime.now()
         
-        # System information
-        self.system_info = {
-            'platform': platform.system(),
-            'platform_version': platform.version(),
-            'cpu_count': psutil.cpu_count(logical=True),
-            'hostname': platform.node()
-        }
+        # System information (static, so it is gathered once, when first asked for)
+        self.system_info = None
         
         # Alert history
         self.active_alerts = []
         self.alert_history = deque(maxlen=100)
+        self.alert_count = 0  # Used as the alerts cursor for clients
+        
+        # Notifications delivered by a worker thread, never by the collector
+        self.alert_dispatcher = None
+        if alert_sinks:
+            from alert_dispatcher import AlertDispatcher
+            self.alert_dispatcher = AlertDispatcher(
+                alert_sinks,
+                coalesce_seconds=alert_coalesce_seconds,
+                rate_limit=alert_rate_limit
+            )
         
         # Virtual memory types available
         self.virtual_memory_available = True
         
-        # Start background collection thread
+        # Optional shared_state.SharedStatePublisher fed by the collector
+        self.publisher = None
+        
+        # Background collection thread, and the event that interrupts its sleep
+        self.running = False
+        self.collector_thread = None
+        self.wakeup = threading.Event()
+        if autostart:
+            self.start()
+        
+        logger.debug(f"Memory tracker initialized with {history_minutes} min history and {sample_interval}s interval")
+
+    def start(self):
+        """Start the background collector thread (nothing happens if it is running)."""
+        if self.running:
+            return
+        if self.allocation_tracker and not self.allocation_tracker.running:
+            self.allocation_tracker.start()
+        self.wakeup.clear()
         self.running = True
-        self.collector_thread = threading.Thread(target=self._collector_loop)
+        self.collector_thread = threading.Thread(target=self._collector_loop, name='memory-collector')
         self.collector_thread.daemon = True
         self.collector_thread.start()
         
-        logger.debug(f"Memory tracker initialized with {history_minutes} min history and {sample_interval}s interval")
-
+    def stop(self, timeout=None):
+        """
+        Stop the collector thread and release what it holds; start() resumes.
+        
+        The history file is flushed and closed, the heavy hitter summaries are
+        saved, pending alert notifications get a moment to be delivered, and
+        allocation tracing stops.
+        
+        Args:
+            timeout: Seconds to wait for the collector thread (by default a bit
+                more than the longest interval it may be sleeping for)
+        """
+        self.running = False
+        self.wakeup.set()
+        if self.pressure_monitor:
+            self.pressure_monitor.interrupt()
+        thread = self.collector_thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            if timeout is None:
+                timeout = max(self.sample_interval, self.max_interval if self.adaptive_sampling else 0) + 1
+            thread.join(timeout)
+        
+        if thread and thread.is_alive():
+            logger.warning("Memory collector thread did not stop in time")
+        elif self.pressure_monitor:
+            self.pressure_monitor.close()
+            self.pressure_monitor = None
+        if self.history_ring:
+            self.history_ring.close()
+            self.history_ring = None
+            self.history_opened = False
+        if self.allocation_tracker:
+            self.allocation_tracker.stop()
+        if self.heavy_hitters and self.heavy_hitters_loaded:
+            self._save_heavy_hitters()
+        if self.alert_dispatcher:
+            self.alert_dispatcher.flush(timeout=1)
+            self.alert_dispatcher.stop(timeout=1)
+            
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        
     def _collector_loop(self):
         """Background thread that collects memory data at regular intervals."""
+        if self.adaptive_sampling and self.pressure_monitor is None:
+            self.pressure_monitor = PressureMonitor()
+            
         while self.running:
+            memory = None
             try:
-                # Get memory data
-                memory = psutil.virtual_memory()
-                swap = psutil.swap_memory()
-                now = datetime.now()
-                
-                # Store in history
-                mem_data = {
-                    'total': memory.total,
-                    'available': memory.available,
-                    'used': memory.used,
-                    'free': memory.free,
-                    'percent': memory.percent,
-                    'buffers': getattr(memory, 'buffers', 0),
-                    'cached': getattr(memory, 'cached', 0),
-                }
-                self.memory_history.append(mem_data)
-                
-                swap_data = {
-                    'total': swap.total,
-                    'used': swap.used,
-                    'free': swap.free,
-                    'percent': swap.percent,
-                }
-                self.swap_history.append(swap_data)
-                
-                self.timestamps.append(now.strftime('%H:%M:%S'))
-                
-                # Check for alerts based on thresholds
-                self._check_alerts(memory, swap)
-                
-                # Collect top process data for memory leak detection
-                if len(self.timestamps) % 5 == 0:  # Every 5 intervals to reduce overhead
-                    self._update_process_history()
-                
-                # Store hourly averages (for long-term history)
-                if (now - self.last_hourly_store).total_seconds() >= 3600:  # 1 hour
-                    self._store_hourly_average(now)
-                    
-                # Store daily averages
-                if (now - self.last_daily_store).total_seconds() >= 86400:  # 1 day
-                    self._store_daily_average(now)
-                    self._cleanup_old_data()
-                
+                memory = self.collect_sample()
             except Exception as e:
                 logger.error(f"Error collecting memory data: {str(e)}")
+            if not self.running:
+                break
             
             # Sleep until next collection
-            time.sleep(self.sample_interval)
+            if self.adaptive_sampling and memory is not None:
+                self._adaptive_wait(memory.percent)
+            else:
+                self.wakeup.wait(self.sample_interval)
+                
+    def collect_sample(self):
+        """
+        Take one sample and run everything that is fed by it.
+        
+        This is what the collector thread runs every interval; call it directly
+        to drive the tracker without the thread.
+        
+        Returns:
+            The psutil virtual memory reading of the sample
+        """
+        # Get memory data
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        now = datetime.now()
+        
+        # Build the sample
+        mem_data = {
+            'total': memory.total,
+            'available': memory.available,
+            'used': memory.used,
+            'free': memory.free,
+            'percent': memory.percent,
+            'buffers': getattr(memory, 'buffers', 0),
+            'cached': getattr(memory, 'cached', 0),
+        }
+        
+        swap_data = {
+            'total': swap.total,
+            'used': swap.used,
+            'free': swap.free,
+            'percent': swap.percent,
+        }
+        
+        # Page fault, swap and reclaim rates since the previous sample
+        paging = self.vmstat_collector.sample() if self.vmstat_collector else None
+        
+        if self.history_file and not self.history_opened:
+            self._open_history_file(self.history_file)
+        
+        # Store in history
+        self._append_sample(now, mem_data, swap_data, paging)
+        self._accumulate_rollup(now.timestamp(), memory.percent, swap.percent, paging)
+        if self.history_ring:
+            self.history_ring.append(now.timestamp(), mem_data, swap_data, paging)
+        
+        if self.publisher:
+            self.publisher.publish_sample(now.timestamp(), mem_data, swap_data, paging)
+        
+        # Check for alerts based on thresholds
+        self._check_alerts(memory, swap)
+        if paging:
+            self._check_paging_alerts(now, paging)
+        
+        # Sample every cgroup and evaluate their alerts
+        if self.cgroup_collector:
+            self.cgroup_collector.sample(now.timestamp())
+            self._update_keyed_alerts(
+                'cgroup',
+                self.cgroup_collector.check_alerts(now.strftime('%Y-%m-%d %H:%M:%S'))
+            )
+        
+        # Look for unusual behaviour of any metric
+        if self.anomaly_detector:
+            self._detect_anomalies(now, mem_data, swap_data)
+        
+        # Collect top process data for memory leak detection
+        sweep_time = self.latest_processes_time
+        if self.track_processes and (sweep_time is None or (now - sweep_time).total_seconds() >= self.process_interval):
+            self._update_process_history()
+        
+        # Refresh USS/PSS of some processes, within at most 5% of the interval
+        if self.uss_collector and self.process_snapshot:
+            budget = min(self.uss_collector.budget, 0.05 * self.current_interval)
+            self.uss_collector.refresh(self.process_snapshot, now.timestamp(), budget)
+        
+        # Snapshot the allocations of this process when due
+        if self.allocation_tracker:
+            self.allocation_tracker.tick(now.timestamp())
+        
+        # Store hourly averages (for long-term history)
+        if (now - self.last_hourly_store).total_seconds() >= 3600:  # 1 hour
+            self._store_hourly_average(now)
+        
+        # Store daily averages
+        if (now - self.last_daily_store).total_seconds() >= 86400:  # 1 day
+            self._store_daily_average(now)
+            self._cleanup_old_data()
+        
+        # Push the history file to disk now and then, in case the OS crashes
+        if self.history_ring and self.sample_count % 60 == 0:
+            self.history_ring.flush()
+        
+        if self.publisher:
+            self.publisher.publish_state(self, now)
+        
+        return memory
+        
+    def _adaptive_wait(self, percent):
+        """
+        Sleep for an interval chosen from the memory pressure.
+        
+        Pressure (PSI averages or a fast change of memory percent) drops the
+        interval to min_interval; once calm for PRESSURE_HOLD_SECONDS it doubles
+        each sample up to max_interval. A PSI trigger ends the sleep early.
+        """
+        now = time.time()
+        pressure = False
+        
+        if self.pressure_monitor.available:
+            pressure = self.pressure_monitor.some_avg10() >= PSI_SOME_THRESHOLD
+            
+        # Rate of change over at least a second, fast samples are too noisy
+        if self.rate_checkpoint is None:
+            self.rate_checkpoint = (now, percent)
+        elif now - self.rate_checkpoint[0] >= 1:
+            checkpoint_time, checkpoint_percent = self.rate_checkpoint
+            rate = abs(percent - checkpoint_percent) / (now - checkpoint_time)
+            pressure = pressure or rate >= PERCENT_RATE_THRESHOLD
+            self.rate_checkpoint = (now, percent)
+            
+        if pressure:
+            self.last_pressure_time = now
+            
+        if self.last_pressure_time is not None and now - self.last_pressure_time < PRESSURE_HOLD_SECONDS:
+            self.current_interval = self.min_interval
+        else:
+            self.current_interval = min(max(self.current_interval * 2, self.min_interval), self.max_interval)
+            
+        if not self.pressure_monitor.triggers:
+            # Nothing to poll, so sleep where stop() can wake us up
+            self.wakeup.wait(self.current_interval)
+        elif self.pressure_monitor.wait(self.current_interval):
+            logger.debug("Memory pressure trigger fired, sampling at the fastest rate")
+            self.last_pressure_time = time.time()
+            self.current_interval = self.min_interval
+            
+    def _accumulate_rollup(self, sample_time, memory_percent, swap_percent, paging=None):
+        """Add a sample to the current hour, weighted by the time it covers."""
+        if self.last_sample_time is not None:
+            # Cap the weight so a stalled collector does not stretch one sample
+            weight = min(sample_time - self.last_sample_time,
+                         2 * max(self.sample_interval, self.max_interval))
+            if weight > 0:
+                self.rollup_seconds += weight
+                self.rollup_memory_sum += memory_percent * weight
+                self.rollup_swap_sum += swap_percent * weight
+                if paging:
+                    self.rollup_paging_seconds += weight
+                    sums = self.rollup_paging_sums
+                    for key, rate in paging.items():
+                        sums[key] = sums.get(key, 0.0) + rate * weight
+        self.last_sample_time = sample_time
+            
+    def _open_history_file(self, path):
+        """Back the real-time history with a ring file and resume what it holds."""
+        self.history_opened = True
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.history_ring = SampleRing(path, capacity=self.max_samples)
+        except BlockingIOError:
+            logger.warning(f"History file {path} is in use by another tracker, keeping history in memory only")
+            return
+        except Exception as e:
+            logger.error(f"Error opening history file {path}: {str(e)}")
+            return
+        
+        # Resume the history left by a previous run
+        index, samples = self.history_ring.read_since(0, limit=self.max_samples)
+        for sample_time, mem_data, swap_data, paging in samples:
+            self._append_sample(datetime.fromtimestamp(sample_time), mem_data, swap_data, paging)
+        self.sample_count = index
+        
+        if samples:
+            logger.info(f"Resumed {len(samples)} samples from {path}")
+        
+    def _append_sample(self, now, mem_data, swap_data, paging=None):
+        """Append one sample to the real-time history."""
+        with self.lock:
+            self.memory_history.append(mem_data)
+            self.swap_history.append(swap_data)
+            self.paging_history.append(paging)
+            self.timestamps.append(now.strftime('%H:%M:%S'))
+            self.sample_times.append(now.timestamp())
+            self.sample_count += 1
+            
+            # Variable-rate samples: keep the window by age rather than by count
+            if self.adaptive_sampling:
+                cutoff = now.timestamp() - self.history_minutes * 60
+                while self.sample_times and self.sample_times[0] <= cutoff:
+                    self.memory_history.popleft()
+                    self.swap_history.popleft()
+                    self.paging_history.popleft()
+                    self.timestamps.popleft()
+                    self.sample_times.popleft()
+            self.latest_sample = {
+                'memory': mem_data,
+                'swap': swap_data,
+                'paging': paging,
+                'timestamp': now.strftime('%Y-%m-%d %H:%M:%S')
+            }
             
     def _check_alerts(self, memory, swap):
         """Check memory and swap usage against thresholds and generate alerts."""
@@ -145,9 +570,7 @@ class MemoryTracker:
             
             # Check if this alert is already active (to avoid duplicates)
             if not any(a['type'] == 'memory' for a in self.active_alerts):
-                self.active_alerts.append(alert)
-                self.alert_history.append(alert)
-                logger.warning(f"Alert: {alert['message']}")
+                self._record_alert(alert)
         else:
             # Clear memory alerts if they exist
             self.active_alerts = [a for a in self.active_alerts if a['type'] != 'memory']
@@ -164,19 +587,175 @@ class MemoryTracker:
             
             # Check if this alert is already active
             if not any(a['type'] == 'swap' for a in self.active_alerts):
-                self.active_alerts.append(alert)
-                self.alert_history.append(alert)
-                logger.warning(f"Alert: {alert['message']}")
+                self._record_alert(alert)
         else:
             # Clear swap alerts if they exist
             self.active_alerts = [a for a in self.active_alerts if a['type'] != 'swap']
+    
+    def _record_alert(self, alert):
+        """Activate a new alert and add it to the alert history."""
+        with self.lock:
+            self.alert_count += 1
+            alert['id'] = self.alert_count
+            self.active_alerts.append(alert)
+            self.alert_history.append(alert)
+        logger.warning(f"Alert: {alert['message']}")
+        if self.alert_dispatcher:
+            self.alert_dispatcher.submit(alert)
+        
+    def _update_keyed_alerts(self, alert_type, firing):
+        """
+        Reconcile the active alerts of a type that are tracked per 'key'.
+        
+        Args:
+            alert_type: Alert type, e.g. 'cgroup'
+            firing: Alerts of that type currently firing, each with a 'key'
+        """
+        active_keys = {a.get('key') for a in self.active_alerts if a['type'] == alert_type}
+        firing_keys = {a['key'] for a in firing}
+        
+        for alert in firing:
+            if alert['key'] not in active_keys:
+                self._record_alert(alert)
+        
+        # Clear alerts that stopped firing
+        if active_keys - firing_keys:
+            self.active_alerts = [a for a in self.active_alerts
+                                  if a['type'] != alert_type or a.get('key') in firing_keys]
             
+    def _check_paging_alerts(self, now, paging):
+        """Raise OOM kill and thrashing alerts from the paging rates of a sample."""
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        window = self._paging_window_rates()
+        
+        # Every OOM kill is an alert of its own, active while within the window
+        if paging.get('oom_kill'):
+            with self.lock:
+                elapsed = self.sample_times[-1] - self.sample_times[-2] if len(self.sample_times) > 1 else 1
+            kills = max(round(paging['oom_kill'] * elapsed), 1)
+            self._record_alert({
+                'type': 'oom',
+                'level': 'critical',
+                'message': f'OOM killer killed {kills} process{"es" if kills > 1 else ""}',
+                'value': kills,
+                'timestamp': timestamp
+            })
+        elif not (window and window.get('oom_kill')):
+            self.active_alerts = [a for a in self.active_alerts if a['type'] != 'oom']
+        
+        # Major faults wait for the disk: sustained, they mean the working set no longer fits in RAM
+        major_faults = window.get('pgmajfault') if window else None
+        if self.thrashing_threshold and major_faults is not None and major_faults >= self.thrashing_threshold:
+            alert = {
+                'type': 'thrashing',
+                'level': 'warning' if major_faults < 5 * self.thrashing_threshold else 'critical',
+                'message': f'Thrashing: {major_faults:.0f} major page faults/s over {PAGING_WINDOW_SECONDS} s '
+                           f'(swap in {window.get("pswpin", 0):.0f}, out {window.get("pswpout", 0):.0f} pages/s)',
+                'value': major_faults,
+                'timestamp': timestamp
+            }
+            
+            if not any(a['type'] == 'thrashing' for a in self.active_alerts):
+                self._record_alert(alert)
+        else:
+            self.active_alerts = [a for a in self.active_alerts if a['type'] != 'thrashing']
+            
+    def _paging_window_rates(self, seconds=PAGING_WINDOW_SECONDS):
+        """
+        Average the paging rates of the latest samples, weighted by the time each covers.
+        
+        Returns:
+            Dictionary of counter -> events per second over the last seconds,
+            or None if no rates are known
+        """
+        sums = {}
+        covered = 0.0
+        with self.lock:
+            samples = zip(reversed(self.sample_times), reversed(self.paging_history))
+            later = next(samples, None)
+            cutoff = later[0] - seconds if later else None
+            for sample_time, paging in samples:
+                later_time, later_paging = later
+                if later_time <= cutoff:
+                    break
+                if later_paging:
+                    elapsed = later_time - sample_time
+                    covered += elapsed
+                    for key, rate in later_paging.items():
+                        sums[key] = sums.get(key, 0.0) + rate * elapsed
+                later = (sample_time, paging)
+        
+        if covered <= 0:
+            return None
+        return {key: round(total / covered, 2) for key, total in sums.items()}
+        
+    def _detect_anomalies(self, now, mem_data, swap_data):
+        """Feed the sample and cgroup usage to the anomaly detector and update its alerts."""
+        detector = self.anomaly_detector
+        sample_time = now.timestamp()
+        
+        for field in ANOMALY_MEMORY_FIELDS:
+            if field == 'percent':
+                detector.update('memory.percent', mem_data['percent'], sample_time, label='RAM usage',
+                                floor=ANOMALY_PERCENT_FLOOR, hour=now.hour)
+            else:
+                detector.update(f'memory.{field}', mem_data[field], sample_time, label=f'RAM {field}',
+                                floor=ANOMALY_BYTES_FLOOR)
+                
+        if swap_data['total']:
+            detector.update('swap.used', swap_data['used'], sample_time, label='Swap used',
+                            floor=ANOMALY_BYTES_FLOOR)
+            detector.update('swap.percent', swap_data['percent'], sample_time, label='Swap usage',
+                            floor=ANOMALY_PERCENT_FLOOR, hour=now.hour)
+            
+        if self.cgroup_collector:
+            for path, cgroup in self.cgroup_collector.cgroups.items():
+                detector.update(f'cgroup:{path}', cgroup.current, sample_time, label=f'cgroup {path}',
+                                floor=ANOMALY_BYTES_FLOOR)
+                
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        firing = []
+        for anomaly in detector.get_active(sample_time):
+            if anomaly['key'].endswith('.percent'):
+                value, expected = f"{anomaly['value']:.1f}%", f"{anomaly['expected']:.1f}%"
+            else:
+                value = f"{anomaly['value'] / (1024 * 1024):.0f} MB"
+                expected = f"{anomaly['expected'] / (1024 * 1024):.0f} MB"
+            firing.append({
+                'type': 'anomaly',
+                'key': anomaly['key'],
+                'level': 'warning',
+                'message': f"Unusual {anomaly['label']}: {value}, expected about {expected}",
+                'value': anomaly['value'],
+                'expected': anomaly['expected'],
+                'score': anomaly['score'],
+                'detector': anomaly['detector'],
+                'timestamp': timestamp
+            })
+        self._update_keyed_alerts('anomaly', firing)
+        
     def _update_process_history(self):
         """Update process history for memory leak detection."""
         timestamp = datetime.now()
         try:
-            # Get top processes by memory usage
-            processes = self.get_process_memory_usage(top_n=20)
+            # Apply the full sweep to the groups, then keep the top processes
+            processes = self._scan_processes()
+            self.process_groups.update(processes, timestamp.timestamp())
+            self.process_snapshot = processes
+            if self.process_faults:
+                self.process_faults.annotate(processes)
+                faulting = [p for p in processes if p.get('major_faults_per_sec')]
+                self.faulting_processes = sorted(faulting, key=lambda x: x['major_faults_per_sec'],
+                                                 reverse=True)[:FAULTING_PROCESSES]
+            if self.heavy_hitters:
+                self._update_heavy_hitters(timestamp.timestamp())
+            ranking = sorted(processes, key=lambda x: x.get('memory_percent', 0), reverse=True)
+            processes = ranking[:TRACKED_PROCESSES]
+            if self.uss_collector:
+                self.uss_collector.annotate(processes, timestamp.timestamp())
+            self.process_ranking = ranking[:PUBLISHED_PROCESSES]
+            self.latest_processes = processes
+            self.latest_processes_time = timestamp
             
             # Update history for each process
             for proc in processes:
@@ -193,6 +772,12 @@ class MemoryTracker:
                         'username': proc.get('username', '')
                     }
                 
+                if self.anomaly_detector:
+                    self.anomaly_detector.update(
+                        f'process:{pid}', memory_mb * 1024 * 1024, timestamp.timestamp(),
+                        label=f"process {proc['name']} ({pid})", floor=ANOMALY_BYTES_FLOOR
+                    )
+                
                 # Update process data
                 history = self.process_history[pid]
                 history['timestamps'].append(timestamp)
@@ -216,14 +801,201 @@ class MemoryTracker:
         except Exception as e:
             logger.error(f"Error updating process history: {str(e)}")
             
+    def _update_heavy_hitters(self, now):
+        """Add the group totals of a sweep to the heavy hitter summaries."""
+        if not self.heavy_hitters_loaded:
+            self._load_heavy_hitters()
+        totals = {
+            dimension: {key: group.size / 100 for key, group in self.process_groups.groups[dimension].items()
+                        if group.count}
+            for dimension in HEAVY_HITTER_DIMENSIONS
+        }
+        with self.heavy_hitters_lock:
+            completed_hour = self.heavy_hitters.update(totals, now)
+        if completed_hour:
+            self._save_heavy_hitters()
+            
+    def _load_heavy_hitters(self):
+        """Resume the heavy hitter summaries saved by a previous run."""
+        self.heavy_hitters_loaded = True
+        filename = os.path.join(self.export_dir, HEAVY_HITTERS_FILENAME)
+        if not os.path.exists(filename):
+            return
+        try:
+            with open(filename) as f:
+                state = json.load(f)
+            with self.heavy_hitters_lock:
+                self.heavy_hitters.load_state(state)
+            logger.info(f"Resumed heavy hitter summaries from {filename}")
+        except Exception as e:
+            logger.error(f"Error loading heavy hitter summaries from {filename}: {str(e)}")
+            
+    def _save_heavy_hitters(self):
+        """Save the heavy hitter summaries, replacing the file atomically."""
+        try:
+            filename = self._export_path(HEAVY_HITTERS_FILENAME)
+            with self.heavy_hitters_lock:
+                state = self.heavy_hitters.export_state()
+            with open(filename + '.tmp', 'w') as f:
+                json.dump(state, f)
+            os.replace(filename + '.tmp', filename)
+        except Exception as e:
+            logger.error(f"Error saving heavy hitter summaries: {str(e)}")
+            
+    def _shared_state_key(self, section, now):
+        """
+        Get the change key of a shared state section.
+        
+        A section is published again only when its key changes; None
+        publishes it with every state publication.
+        
+        Args:
+            section: One of SHARED_STATE_SECTIONS
+            now: Time of the publication
+        """
+        if section == 'rollups':
+            return (self.last_hourly_store, self.last_daily_store)
+        if section == 'cgroup_history':
+            # Changed by every sample, but only read over hours
+            return int(now.timestamp() // SHARED_HISTORY_INTERVAL)
+        if section == 'heavy_hitters':
+            # Sweeps only change the open bucket, published with the main section
+            return self.heavy_hitters.rotations if self.heavy_hitters else 0
+        return None
+        
+    def _export_shared_state(self, section='state'):
+        """
+        Export a section of the low-rate tracker state as a JSON-serializable
+        dictionary for other processes.
+        
+        Args:
+            section: One of SHARED_STATE_SECTIONS: 'state' (alerts, process
+                history, current cgroup usage...), 'rollups' (hourly and daily
+                data), 'cgroup_history' or 'heavy_hitters' (all but the
+                bucket of the current hour, which is in 'state')
+        """
+        if section == 'rollups':
+            return {
+                'hourly_memory_data': list(self.hourly_memory_data),
+                'daily_memory_data': list(self.daily_memory_data)
+            }
+        if section == 'cgroup_history':
+            return self.cgroup_collector.export_histories() if self.cgroup_collector else None
+        if section == 'heavy_hitters':
+            if not self.heavy_hitters:
+                return None
+            with self.heavy_hitters_lock:
+                return self.heavy_hitters.export_state(closed_only=True)
+            
+        process_history = {}
+        for pid, history in list(self.process_history.items()):
+            process_history[str(pid)] = {
+                'name': history['name'],
+                'username': history['username'],
+                'start_time': history['start_time'].timestamp(),
+                'timestamps': [t.timestamp() for t in history['timestamps']],
+                'memory_usage': list(history['memory_usage'])
+            }
+            
+        with self.lock:
+            alerts = {
+                'active_alerts': list(self.active_alerts),
+                'alert_history': list(self.alert_history),
+                'alert_count': self.alert_count
+            }
+            
+        heavy_hitters_open = None
+        if self.heavy_hitters:
+            with self.heavy_hitters_lock:
+                heavy_hitters_open = self.heavy_hitters.export_open_bucket()
+            
+        latest_time = self.latest_processes_time
+        cgroups = self.cgroup_collector.export_state(max_points=0) if self.cgroup_collector else None
+        return dict(alerts, **{
+            'cgroups': cgroups,
+            'process_groups': self.process_groups.export_state(),
+            'sampling': {
+                'interval': self.current_interval,
+                'last_pressure_time': self.last_pressure_time
+            },
+            'notifications': self.alert_dispatcher.get_stats() if self.alert_dispatcher else None,
+            'heavy_hitters_open': heavy_hitters_open,
+            'faulting_processes': self.faulting_processes,
+            'process_history': process_history,
+            'process_ranking': self.process_ranking,
+            'latest_processes_time': latest_time.timestamp() if latest_time else None
+        })
+        
+    def _import_shared_state(self, state, section='state'):
+        """Replace a section of the low-rate tracker state with one from _export_shared_state()."""
+        if section == 'rollups':
+            self.hourly_memory_data = state['hourly_memory_data']
+            self.daily_memory_data = state['daily_memory_data']
+            return
+        if section == 'cgroup_history':
+            if state is not None and self.cgroup_collector is not None:
+                self.cgroup_collector.load_histories(state)
+            return
+        if section == 'heavy_hitters':
+            if state is not None and self.heavy_hitters:
+                with self.heavy_hitters_lock:
+                    self.heavy_hitters.load_state(state)
+            return
+            
+        process_history = {}
+        for pid, history in state['process_history'].items():
+            process_history[int(pid)] = {
+                'name': history['name'],
+                'username': history['username'],
+                'start_time': datetime.fromtimestamp(history['start_time']),
+                'timestamps': [datetime.fromtimestamp(t) for t in history['timestamps']],
+                'memory_usage': history['memory_usage']
+            }
+        self.process_history = process_history
+        
+        with self.lock:
+            self.active_alerts = state['active_alerts']
+            self.alert_history = deque(state['alert_history'], maxlen=self.alert_history.maxlen)
+            self.alert_count = state['alert_count']
+            
+        # The top processes with history lead the ranking
+        self.process_ranking = state['process_ranking']
+        self.latest_processes = self.process_ranking[:TRACKED_PROCESSES]
+        self.faulting_processes = state['faulting_processes']
+        latest_time = state['latest_processes_time']
+        self.latest_processes_time = datetime.fromtimestamp(latest_time) if latest_time else None
+        
+        self.process_groups.load_state(state['process_groups'])
+        
+        if self.heavy_hitters:
+            with self.heavy_hitters_lock:
+                self.heavy_hitters.load_open_bucket(state['heavy_hitters_open'])
+        
+        if state['cgroups'] is not None:
+            if self.cgroup_collector is None:
+                self.cgroup_collector = CgroupCollector()
+            self.cgroup_collector.load_state(state['cgroups'])
+            
+        self.current_interval = state['sampling']['interval']
+        self.last_pressure_time = state['sampling']['last_pressure_time']
+        
+        if state['notifications'] is not None and self.alert_dispatcher:
+            self.alert_dispatcher.load_stats(state['notifications'])
+        
     def _store_hourly_average(self, now):
         """Store hourly average memory usage for long-term history."""
         if not self.memory_history or not self.swap_history:
             return
             
-        # Calculate averages
-        memory_percent_avg = statistics.mean([m['percent'] for m in self.memory_history])
-        swap_percent_avg = statistics.mean([s['percent'] for s in self.swap_history])
+        # Calculate averages, weighted by the time each sample covers
+        if self.rollup_seconds > 0:
+            memory_percent_avg = self.rollup_memory_sum / self.rollup_seconds
+            swap_percent_avg = self.rollup_swap_sum / self.rollup_seconds
+        else:
+            import statistics
+            memory_percent_avg = statistics.mean([m['percent'] for m in self.memory_history])
+            swap_percent_avg = statistics.mean([s['percent'] for s in self.swap_history])
+        self.rollup_seconds = self.rollup_memory_sum = self.rollup_swap_sum = 0.0
         
         # Store data
         hour_data = {
@@ -232,9 +1004,28 @@ class MemoryTracker:
             'swap_percent': round(swap_percent_avg, 2),
         }
         
+        # Paging rates averaged over the samples that had them; the OOM kill rate adds up to a count
+        if self.rollup_paging_seconds > 0:
+            for key in VMSTAT_COUNTERS:
+                total = self.rollup_paging_sums.get(key)
+                if total is None:
+                    continue
+                if key == 'oom_kill':
+                    hour_data['oom_kills'] = round(total)
+                else:
+                    hour_data[f'{key}_per_sec'] = round(total / self.rollup_paging_seconds, 2)
+        self.rollup_paging_seconds = 0.0
+        self.rollup_paging_sums = {}
+        
         self.hourly_memory_data.append(hour_data)
         self.last_hourly_store = now
         
+        # Learn what is usual for this hour of the day
+        if self.anomaly_detector:
+            hour = (now - timedelta(minutes=30)).hour
+            self.anomaly_detector.add_seasonal('memory.percent', hour, memory_percent_avg)
+            self.anomaly_detector.add_seasonal('swap.percent', hour, swap_percent_avg)
+        
         # Log the data
         logger.debug(f"Stored hourly average: Memory {hour_data['memory_percent']}%, Swap {hour_data['swap_percent']}%")
         
@@ -243,10 +1034,11 @@ class MemoryTracker:
         if not self.daily_memory_data:
             return
             
+        import csv
         try:
-            filename = os.path.join(self.export_dir, 'memory_history.csv')
+            filename = self._export_path('memory_history.csv')
             with open(filename, 'w', newline='') as csvfile:
-                fieldnames = ['date', 'memory_percent', 'swap_percent']
+                fieldnames = ['date', 'memory_percent', 'swap_percent', *ROLLUP_PAGING_FIELDS]
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 
                 writer.writeheader()
@@ -272,6 +1064,7 @@ class MemoryTracker:
             return
             
         # Calculate daily averages
+        import statistics
         memory_percent_avg = statistics.mean([d['memory_percent'] for d in day_data])
         swap_percent_avg = statistics.mean([d['swap_percent'] for d in day_data])
         
@@ -281,6 +1074,10 @@ class MemoryTracker:
             'memory_percent': round(memory_percent_avg, 2),
             'swap_percent': round(swap_percent_avg, 2),
         }
+        for field in ROLLUP_PAGING_FIELDS:
+            values = [d[field] for d in day_data if field in d]
+            if values:
+                daily_avg[field] = sum(values) if field == 'oom_kills' else round(statistics.mean(values), 2)
         
         self.daily_memory_data.append(daily_avg)
         self.last_daily_store = now
@@ -330,17 +1127,134 @@ class MemoryTracker:
             logger.error(f"Error getting current memory data: {str(e)}")
             raise
     
-    def get_history(self):
-        """Get the historical memory usage data."""
-        if not self.memory_history:
-            return {'memory': [], 'swap': [], 'timestamps': []}
+    def get_history(self, with_times=False, max_points=None):
+        """
+        Get the historical memory usage data.
+        
+        Args:
+            with_times: If True, also include epoch 'times' and the history 'cursor'
+            max_points: Optional point budget; the series is reduced with LTTB
+                driven by RAM usage so peaks are preserved
+            
+        Returns:
+            Dictionary with memory, swap, paging and timestamp lists (paging
+            holds the rates per second of each sample, None where unknown)
+        """
+        with self.lock:
+            history = {
+                'memory': list(self.memory_history),
+                'swap': list(self.swap_history),
+                'paging': list(self.paging_history),
+                'timestamps': list(self.timestamps)
+            }
+            times = list(self.sample_times)
+            cursor = self.sample_count
+        
+        if max_points is not None and max_points < len(times):
+            indices = lttb_indices(times, [m['percent'] for m in history['memory']], max_points)
+            history = {key: take(values, indices) for key, values in history.items()}
+            times = take(times, indices)
+            
+        if with_times:
+            history['times'] = times
+            history['cursor'] = cursor
+        
+        return history
+    
+    def _get_history_since(self, cursor):
+        """
+        Get the history samples collected after a client cursor.
+        
+        Must be called with self.lock held.
+        
+        Args:
+            cursor: sample_count value returned to the client by a previous call
+            
+        Returns:
+            Dictionary with the new samples, the new cursor and a 'reset' flag
+            telling the client to drop what it holds and use the full window
+        """
+        new_samples = self.sample_count - cursor if cursor is not None else None
+        reset = new_samples is None or new_samples < 0 or new_samples > len(self.memory_history)
+        start = 0 if reset else len(self.memory_history) - new_samples
         
         return {
-            'memory': list(self.memory_history),
-            'swap': list(self.swap_history),
-            'timestamps': list(self.timestamps)
+            'memory': list(islice(self.memory_history, start, None)),
+            'swap': list(islice(self.swap_history, start, None)),
+            'paging': list(islice(self.paging_history, start, None)),
+            'timestamps': list(islice(self.timestamps, start, None)),
+            'times': list(islice(self.sample_times, start, None)),
+            'cursor': self.sample_count,
+            'reset': reset,
+            'max_samples': self.max_samples,
+            'window_size': len(self.memory_history),
+            # Clients trim their copy to the same window by time
+            'oldest_time': self.sample_times[0] if self.sample_times else None
         }
     
+    def get_batch(self, sections=None, cursors=None, active_alerts_only=False, top_n=10,
+                  group_by='name'):
+        """
+        Get several dashboard sections in one call, built from a single consistent sample.
+        
+        Args:
+            sections: Section names to include (defaults to all of BATCH_SECTIONS)
+            cursors: Dictionary of section name to the cursor returned by a previous
+                call; 'history' and 'alerts' then only return newer entries
+            active_alerts_only: If True, the alerts section holds only active alerts
+            top_n: Number of top processes to include
+            group_by: Dimension of the 'groups' section ('name', 'username' or 'tree')
+            
+        Returns:
+            Dictionary keyed by section name
+        """
+        sections = BATCH_SECTIONS if sections is None else sections
+        cursors = cursors or {}
+        
+        unknown = [s for s in sections if s not in BATCH_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown batch sections: {', '.join(unknown)}")
+        
+        batch = {}
+        with self.lock:
+            latest = self.latest_sample
+            
+            if 'history' in sections:
+                batch['history'] = self._get_history_since(cursors.get('history'))
+                
+            if 'alerts' in sections:
+                if active_alerts_only:
+                    alerts = list(self.active_alerts)
+                else:
+                    since = cursors.get('alerts') or 0
+                    alerts = [a for a in self.alert_history if a['id'] > since]
+                batch['alerts'] = {'alerts': alerts, 'cursor': self.alert_count}
+        
+        if 'current' in sections:
+            # Fall back to a live reading until the collector has produced a sample
+            batch['current'] = latest if latest else self.get_current_memory_data()
+            
+        if 'processes' in sections:
+            # Reuse the collector's sweep while it is fresh, it is the costly part
+            max_age = self.process_interval
+            sweep_time = self.latest_processes_time
+            if sweep_time and (datetime.now() - sweep_time).total_seconds() <= max_age \
+                    and len(self.latest_processes) >= top_n:
+                batch['processes'] = self.latest_processes[:top_n]
+            else:
+                batch['processes'] = self.get_process_memory_usage(top_n=top_n)
+                
+        if 'system-info' in sections:
+            batch['system-info'] = self.get_system_info()
+            
+        if 'groups' in sections:
+            batch['groups'] = self.get_process_groups(group_by=group_by, top_n=top_n)
+            
+        if 'cgroups' in sections:
+            batch['cgroups'] = self.get_cgroup_usage(top_n=top_n)
+            
+        return batch
+    
     def get_process_memory_usage(self, top_n=10):
         """
         Get memory usage by process, sorted by memory usage.
@@ -352,23 +1266,117 @@ class MemoryTracker:
             List of dictionaries with process info
         """
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'memory_percent']):
-                try:
-                    pinfo = proc.info
-                    pinfo['memory_mb'] = round(proc.memory_info().rss / (1024 * 1024), 2)  # Convert to MB
-                    processes.append(pinfo)
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
+            processes = self._scan_processes()
             
             # Sort by memory usage (descending) and take top N
             processes.sort(key=lambda x: x.get('memory_percent', 0), reverse=True)
-            return processes[:top_n]
+            processes = processes[:top_n]
+            
+            # Add the USS/PSS read by the collector, where available
+            if self.uss_collector:
+                self.uss_collector.annotate(processes, time.time())
+            return processes
             
         except Exception as e:
             logger.error(f"Error getting process memory data: {str(e)}")
             raise
 
+    def get_process_sweep_age(self):
+        """Seconds since the collector's last process sweep (None before the first)."""
+        sweep_time = self.latest_processes_time
+        return round((datetime.now() - sweep_time).total_seconds(), 1) if sweep_time else None
+
+    def _scan_processes(self):
+        """Read the memory usage of every process."""
+        processes = []
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'username', 'memory_percent']):
+            try:
+                pinfo = proc.info
+                pinfo['memory_mb'] = round(proc.memory_info().rss / (1024 * 1024), 2)  # Convert to MB
+                processes.append(pinfo)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return processes
+        
+    def get_process_groups(self, group_by='name', top_n=None):
+        """
+        Get memory usage aggregated by application, sorted by memory usage.
+        
+        Args:
+            group_by: 'name', 'username' or 'tree' (process trees of one program)
+            top_n: Number of top groups to return (all if None)
+            
+        Returns:
+            List of dictionaries with group name, memory and process count
+        """
+        groups = self.process_groups.get_groups(group_by, top_n=top_n)
+        total_mb = self.get_system_info()['total_memory_gb'] * 1024
+        for group in groups:
+            group['memory_percent'] = round(group['memory_mb'] / total_mb * 100, 2) if total_mb else 0
+        return groups
+    
+    def get_process_group_history(self, group_by, name):
+        """
+        Get the memory history of one process group.
+        
+        Returns:
+            Dictionary with times and memory_mb lists, or None if unknown
+        """
+        return self.process_groups.get_history(group_by, name)
+    
+    def get_process_group_leaks(self, group_by='name', min_growth_percent=20, min_time_seconds=120):
+        """
+        Identify process groups whose combined memory keeps growing.
+        
+        Args:
+            group_by: 'name', 'username' or 'tree'
+            min_growth_percent: Minimum percent growth to consider a leak
+            min_time_seconds: Minimum tracking time to consider valid
+            
+        Returns:
+            List of groups with possible memory leaks
+        """
+        return self.process_groups.get_possible_leaks(
+            group_by, datetime.now().timestamp(),
+            min_growth_percent=min_growth_percent,
+            min_time_seconds=min_time_seconds
+        )
+
+    def get_heavy_hitters(self, group_by='name', hours=24, start=None, end=None, top_n=10, name=None):
+        """
+        Get the process names or users that used the most memory over a time window.
+        
+        Weights are memory-seconds (MB times seconds), estimated from bounded
+        summaries: each comes with the most it may overestimate by.
+        
+        Args:
+            group_by: 'name' or 'username'
+            hours: Length of the window ending now (ignored if start is given)
+            start: Window start in epoch seconds
+            end: Window end in epoch seconds (default now)
+            top_n: Number of heavy hitters to return
+            name: Also estimate the memory-seconds of this name or user
+            
+        Returns:
+            Dictionary with the window covered, its total and the heavy hitters
+        """
+        if group_by not in HEAVY_HITTER_DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{group_by}', use one of {', '.join(HEAVY_HITTER_DIMENSIONS)}")
+        end = time.time() if end is None else end
+        if start is None:
+            if hours <= 0:
+                raise ValueError("hours must be positive")
+            start = end - hours * 3600
+        if start >= end:
+            raise ValueError("start must be before end")
+        if not self.heavy_hitters:
+            return {'enabled': False, 'by': group_by, 'hitters': []}
+        
+        with self.heavy_hitters_lock:
+            result = self.heavy_hitters.query(group_by, start, end, top_n=top_n, key=name)
+        result['enabled'] = True
+        return result
+        
     # New methods for memory leak detection
     def get_possible_memory_leaks(self, min_growth_percent=20, min_time_seconds=120):
         """
@@ -421,51 +1429,291 @@ class MemoryTracker:
         potential_leaks.sort(key=lambda x: x['growth_percent'], reverse=True)
         return potential_leaks
         
-    def get_system_info(self):
-        """Get system information including platform and memory configuration."""
-        memory = psutil.virtual_memory()
-        system_info = self.system_info.copy()
-        
-        # Add memory information
-        system_info.update({
-            'total_memory_gb': round(memory.total / (1024**3), 2),
-            'memory_technology': 'Virtual',
-            'python_version': platform.python_version(),
-            'psutil_version': psutil.__version__
+    def get_forecast(self, threshold=None, horizon_hours=168, top_n=5):
+        """
+        Forecast RAM and swap usage and project when they reach a threshold.
+        
+        The RAM and swap models are fitted to the hourly averages and cached until
+        the next hourly rollup; process projections are linear trends over the
+        process history, cached until the next process sweep.
+        
+        Args:
+            threshold: Usage percentage to project to (defaults to alert_threshold)
+            horizon_hours: How far ahead to project
+            top_n: Number of top processes to project
+            
+        Returns:
+            Dictionary with the 'memory', 'swap' and 'processes' forecasts
+        """
+        threshold = self.alert_threshold if threshold is None else threshold
+        if not 0 < horizon_hours <= 24 * 90:
+            raise ValueError("Forecast horizon must be between 1 and 2160 hours")
+        if top_n < 1:
+            raise ValueError("top_n must be at least 1")
+        now = datetime.now()
+        
+        with self.forecast_lock:
+            self.forecaster.update(self.hourly_memory_data)
+            memory = self.forecaster.forecast('memory_percent', threshold, now, horizon_hours)
+            swap = self.forecaster.forecast('swap_percent', threshold, now, horizon_hours)
+            processes = self._forecast_processes(top_n)
+            
+        return {
+            'generated': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'horizon_hours': horizon_hours,
+            'memory': memory,
+            'swap': swap,
+            'processes': processes
+        }
+    
+    def _forecast_processes(self, top_n):
+        """Project the growth of the top processes until they use up the available RAM."""
+        sweep_time, forecasts = self.process_forecast_cache
+        if sweep_time != self.latest_processes_time or forecasts is None:
+            forecasts = []
+            available_mb = self.latest_sample['memory']['available'] / (1024 * 1024) if self.latest_sample else None
+            
+            for proc in self.latest_processes:
+                history = self.process_history.get(proc['pid'])
+                if not history or len(history['timestamps']) < 12:
+                    continue
+                    
+                hours = [t.timestamp() / 3600 for t in history['timestamps']]
+                growth_per_hour, fitted_mb = linear_trend(hours, history['memory_usage'])
+                span_hours = hours[-1] - hours[0]
+                
+                # A few minutes of history say little about the next hours:
+                # only report an exhaustion close enough to the span it is fitted on
+                hours_to_exhaustion = None
+                if available_mb is not None and growth_per_hour > 0 \
+                        and span_hours * 3600 >= PROCESS_FORECAST_MIN_SPAN:
+                    exhaustion_hours = available_mb / growth_per_hour
+                    if exhaustion_hours <= span_hours * PROCESS_FORECAST_MAX_EXTRAPOLATION:
+                        hours_to_exhaustion = round(exhaustion_hours, 1)
+                    
+                forecasts.append({
+                    'pid': proc['pid'],
+                    'name': proc['name'],
+                    'memory_mb': proc['memory_mb'],
+                    'growth_mb_per_hour': round(growth_per_hour, 2),
+                    'hours_to_exhaustion': hours_to_exhaustion,
+                    'span_minutes': round(span_hours * 60, 1),
+                    'points': len(hours)
+                })
+                
+            forecasts.sort(key=lambda f: f['growth_mb_per_hour'], reverse=True)
+            self.process_forecast_cache = (self.latest_processes_time, forecasts)
+            
+        return forecasts[:top_n]
+        
+    def get_cgroup_usage(self, top_n=None):
+        """
+        Get memory usage by cgroup (container), sorted by memory usage.
+        
+        Args:
+            top_n: Number of top cgroups to return (all if None)
+            
+        Returns:
+            List of dictionaries with cgroup info, empty without cgroup v2
+        """
+        if not self.cgroup_collector:
+            return []
+        return self.cgroup_collector.get_cgroups(top_n=top_n)
+    
+    def get_cgroup_history(self, path):
+        """
+        Get the sampled memory history of one cgroup.
+        
+        Args:
+            path: cgroup path relative to the hierarchy root, e.g. '/system.slice'
+            
+        Returns:
+            Dictionary with times and memory_mb lists, or None if unknown
+        """
+        if not self.cgroup_collector:
+            return None
+        return self.cgroup_collector.get_history(path)
+    
+    def get_cgroup_leaks(self, min_growth_percent=20, min_time_seconds=120):
+        """
+        Identify cgroups that might be leaking memory.
+        
+        Args:
+            min_growth_percent: Minimum percent growth to consider a leak
+            min_time_seconds: Minimum tracking time to consider valid
+            
+        Returns:
+            List of cgroups with possible memory leaks
+        """
+        if not self.cgroup_collector:
+            return []
+        return self.cgroup_collector.get_possible_leaks(
+            datetime.now().timestamp(),
+            min_growth_percent=min_growth_percent,
+            min_time_seconds=min_time_seconds
+        )
+        
+    def get_sampling_info(self):
+        """
+        Get the state of the sampling rate.
+        
+        Returns:
+            Dictionary with the mode, the current interval and the memory pressure
+        """
+        monitor = self.pressure_monitor
+        under_pressure = self.last_pressure_time is not None and \
+            time.time() - self.last_pressure_time < PRESSURE_HOLD_SECONDS
+        return {
+            'adaptive': self.adaptive_sampling,
+            'interval': self.current_interval,
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+            'under_pressure': under_pressure,
+            'psi_available': bool(monitor and monitor.available),
+            'psi_triggers': bool(monitor and monitor.triggers),
+            'psi_some_avg10': monitor.some_avg10() if monitor and monitor.available else None
+        }
+        
+    def get_notification_stats(self):
+        """
+        Get the state of alert notification delivery.
+        
+        Returns:
+            Dictionary with the dispatcher counters (queued, coalesced, sent,
+            failed...) and those of each sink
+        """
+        if not self.alert_dispatcher:
+            return {'enabled': False}
+        return dict(self.alert_dispatcher.get_stats(), enabled=True)
+        
+    def get_paging_rates(self, top_n=10):
+        """
+        Get the page fault, swap and reclaim rates.
+        
+        Args:
+            top_n: Number of processes with the most major faults to include
+            
+        Returns:
+            Dictionary with the rates per second of the latest sample and
+            averaged over the alert window (None until known), the thrashing
+            threshold and the processes faulting most in the latest sweep
+        """
+        if top_n < 1:
+            raise ValueError("top_n must be at least 1")
+        with self.lock:
+            latest = self.paging_history[-1] if self.paging_history else None
+            timestamp = self.timestamps[-1] if self.timestamps else None
+        sweep_time = self.latest_processes_time
+        return {
+            'rates': latest,
+            'timestamp': timestamp,
+            'window_rates': self._paging_window_rates(),
+            'window_seconds': PAGING_WINDOW_SECONDS,
+            'thrashing_threshold': self.thrashing_threshold,
+            'processes': self.faulting_processes[:top_n],
+            'processes_time': sweep_time.strftime('%Y-%m-%d %H:%M:%S') if sweep_time else None
+        }
+        
+    def get_allocations(self, group_by='lineno', compare='previous', top_n=20):
+        """
+        Get the Python allocation sites of this process that changed most.
+        
+        Args:
+            group_by: 'filename', 'lineno' or 'traceback'
+            compare: Snapshot to diff the latest one against, 'previous' or
+                'start', or 'none' to rank sites by size
+            top_n: Number of sites to return
+            
+        Returns:
+            Dictionary with the tracing status and the allocation sites
+        """
+        from allocation_tracker import ALLOCATION_GROUPINGS, ALLOCATION_BASELINES
+        if group_by not in ALLOCATION_GROUPINGS:
+            raise ValueError(f"Unknown grouping '{group_by}', use one of {', '.join(ALLOCATION_GROUPINGS)}")
+        if compare not in ALLOCATION_BASELINES:
+            raise ValueError(f"Unknown baseline '{compare}', use one of {', '.join(ALLOCATION_BASELINES)}")
+        if not self.allocation_tracker:
+            return {'enabled': False, 'sites': []}
+        
+        result = self.allocation_tracker.get_status()
+        result.update({
+            'group_by': group_by,
+            'compare': compare,
+            'sites': self.allocation_tracker.get_top(group_by, compare, top_n)
         })
+        return result
+        
+    def get_allocation_history(self):
+        """Get the summaries (traced memory, tracing overhead) of recent allocation snapshots."""
+        if not self.allocation_tracker:
+            return []
+        return list(self.allocation_tracker.history)
         
-        return system_info
+    def get_system_info(self):
+        """Get system information including platform and memory configuration."""
+        if self.system_info is None:
+            import platform
+            self.system_info = {
+                'platform': platform.system(),
+                'platform_version': platform.version(),
+                'cpu_count': psutil.cpu_count(logical=True),
+                'hostname': platform.node(),
+                'total_memory_gb': round(psutil.virtual_memory().total / (1024**3), 2),
+                'memory_technology': 'Virtual',
+                'python_version': platform.python_version(),
+                'psutil_version': psutil.__version__
+            }
+        return self.system_info.copy()
         
-    def get_alerts(self, active_only=False):
+    def get_alerts(self, active_only=False, alert_type=None):
         """
         Get memory and swap usage alerts.
         
         Args:
             active_only: If True, returns only active alerts
+            alert_type: Only return alerts of this type (e.g. 'anomaly')
             
         Returns:
             List of alerts
         """
         if active_only:
-            return self.active_alerts
+            alerts = self.active_alerts
         else:
-            return list(self.alert_history)
+            alerts = list(self.alert_history)
+            
+        if alert_type:
+            alerts = [a for a in alerts if a['type'] == alert_type]
+        return alerts
             
-    def get_long_term_history(self, period='daily'):
+    def get_long_term_history(self, period='daily', max_points=None):
         """
         Get long-term memory usage history.
         
         Args:
             period: 'hourly' or 'daily'
+            max_points: Optional point budget; the series is reduced with LTTB
+                driven by RAM usage so peaks are preserved
             
         Returns:
             Dictionary with historical data
         """
         if period == 'hourly':
-            return self.hourly_memory_data
+            data = self.hourly_memory_data
         else:
-            return self.daily_memory_data
+            data = self.daily_memory_data
+            
+        if max_points is None or max_points >= len(data):
+            return data
+        
+        # Rollups are evenly spaced, so the position works as the x axis
+        indices = lttb_indices(range(len(data)), [d['memory_percent'] for d in data], max_points)
+        return take(data, indices)
 
+    def _export_path(self, filename):
+        """Path of an export file, creating the export directory on first use."""
+        os.makedirs(self.export_dir, exist_ok=True)
+        return os.path.join(self.export_dir, filename)
+        
     # This method was moved above to fix circular reference issues
     def export_current_state(self, format='json'):
         """
@@ -477,6 +1725,7 @@ class MemoryTracker:
         Returns:
             Path to the exported file
         """
+        import csv
         now = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = None
         
@@ -486,7 +1735,7 @@ class MemoryTracker:
             processes = self.get_process_memory_usage(top_n=30)
             
             if format == 'json':
-                filename = os.path.join(self.export_dir, f'memory_snapshot_{now}.json')
+                filename = self._export_path(f'memory_snapshot_{now}.json')
                 export_data = {
                     'system_info': self.get_system_info(),
                     'memory': memory_data,
@@ -499,7 +1748,7 @@ class MemoryTracker:
                     
             elif format == 'csv':
                 # Export memory data
-                mem_filename = os.path.join(self.export_dir, f'memory_snapshot_{now}.csv')
+                mem_filename = self._export_path(f'memory_snapshot_{now}.csv')
                 with open(mem_filename, 'w', newline='') as csvfile:
                     fieldnames = ['type', 'total', 'used', 'free', 'percent']
                     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -521,7 +1770,7 @@ class MemoryTracker:
                     })
                 
                 # Export process data
-                proc_filename = os.path.join(self.export_dir, f'processes_snapshot_{now}.csv')
+                proc_filename = self._export_path(f'processes_snapshot_{now}.csv')
                 with open(proc_filename, 'w', newline='') as csvfile:
                     fieldnames = ['pid', 'name', 'username', 'memory_percent', 'memory_mb']
                     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -538,7 +1787,7 @@ class MemoryTracker:
                 filename = f"{mem_filename} and {proc_filename}"
             else:
                 # Default to JSON if format is not supported
-                filename = os.path.join(self.export_dir, f'memory_snapshot_{now}.json')
+                filename = self._export_path(f'memory_snapshot_{now}.json')
                 export_data = {
                     'system_info': self.get_system_info(),
                     'memory': memory_data,
@@ -595,12 +1844,17 @@ class MemoryTracker:
         """
         Simulate memory paging based on current process data.
         
+        The page table and its page faults are simulated; the swap activity
+        and major fault rates are the ones measured by the collector.
+        
         Args:
             page_size_kb: Size of each page in KB (default 4KB)
             
         Returns:
             Dictionary with paging simulation data
         """
+        import random
+        
         # Get current memory data
         memory = psutil.virtual_memory()
         total_memory_kb = memory.total / 1024
@@ -677,40 +1931,53 @@ class MemoryTracker:
                     'fault_count': data['page_fault_count']
                 }
         
-        # Simulate page swapping (if swap is enabled and memory is under pressure)
+        # Swap activity, from the kernel's swap-in/out counters (pages of the system's size)
         swap = psutil.swap_memory()
-        swap_used_percent = swap.percent
         swap_used_kb = swap.used / 1024
+        scale = os.sysconf('SC_PAGE_SIZE') / 1024 / page_size_kb
+        rates = self.get_paging_rates(top_n=5)
+        latest = rates['rates'] or {}
         swap_status = {
-            'active': swap_used_percent > 0,  # True if swap is being used
+            'active': swap.percent > 0 or bool(latest.get('pswpin') or latest.get('pswpout')),
             'pages_swapped': int(swap_used_kb / page_size_kb),
+            'swap_in_per_sec': round(latest['pswpin'] * scale, 2) if 'pswpin' in latest else None,
+            'swap_out_per_sec': round(latest['pswpout'] * scale, 2) if 'pswpout' in latest else None,
+            'major_faults_per_sec': latest.get('pgmajfault'),
             'recently_swapped_in': [],
-            'recently_swapped_out': []
+            'recently_swapped_out': [],
+            'top_faulting': [{
+                'pid': proc['pid'],
+                'process_name': proc['name'],
+                'major_faults_per_sec': proc['major_faults_per_sec']
+            } for proc in rates['processes']]
         }
         
-        if swap_status['active']:
-            # Simulate recent swap activity
-            for _ in range(min(5, len(page_table))):
-                if page_table:
-                    random_pid = random.choice(list(page_table.keys()))
-                    process_name = page_table[random_pid]['process_name']
-                    page_count = random.randint(1, 5)
-                    
-                    # 70% chance of swap out, 30% chance of swap in
-                    if random.random() < 0.7:
-                        swap_status['recently_swapped_out'].append({
-                            'pid': random_pid,
-                            'process_name': process_name,
-                            'pages': page_count,
-                            'time': datetime.now().strftime('%H:%M:%S')
-                        })
-                    else:
-                        swap_status['recently_swapped_in'].append({
-                            'pid': random_pid,
-                            'process_name': process_name,
-                            'pages': page_count,
-                            'time': datetime.now().strftime('%H:%M:%S')
-                        })
+        # The latest seconds that swapped, newest first, with the pages they moved
+        with self.lock:
+            samples = zip(reversed(self.timestamps), reversed(self.sample_times), reversed(self.paging_history))
+            later = next(samples, None)
+            for timestamp, sample_time, paging in samples:
+                later_timestamp, later_time, later_paging = later
+                later = (timestamp, sample_time, paging)
+                if not later_paging:
+                    continue
+                for counter, recent in (('pswpin', swap_status['recently_swapped_in']),
+                                        ('pswpout', swap_status['recently_swapped_out'])):
+                    pages = later_paging.get(counter, 0) * (later_time - sample_time) * scale
+                    if not pages:
+                        continue
+                    if recent and recent[-1]['time'] == later_timestamp:
+                        recent[-1]['pages'] += pages
+                    elif len(recent) < 6:
+                        recent.append({'time': later_timestamp, 'pages': pages})
+                if len(swap_status['recently_swapped_in']) == len(swap_status['recently_swapped_out']) == 6:
+                    break
+        
+        # A sixth second was only started to know that the fifth was complete
+        for recent in (swap_status['recently_swapped_in'], swap_status['recently_swapped_out']):
+            del recent[5:]
+            for entry in recent:
+                entry['pages'] = round(entry['pages'])
         
         return {
             'page_size_kb': page_size_kb,
@@ -732,6 +1999,8 @@ class MemoryTracker:
         Returns:
             Dictionary with segmentation simulation data
         """
+        import random
+        
         # Get current memory data
         memory = psutil.virtual_memory()
         total_memory_mb = memory.total / (1024 * 1024)
@@ -750,7 +2019,15 @@ class MemoryTracker:
         allocated_memory = 0
         
         for proc in processes:
-            proc_memory_mb = proc['memory_mb']
+            # Split the private memory (USS) into segments and count the process's
+            # share of shared pages (PSS - USS) as shared libraries; RSS, which
+            # counts shared pages in full, until the USS collector has read it
+            if proc.get('uss_mb') is not None:
+                proc_memory_mb = proc['uss_mb']
+                shared_memory_mb = max(proc['pss_mb'] - proc['uss_mb'], 0)
+            else:
+                proc_memory_mb = proc['memory_mb']
+                shared_memory_mb = None
             
             # Skip processes with negligible memory
             if proc_memory_mb < 1:
@@ -814,7 +2091,10 @@ class MemoryTracker:
             
             # Add some shared libraries
             num_libraries = random.randint(1, 4)
-            shared_libs_memory = round(proc_memory_mb * random.uniform(0.05, 0.15), 2)
+            if shared_memory_mb is None:
+                shared_libs_memory = round(proc_memory_mb * random.uniform(0.05, 0.15), 2)
+            else:
+                shared_libs_memory = round(shared_memory_mb, 2)
             segments['shared_libraries'] = {
                 'count': num_libraries,
                 'size_mb': shared_libs_memory,
@@ -825,10 +2105,12 @@ class MemoryTracker:
             segmentation_table[proc['pid']] = {
                 'process_name': proc['name'],
                 'total_memory_mb': proc_memory_mb,
+                'memory_source': 'rss' if shared_memory_mb is None else 'uss',
                 'segments': segments
             }
             
-            allocated_memory += proc_memory_mb
+            # PSS adds up across processes, RSS counts shared pages once per process
+            allocated_memory += proc_memory_mb if shared_memory_mb is None else proc['pss_mb']
             
             # Simulate fragmentation
             base_address = 0
@@ -873,7 +2155,6 @@ class MemoryTracker:
         }
     
     def __del__(self):
-        """Cleanup when the object is destroyed."""
-        self.running = False
-        if hasattr(self, 'collector_thread') and self.collector_thread.is_alive():
-            self.collector_thread.join(1)  # Wait for thread to finish
+        """Cleanup when the object is destroyed (prefer calling stop())."""
+        if getattr(self, 'running', False) or getattr(self, 'history_ring', None):
+            self.stop(timeout=1)
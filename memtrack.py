@@ -0,0 +1,191 @@
+"""
+Command line interface to the tracker, without the web app.
+
+    memtrack record history.jsonl --interval 1 --duration 3600
+    memtrack record exports/memory_history.ring
+    memtrack tail --interval 0.5
+    memtrack top -n 15 --group name
+
+record writes one JSON line per sample, or mirrors the history into a ring
+file when the path ends in .ring (read it with python -m sample_ring). tail
+prints samples as they are collected and top prints the largest processes
+once. Each command builds a MemoryTracker with only what it needs (no anomaly
+detection, cgroup walk or USS reads unless asked for), so it starts in well
+under a second even on a busy host.
+
+Installed as the memtrack console script, or run with python -m memtrack.
+"""
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+
+from memory_tracker import MemoryTracker
+
+MB = 1024 * 1024
+
+
+def make_tracker(interval, **kwargs):
+    """Tracker for one command, with the expensive subsystems off unless asked for."""
+    options = {
+        'sample_interval': interval,
+        'cgroup_root': None,
+        'anomaly_detection': False,
+        'uss_budget': 0,
+        'track_processes': False,
+        'autostart': False,
+    }
+    options.update(kwargs)
+    return MemoryTracker(**options)
+
+
+def stop_event():
+    """Event set by SIGTERM and SIGINT, so a command stops between samples."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    return stop
+
+
+def format_sample(timestamp, memory, swap, paging=None):
+    """One line of text for a sample."""
+    line = (f"{timestamp}  mem {memory['percent']:5.1f}%  used {memory['used'] / MB:9.0f} MB  "
+            f"avail {memory['available'] / MB:9.0f} MB  swap {swap['percent']:5.1f}%")
+    if paging:
+        line += (f"  majflt/s {paging.get('pgmajfault', 0):7.1f}  "
+                 f"swpin/s {paging.get('pswpin', 0):7.1f}  swpout/s {paging.get('pswpout', 0):7.1f}")
+    return line
+
+
+def cell(value, width):
+    """Format a table cell, aligned left if width is negative."""
+    if isinstance(value, float):
+        value = f"{value:.1f}"
+    value = str('' if value is None else value)[:abs(width)]
+    return f"{value:<{-width}}" if width < 0 else f"{value:>{width}}"
+
+
+def record(args):
+    """Collect samples into a file until stopped."""
+    ring = args.path.endswith('.ring')
+    tracker = make_tracker(args.interval, history_file=args.path if ring else None)
+    stop = stop_event()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    output = None if ring else open(args.path, 'a')
+
+    samples = 0
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            tracker.collect_sample()
+            samples += 1
+            if output:
+                output.write(json.dumps({
+                    'time': tracker.sample_times[-1],
+                    'memory': tracker.memory_history[-1],
+                    'swap': tracker.swap_history[-1],
+                    'paging': tracker.paging_history[-1]
+                }) + '\n')
+                output.flush()
+            if args.count and samples >= args.count:
+                break
+            if deadline and started + args.interval >= deadline:
+                break
+            stop.wait(max(args.interval - (time.monotonic() - started), 0))
+    finally:
+        tracker.stop()
+        if output:
+            output.close()
+    print(f"Recorded {samples} samples to {args.path}", file=sys.stderr)
+
+
+def tail(args):
+    """Print samples as the collector thread takes them."""
+    stop = stop_event()
+    cursor = None
+    printed = 0
+    with make_tracker(args.interval) as tracker:
+        # Poll quickly until the first sample is in, then a few times per interval
+        while not stop.wait(min(args.interval / 2, 0.5) if printed else 0.002):
+            history = tracker.get_batch(sections=['history'], cursors={'history': cursor})['history']
+            cursor = history['cursor']
+            for timestamp, memory, swap, paging in zip(history['timestamps'], history['memory'],
+                                                       history['swap'], history['paging']):
+                if args.json:
+                    print(json.dumps({'timestamp': timestamp, 'memory': memory, 'swap': swap, 'paging': paging}),
+                          flush=True)
+                else:
+                    print(format_sample(timestamp, memory, swap, paging), flush=True)
+                printed += 1
+                if args.count and printed >= args.count:
+                    return
+
+
+def top(args):
+    """Print the largest processes or process groups once."""
+    if args.group:
+        tracker = make_tracker(1, track_processes=True)
+        tracker.collect_sample()
+        rows = tracker.get_process_groups(args.group, top_n=args.lines)
+        columns = [('name', 'GROUP', -32), ('count', 'PROCS', 6), ('memory_mb', 'RSS MB', 10),
+                   ('memory_percent', 'MEM %', 6)]
+    else:
+        tracker = make_tracker(1, uss_budget=args.uss_budget if args.uss else 0)
+        rows = tracker.get_process_memory_usage(top_n=args.lines)
+        if args.uss:
+            tracker.uss_collector.refresh(rows, time.time())
+            tracker.uss_collector.annotate(rows, time.time())
+        columns = [('pid', 'PID', 7), ('name', 'NAME', -24), ('username', 'USER', -12),
+                   ('memory_mb', 'RSS MB', 10), ('memory_percent', 'MEM %', 6)]
+        if args.uss:
+            columns += [('uss_mb', 'USS MB', 10), ('pss_mb', 'PSS MB', 10)]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(' '.join(cell(title, width) for _, title, width in columns).rstrip())
+    for row in rows:
+        print(' '.join(cell(row.get(key), width) for key, _, width in columns).rstrip())
+
+
+def main(argv=None):
+    """Record, tail or print the memory usage of this host."""
+    import argparse
+    parser = argparse.ArgumentParser(prog='memtrack', description=main.__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_record = commands.add_parser('record', help='collect samples into a file')
+    parser_record.add_argument('path', help='JSON lines file, or a ring file if it ends in .ring')
+    parser_record.add_argument('-i', '--interval', type=float, default=1, help='seconds between samples')
+    parser_record.add_argument('-d', '--duration', type=float, help='stop after this many seconds')
+    parser_record.add_argument('-c', '--count', type=int, help='stop after this many samples')
+    parser_record.set_defaults(handler=record)
+
+    parser_tail = commands.add_parser('tail', help='print samples as they are collected')
+    parser_tail.add_argument('-i', '--interval', type=float, default=1, help='seconds between samples')
+    parser_tail.add_argument('-c', '--count', type=int, help='stop after this many samples')
+    parser_tail.add_argument('--json', action='store_true', help='print JSON lines')
+    parser_tail.set_defaults(handler=tail)
+
+    parser_top = commands.add_parser('top', help='print the largest processes')
+    parser_top.add_argument('-n', '--lines', type=int, default=10, help='number of processes or groups')
+    parser_top.add_argument('-g', '--group', choices=('name', 'username', 'tree'),
+                            help='aggregate processes by program, user or process tree')
+    parser_top.add_argument('--uss', action='store_true', help='read the USS/PSS of the listed processes')
+    parser_top.add_argument('--uss-budget', type=float, default=0.5, help='seconds allowed for reading USS/PSS')
+    parser_top.add_argument('--json', action='store_true', help='print JSON')
+    parser_top.set_defaults(handler=top)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        args.handler(args)
+    except BrokenPipeError:
+        # Piped into head and the like
+        sys.stderr.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Memory pressure (PSI) monitoring for adaptive sampling.
+
+Linux reports pressure stall information in /proc/pressure/memory:
+
+    some avg10=0.00 avg60=0.00 avg300=0.00 total=0
+    full avg10=0.00 avg60=0.00 avg300=0.00 total=0
+
+Besides the averages, a process can register a trigger by writing
+"some <stall us> <window us>" to the file; poll() then reports POLLPRI as soon
+as tasks stalled on memory for longer than the threshold within the window.
+The collector sleeps in poll() on that trigger, so it wakes up the moment
+pressure starts instead of at its next tick.
+
+Registering triggers needs a kernel with PSI enabled and, for windows that are
+not a multiple of 2 seconds, CAP_SYS_RESOURCE. Without them the averages are
+still read when possible, and the caller falls back to plain sleeping.
+"""
+import logging
+import os
+import select
+import time
+
+logger = logging.getLogger(__name__)
+
+PSI_MEMORY_PATH = '/proc/pressure/memory'
+
+READ_SIZE = 256
+
+
+def parse_pressure(text):
+    """
+    Parse the content of a PSI file.
+
+    Returns:
+        Dictionary like {'some': {'avg10': 0.0, ..., 'total': 0}, 'full': {...}}
+    """
+    pressure = {}
+    for line in text.splitlines():
+        kind, _, fields = line.partition(' ')
+        values = {}
+        for field in fields.split():
+            key, _, value = field.partition('=')
+            values[key] = int(value) if key == 'total' else float(value)
+        pressure[kind] = values
+    return pressure
+
+
+class PressureMonitor:
+    def __init__(self, path=PSI_MEMORY_PATH, stall_us=100000, window_us=2000000):
+        """
+        Open a PSI file and register a trigger on it.
+
+        Args:
+            path: PSI file, /proc/pressure/memory or a cgroup's memory.pressure
+            stall_us: Stall time within the window that fires the trigger
+            window_us: Trigger window (a multiple of 2 s works unprivileged)
+        """
+        self.path = path
+        self.available = False  # Averages can be read
+        self.triggers = False   # A poll() trigger is registered
+        self._fd = None
+        self._trigger_fd = None
+        self._poll = None
+        self._wake_fds = None   # Pipe that interrupt() writes to, to end a wait() early
+
+        try:
+            self._fd = os.open(path, os.O_RDONLY)
+            self.available = True
+        except OSError as e:
+            logger.info(f"Memory pressure information unavailable ({path}): {str(e)}")
+            return
+
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            try:
+                os.write(fd, f'some {stall_us} {window_us}\0'.encode('ascii'))
+            except OSError:
+                os.close(fd)
+                raise
+            self._trigger_fd = fd
+            self._poll = select.poll()
+            self._poll.register(fd, select.POLLPRI)
+            self._wake_fds = os.pipe()
+            os.set_blocking(self._wake_fds[1], False)
+            self._poll.register(self._wake_fds[0], select.POLLIN)
+            self.triggers = True
+        except OSError as e:
+            logger.info(f"Memory pressure triggers unavailable ({path}), polling averages: {str(e)}")
+
+    def read(self):
+        """Read the current pressure averages, None if unavailable."""
+        if not self.available:
+            return None
+        try:
+            return parse_pressure(os.pread(self._fd, READ_SIZE, 0).decode('ascii'))
+        except (OSError, ValueError):
+            return None
+
+    def some_avg10(self):
+        """Share of the last 10 s in which some task stalled on memory, in percent."""
+        pressure = self.read()
+        return pressure['some']['avg10'] if pressure else 0.0
+
+    def wait(self, timeout):
+        """
+        Sleep for up to timeout seconds, waking up early if the trigger fires
+        or interrupt() is called.
+
+        Returns:
+            True if the trigger fired, False otherwise
+        """
+        if not self.triggers:
+            time.sleep(timeout)
+            return False
+
+        try:
+            events = self._poll.poll(timeout * 1000)
+        except InterruptedError:
+            return False
+
+        for fd, event in events:
+            if self._wake_fds and fd == self._wake_fds[0]:
+                os.read(fd, READ_SIZE)
+                return False
+            if event & select.POLLERR:
+                # The monitored file went away, stop using the trigger
+                logger.warning(f"Memory pressure trigger on {self.path} failed, falling back to sleeping")
+                self._close_trigger()
+                return False
+            if event & select.POLLPRI:
+                return True
+        return False
+
+    def interrupt(self):
+        """End a wait() in progress in another thread."""
+        if self._wake_fds:
+            try:
+                os.write(self._wake_fds[1], b'\0')
+            except OSError:
+                pass
+
+    def _close_trigger(self):
+        """Unregister the trigger."""
+        if self._trigger_fd is not None:
+            self._poll.unregister(self._trigger_fd)
+            os.close(self._trigger_fd)
+            self._trigger_fd = None
+        if self._wake_fds:
+            self._poll.unregister(self._wake_fds[0])
+            for fd in self._wake_fds:
+                os.close(fd)
+            self._wake_fds = None
+        self.triggers = False
+
+    def close(self):
+        """Unregister the trigger and close the PSI file."""
+        self._close_trigger()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.available = False
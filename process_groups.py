@@ -0,0 +1,241 @@
+"""
+Application-level grouping of processes.
+
+Multi-process applications (browsers, gunicorn, postgres) are aggregated by
+    * name:     process name
+    * username: owner of the process
+    * tree:     process tree, each process belonging to its topmost ancestor
+                with the same name (a gunicorn master and its workers)
+
+Groups are maintained incrementally: each sweep is diffed against the previous
+one, and only new, exited and resized processes change the group totals.
+Sizes are kept in integer hundredths of a MB, so the running sums never drift.
+"""
+from collections import deque
+
+GROUP_DIMENSIONS = ('name', 'username', 'tree')
+
+
+class GroupState:
+    """Running totals and history of one group."""
+
+    __slots__ = ('size', 'count', 'history', 'last_active')
+
+    def __init__(self, history_size):
+        self.size = 0    # Hundredths of a MB
+        self.count = 0
+        self.history = deque(maxlen=history_size)  # (epoch seconds, memory MB)
+        self.last_active = None
+
+
+class ProcessGroups:
+    def __init__(self, history_size=60, expire_seconds=300):
+        """
+        Initialize the grouping.
+
+        Args:
+            history_size: Number of sweeps kept in each group's history
+            expire_seconds: Keep groups without processes this long, in case they restart
+        """
+        self.history_size = history_size
+        self.expire_seconds = expire_seconds
+        self.processes = {}  # pid -> (size, group keys per dimension)
+        self.groups = {dimension: {} for dimension in GROUP_DIMENSIONS}
+
+    @staticmethod
+    def _group_keys(processes):
+        """Group keys of every process of a sweep, as {pid: (name, username, tree)}."""
+        by_pid = {p['pid']: p for p in processes}
+        roots = {}
+
+        def tree_root(pid):
+            # Climb while the parent runs the same program
+            chain = []
+            while pid not in roots:
+                chain.append(pid)
+                parent = by_pid.get(by_pid[pid].get('ppid'))
+                if parent is None or parent['pid'] in chain or parent['name'] != by_pid[pid]['name']:
+                    roots[pid] = pid
+                    break
+                pid = parent['pid']
+            root = roots[pid]
+            for p in chain:
+                roots[p] = root
+            return root
+
+        keys = {}
+        for proc in processes:
+            root = tree_root(proc['pid'])
+            keys[proc['pid']] = (
+                proc['name'] or '',
+                proc.get('username') or '',
+                f"{proc['name']} ({root})"
+            )
+        return keys
+
+    def _apply(self, keys, size, count, now):
+        """Add a size and process count delta to the groups of a process."""
+        for dimension, key in zip(GROUP_DIMENSIONS, keys):
+            groups = self.groups[dimension]
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = GroupState(self.history_size)
+            group.size += size
+            group.count += count
+            group.last_active = now
+
+    def update(self, processes, now):
+        """
+        Apply one process sweep.
+
+        Args:
+            processes: List of process dictionaries with pid, ppid, name,
+                username and memory_mb
+            now: Sweep time in epoch seconds
+        """
+        keys_by_pid = self._group_keys(processes)
+        previous = self.processes
+        current = {}
+
+        for proc in processes:
+            pid = proc['pid']
+            size = round(proc['memory_mb'] * 100)
+            keys = keys_by_pid[pid]
+            old = previous.pop(pid, None)
+            if old is None:
+                self._apply(keys, size, 1, now)
+            elif old[1] != keys:
+                # The process exec'd or was reparented
+                self._apply(old[1], -old[0], -1, now)
+                self._apply(keys, size, 1, now)
+            elif old[0] != size:
+                self._apply(keys, size - old[0], 0, now)
+            current[pid] = (size, keys)
+
+        # What is left of the previous sweep has exited
+        for size, keys in previous.values():
+            self._apply(keys, -size, -1, now)
+        self.processes = current
+
+        for groups in self.groups.values():
+            for key in list(groups):
+                group = groups[key]
+                if group.count:
+                    group.last_active = now
+                    group.history.append((now, group.size / 100))
+                elif now - group.last_active > self.expire_seconds:
+                    del groups[key]
+
+    def get_groups(self, dimension, top_n=None):
+        """
+        Get the groups of a dimension, largest first.
+
+        Args:
+            dimension: One of GROUP_DIMENSIONS
+            top_n: Number of groups to return (all if None)
+
+        Returns:
+            List of dictionaries with the group name, memory and process count
+        """
+        if dimension not in self.groups:
+            raise ValueError(f"Unknown group dimension '{dimension}', use one of {', '.join(GROUP_DIMENSIONS)}")
+
+        groups = [
+            {'name': key, 'memory_mb': round(group.size / 100, 2), 'count': group.count}
+            for key, group in self.groups[dimension].items() if group.count
+        ]
+        groups.sort(key=lambda g: g['memory_mb'], reverse=True)
+        return groups[:top_n] if top_n else groups
+
+    def get_history(self, dimension, key):
+        """Get the sweep history of one group, None if unknown."""
+        if dimension not in self.groups:
+            raise ValueError(f"Unknown group dimension '{dimension}', use one of {', '.join(GROUP_DIMENSIONS)}")
+
+        group = self.groups[dimension].get(key)
+        if group is None:
+            return None
+        return {
+            'name': key,
+            'times': [t for t, _ in group.history],
+            'memory_mb': [m for _, m in group.history]
+        }
+
+    def get_possible_leaks(self, dimension, now, min_growth_percent=20, min_time_seconds=120):
+        """
+        Identify groups whose combined memory grew over their history.
+
+        Args:
+            dimension: One of GROUP_DIMENSIONS
+            now: Current time in epoch seconds
+            min_growth_percent: Minimum percent growth to consider a leak
+            min_time_seconds: Minimum tracking time to consider valid
+
+        Returns:
+            List of groups with possible memory leaks
+        """
+        if dimension not in self.groups:
+            raise ValueError(f"Unknown group dimension '{dimension}', use one of {', '.join(GROUP_DIMENSIONS)}")
+
+        leaks = []
+        for key, group in self.groups[dimension].items():
+            if len(group.history) < 2:
+                continue
+
+            first_time, first_mb = group.history[0]
+            last_mb = group.history[-1][1]
+            if now - first_time < min_time_seconds or first_mb <= 0:
+                continue
+
+            growth_percent = (last_mb - first_mb) / first_mb * 100
+            if growth_percent >= min_growth_percent:
+                leaks.append({
+                    'name': key,
+                    'count': group.count,
+                    'start_memory_mb': round(first_mb, 2),
+                    'current_memory_mb': round(last_mb, 2),
+                    'growth_percent': round(growth_percent, 2),
+                    'tracking_seconds': round(now - first_time, 0)
+                })
+
+        leaks.sort(key=lambda x: x['growth_percent'], reverse=True)
+        return leaks
+
+    def export_state(self, top_n=100, max_points=20):
+        """
+        Export the largest groups of each dimension for other processes.
+
+        Args:
+            top_n: Groups exported per dimension
+            max_points: Maximum history points exported per group (thinned evenly)
+        """
+        state = {}
+        for dimension, groups in self.groups.items():
+            largest = sorted(groups.items(), key=lambda item: item[1].size, reverse=True)[:top_n]
+            exported = {}
+            for key, group in largest:
+                history = list(group.history)
+                if len(history) > max_points:
+                    step = len(history) / max_points
+                    history = [history[int(i * step)] for i in range(max_points - 1)] + [history[-1]]
+                exported[key] = {
+                    'size': group.size,
+                    'count': group.count,
+                    'last_active': group.last_active,
+                    'history': history
+                }
+            state[dimension] = exported
+        return state
+
+    def load_state(self, state):
+        """Replace the groups with those from export_state()."""
+        for dimension, exported in state.items():
+            groups = {}
+            for key, data in exported.items():
+                group = GroupState(self.history_size)
+                group.size = data['size']
+                group.count = data['count']
+                group.last_active = data['last_active']
+                group.history.extend(tuple(point) for point in data['history'])
+                groups[key] = group
+            self.groups[dimension] = groups
@@ -0,0 +1,314 @@
+"""
+Fixed-size ring of memory samples in a memory-mapped file.
+
+One writer process appends samples; any number of reader processes map the
+same file and read records in place, without parsing or copying the file.
+
+File layout (little-endian):
+    header (64 bytes)
+        magic          4s      b'MTRB'
+        version        uint16  SCHEMA_VERSION
+        record_size    uint16  bytes per record
+        capacity       uint32  number of record slots
+        reserved       uint32
+        write_index    uint64  total records ever written
+        seq            uint64  seqlock counter, odd while a write is in progress
+    records (capacity * record_size bytes)
+
+A record holds the sample time in epoch seconds followed by the RAM and swap
+fields of the history dictionaries, see MEMORY_FIELDS and SWAP_FIELDS, and the
+paging rates of the sample (per second, see vmstat.py), NaN where unknown.
+
+A record is complete before write_index moves past it, so the file survives a
+crash of the writer at any point and a restarted writer resumes in place.
+
+Print the latest samples of a ring while the tracker runs with:
+    python -m sample_ring exports/memory_history.ring -n 20 --follow
+"""
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import math
+import time
+from datetime import datetime
+
+from vmstat import VMSTAT_COUNTERS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MTRB'
+SCHEMA_VERSION = 2
+
+HEADER = struct.Struct('<4sHHIIQQ')
+HEADER_SIZE = 64
+WRITE_INDEX_OFFSET = 16
+SEQ_OFFSET = 24
+COUNTER = struct.Struct('<Q')
+
+MEMORY_FIELDS = ('total', 'available', 'used', 'free', 'buffers', 'cached', 'percent')
+SWAP_FIELDS = ('total', 'used', 'free', 'percent')
+PAGING_FIELDS = VMSTAT_COUNTERS
+RECORD = struct.Struct(f'<d6Qd3Qd{len(PAGING_FIELDS)}d')
+
+# Records of version 1 rings, before the paging rates; a writer migrates them
+RECORD_V1 = struct.Struct('<d6Qd3Qd')
+
+
+# Spins on an odd seq before a reader assumes the writer died mid-write
+STALE_WRITE_SPINS = 10000
+
+
+class SampleRing:
+    def __init__(self, path, capacity=None):
+        """
+        Open a sample ring file.
+
+        Args:
+            path: Path of the ring file
+            capacity: Number of record slots. If given, the ring is opened for
+                writing: an existing file is resumed (and resized if needed),
+                a version 1 one is migrated, an unreadable one is recreated. If None, an existing file is
+                opened read-only.
+
+        Raises:
+            BlockingIOError: Another process already writes to the ring
+            ValueError: Opening read-only and the file is not a sample ring
+        """
+        self.path = path
+        self.writable = capacity is not None
+
+        if self.writable:
+            self._open_for_writing(capacity)
+        else:
+            self._map_file('rb')
+            if not self._valid():
+                self.close()
+                raise ValueError(f"{path} is not a version {SCHEMA_VERSION} sample ring")
+
+        self.capacity = HEADER.unpack_from(self._map)[3]
+
+    def _map_file(self, mode):
+        """Open and map the ring file."""
+        self._file = open(self.path, mode)
+        if mode == 'rb':
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _valid(self, schema_version=SCHEMA_VERSION, record=RECORD):
+        """Check the header of the mapped file against a schema version."""
+        if len(self._map) < HEADER_SIZE:
+            return False
+        magic, version, record_size, capacity, _, _, _ = HEADER.unpack_from(self._map)
+        return (magic == MAGIC and version == schema_version and record_size == record.size
+                and len(self._map) >= HEADER_SIZE + capacity * record_size)
+
+    def _open_for_writing(self, capacity):
+        """Resume, resize or create the ring file and take the writer lock."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise
+
+        kept = []
+        index = 0
+        if os.fstat(fd).st_size:
+            self._map = mmap.mmap(fd, 0)
+            if self._valid():
+                old_capacity = HEADER.unpack_from(self._map)[3]
+                if old_capacity == capacity:
+                    # Resume in place; a seq left odd means the writer died
+                    # before advancing write_index, so the records are intact
+                    seq = COUNTER.unpack_from(self._map, SEQ_OFFSET)[0]
+                    if seq % 2:
+                        COUNTER.pack_into(self._map, SEQ_OFFSET, seq + 1)
+                    return
+
+                self.capacity = old_capacity
+                index, kept = self._read_records(0, capacity)
+                logger.info(f"Resizing {self.path} from {old_capacity} to {capacity} samples")
+            elif self._valid(1, RECORD_V1):
+                index, kept = self._read_v1_records(capacity)
+                logger.info(f"Migrating {self.path} to a version {SCHEMA_VERSION} sample ring")
+            else:
+                logger.warning(f"{self.path} is not a version {SCHEMA_VERSION} sample ring, recreating it")
+            self._map.close()
+
+        # Create the file, carrying over the latest records when resizing
+        os.ftruncate(fd, 0)
+        os.ftruncate(fd, HEADER_SIZE + capacity * RECORD.size)
+        os.pwrite(fd, HEADER.pack(MAGIC, SCHEMA_VERSION, RECORD.size, capacity, 0, 0, 0), 0)
+        self._map = mmap.mmap(fd, 0)
+        self.capacity = capacity
+
+        start = index - len(kept)
+        for i, record in enumerate(kept, start):
+            RECORD.pack_into(self._map, HEADER_SIZE + (i % capacity) * RECORD.size, *record)
+        COUNTER.pack_into(self._map, WRITE_INDEX_OFFSET, index)
+
+    def _read_v1_records(self, limit):
+        """
+        Read the latest records of a version 1 ring, with unknown paging rates.
+
+        Only called by the writer holding the lock, so no write is in progress;
+        a seq left odd means the writer died before advancing write_index.
+        """
+        capacity = HEADER.unpack_from(self._map)[3]
+        index = COUNTER.unpack_from(self._map, WRITE_INDEX_OFFSET)[0]
+        unknown = (math.nan,) * len(PAGING_FIELDS)
+        return index, [
+            RECORD_V1.unpack_from(self._map, HEADER_SIZE + (i % capacity) * RECORD_V1.size) + unknown
+            for i in range(max(0, index - capacity, index - limit), index)
+        ]
+
+    @property
+    def write_index(self):
+        """Total number of records ever written to the ring."""
+        return COUNTER.unpack_from(self._map, WRITE_INDEX_OFFSET)[0]
+
+    def append(self, sample_time, memory, swap, paging=None):
+        """
+        Append one sample, overwriting the oldest record when full.
+
+        Args:
+            sample_time: Sample time in epoch seconds
+            memory: RAM history dictionary
+            swap: Swap history dictionary
+            paging: Paging rates of the sample, or None if unknown
+        """
+        paging = paging or {}
+        index = self.write_index
+        seq = COUNTER.unpack_from(self._map, SEQ_OFFSET)[0]
+
+        COUNTER.pack_into(self._map, SEQ_OFFSET, seq + 1)
+        RECORD.pack_into(
+            self._map, HEADER_SIZE + (index % self.capacity) * RECORD.size,
+            sample_time,
+            *(memory[f] for f in MEMORY_FIELDS),
+            *(swap[f] for f in SWAP_FIELDS),
+            *(paging.get(f, math.nan) for f in PAGING_FIELDS)
+        )
+        COUNTER.pack_into(self._map, WRITE_INDEX_OFFSET, index + 1)
+        COUNTER.pack_into(self._map, SEQ_OFFSET, seq + 2)
+
+    def _read_records(self, since, limit):
+        """Read raw records consistently; returns (write_index, list of tuples)."""
+        spins = 0
+        while True:
+            seq = COUNTER.unpack_from(self._map, SEQ_OFFSET)[0]
+            stale = False
+            if seq % 2:
+                spins += 1
+                if spins < STALE_WRITE_SPINS:
+                    # A write is in progress, it only takes microseconds
+                    time.sleep(0)
+                    continue
+                stale = True
+
+            index = self.write_index
+            start = max(since, index - self.capacity)
+            if stale:
+                # The slot after the newest record may be half written
+                start = max(start, index - self.capacity + 1)
+            if limit is not None:
+                start = max(start, index - limit)
+            records = [
+                RECORD.unpack_from(self._map, HEADER_SIZE + (i % self.capacity) * RECORD.size)
+                for i in range(start, index)
+            ]
+
+            if stale or COUNTER.unpack_from(self._map, SEQ_OFFSET)[0] == seq:
+                return index, records
+
+    def read_since(self, since=0, limit=None):
+        """
+        Read the records written after a given write index.
+
+        Args:
+            since: Write index already seen by the caller
+            limit: Maximum number of (most recent) records to return
+
+        Returns:
+            Tuple of (write_index, list of (time, memory dict, swap dict,
+            paging dict or None))
+        """
+        index, records = self._read_records(since, limit)
+
+        samples = []
+        swap_start = 1 + len(MEMORY_FIELDS)
+        paging_start = swap_start + len(SWAP_FIELDS)
+        for record in records:
+            memory = dict(zip(MEMORY_FIELDS, record[1:swap_start]))
+            swap = dict(zip(SWAP_FIELDS, record[swap_start:paging_start]))
+            paging = {f: value for f, value in zip(PAGING_FIELDS, record[paging_start:]) if not math.isnan(value)}
+            samples.append((record[0], memory, swap, paging or None))
+        return index, samples
+
+    def flush(self):
+        """Write dirty pages to disk so the ring also survives an OS crash."""
+        if self.writable and not self._map.closed:
+            self._map.flush()
+
+    def close(self):
+        """Unmap and close the ring file."""
+        if self._map.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._file.close()
+
+
+def main():
+    """Print the latest samples of a ring file, optionally following new ones."""
+    import argparse
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('path', help='ring file, e.g. exports/memory_history.ring')
+    parser.add_argument('-n', '--lines', type=int, default=10, help='number of latest samples')
+    parser.add_argument('-f', '--follow', action='store_true', help='keep printing new samples')
+    parser.add_argument('--json', action='store_true', help='print one JSON object per sample')
+    args = parser.parse_args()
+
+    try:
+        ring = SampleRing(args.path)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(str(e))
+
+    def show(samples):
+        for sample_time, memory, swap, paging in samples:
+            if args.json:
+                print(json.dumps({'time': sample_time, 'memory': memory, 'swap': swap, 'paging': paging}))
+            else:
+                paging = paging or {}
+                print(f"{datetime.fromtimestamp(sample_time):%Y-%m-%d %H:%M:%S}  "
+                      f"RAM {memory['percent']:5.1f}%  used {memory['used'] / 1024**3:7.2f} GB  "
+                      f"available {memory['available'] / 1024**3:7.2f} GB  "
+                      f"swap {swap['percent']:5.1f}%  "
+                      f"majflt/s {paging.get('pgmajfault', math.nan):7.1f}  "
+                      f"swpin/s {paging.get('pswpin', math.nan):7.1f}  "
+                      f"swpout/s {paging.get('pswpout', math.nan):7.1f}")
+        sys.stdout.flush()
+
+    index, samples = ring.read_since(0, limit=args.lines)
+    show(samples)
+
+    try:
+        while args.follow:
+            time.sleep(0.2)
+            if ring.write_index != index:
+                index, samples = ring.read_since(index)
+                show(samples)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+if __name__ == '__main__':
+    main()
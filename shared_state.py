@@ -0,0 +1,550 @@
+"""
+Production serving mode: one collector process shared by many web workers.
+
+The collector process owns the only sampling MemoryTracker and publishes
+    * every sample into a SampleRing (see sample_ring.py), and
+    * the low-rate state (alerts, rollups, process history) as JSON in
+      seqlocked state segments, one per section, so the slow sections are
+      only serialized and parsed when they change,
+all memory-mapped files in a shared directory (/dev/shm when available).
+
+Web workers use SharedMemoryTracker, which never samples the system itself.
+It maps both files and reads new records in place before answering a request,
+so every worker serves the same history and the same history cursors. Process
+lists come from the collector's last sweep too, with its age in seconds.
+
+Run the collector standalone with:
+    python -m shared_state /dev/shm/memtrack
+"""
+import json
+import logging
+import mmap
+import os
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from config import TRACKER_CONFIG
+from memory_tracker import MemoryTracker, SHARED_STATE_SECTIONS
+from sample_ring import SampleRing, STALE_WRITE_SPINS
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR_ENV = 'MEMTRACK_SHARED_DIR'
+RING_FILENAME = 'memtrack.ring'
+STATE_FILENAME = 'memtrack.state'
+
+STATE_MAGIC = b'MTSS'
+STATE_VERSION = 1
+STATE_HEADER = struct.Struct('<4sHHIIQQ')  # magic, version, reserved, capacity, reserved, seq, length
+STATE_HEADER_SIZE = 64
+STATE_SEQ = struct.Struct('<QQ')          # seq, length
+STATE_SEQ_OFFSET = 16
+STATE_CAPACITY = 4 * 1024 * 1024
+STATE_MAX_CAPACITY = 256 * 1024 * 1024
+STATE_CAPACITY_FIELD = struct.Struct('<I')
+STATE_CAPACITY_OFFSET = 8
+
+
+def state_filename(section):
+    """File name of the segment of a state section."""
+    return STATE_FILENAME if section == 'state' else f'memtrack.{section}.state'
+
+
+class StateSegment:
+    def __init__(self, path, create=False, capacity=STATE_CAPACITY):
+        """
+        Open a state segment file.
+
+        Args:
+            path: Path of the segment file
+            create: If True, create the file for writing
+            capacity: Initial payload capacity in bytes when creating; the
+                segment grows for larger payloads, and never shrinks
+        """
+        if create:
+            # Never truncate: readers of a restarted collector still map the file
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                header = os.pread(fd, STATE_HEADER.size, 0)
+                seq = 0
+                if len(header) == STATE_HEADER.size:
+                    magic, version, _, old_capacity, _, seq, _ = STATE_HEADER.unpack(header)
+                    if magic != STATE_MAGIC or version != STATE_VERSION:
+                        seq = 0
+                    else:
+                        # Readers may map the whole grown segment
+                        capacity = max(capacity, old_capacity)
+                # Resume after the previous writer's last seq, even if it died mid-write
+                seq += seq % 2
+                os.ftruncate(fd, STATE_HEADER_SIZE + capacity)
+                os.pwrite(fd, STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, 0, capacity, 0, seq, 0), 0)
+            finally:
+                os.close(fd)
+            self._file = open(path, 'r+b')
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        else:
+            self._file = open(path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.capacity, _, _, _ = STATE_HEADER.unpack_from(self._map)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {STATE_VERSION} state segment")
+
+    def _grow(self, size):
+        """
+        Grow the segment to hold a payload of size bytes.
+
+        Returns:
+            False if that would exceed STATE_MAX_CAPACITY
+        """
+        capacity = max(self.capacity * 2, size)
+        if capacity > STATE_MAX_CAPACITY:
+            return False
+
+        # Readers remap when a payload reaches beyond their mapping
+        self._map.close()
+        os.ftruncate(self._file.fileno(), STATE_HEADER_SIZE + capacity)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        STATE_CAPACITY_FIELD.pack_into(self._map, STATE_CAPACITY_OFFSET, capacity)
+        self.capacity = capacity
+        return True
+
+    def write(self, payload):
+        """
+        Publish a new payload (bytes), growing the segment if needed.
+
+        Returns:
+            False if the payload exceeds STATE_MAX_CAPACITY and was not published
+        """
+        if len(payload) > self.capacity and not self._grow(len(payload)):
+            logger.error(f"Shared state of {len(payload)} bytes exceeds the "
+                         f"{STATE_MAX_CAPACITY} byte limit of a segment")
+            return False
+
+        seq, _ = STATE_SEQ.unpack_from(self._map, STATE_SEQ_OFFSET)
+        STATE_SEQ.pack_into(self._map, STATE_SEQ_OFFSET, seq + 1, 0)
+        self._map[STATE_HEADER_SIZE:STATE_HEADER_SIZE + len(payload)] = payload
+        STATE_SEQ.pack_into(self._map, STATE_SEQ_OFFSET, seq + 2, len(payload))
+        return True
+
+    def read_if_changed(self, last_seq):
+        """
+        Read the payload if it changed since last_seq.
+
+        If the writer died mid-write, the payload stays unreadable until a
+        restarted writer publishes again; meanwhile last_seq is returned, so
+        the caller keeps its last good state.
+
+        Returns:
+            Tuple of (seq, payload bytes or None when unchanged, empty or
+            being written by a dead writer)
+        """
+        spins = 0
+        while True:
+            seq, length = STATE_SEQ.unpack_from(self._map, STATE_SEQ_OFFSET)
+            if seq == last_seq or seq == 0:
+                return seq, None
+            if seq % 2:
+                spins += 1
+                if spins < STALE_WRITE_SPINS:
+                    # A write is in progress, it only takes a few milliseconds
+                    time.sleep(0)
+                    continue
+                return last_seq, None
+
+            if STATE_HEADER_SIZE + length > len(self._map):
+                # The writer grew the segment
+                self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.capacity = STATE_CAPACITY_FIELD.unpack_from(self._map, STATE_CAPACITY_OFFSET)[0]
+                continue
+
+            payload = self._map[STATE_HEADER_SIZE:STATE_HEADER_SIZE + length]
+            if STATE_SEQ.unpack_from(self._map, STATE_SEQ_OFFSET)[0] == seq:
+                return seq, payload
+
+    def close(self):
+        """Unmap and close the segment file."""
+        self._map.close()
+        self._file.close()
+
+
+class SharedStatePublisher:
+    def __init__(self, directory, capacity, state_interval=5, ring_path=None):
+        """
+        Create the shared files a collector publishes into.
+
+        Args:
+            directory: Shared directory for the ring and state files
+            capacity: Number of samples kept in the ring
+            state_interval: Seconds between state publications when no alert changed
+            ring_path: Ring file the tracker already writes (its history_file);
+                it is linked into the directory instead of creating a second ring
+        """
+        os.makedirs(directory, exist_ok=True)
+        shared_ring_path = os.path.join(directory, RING_FILENAME)
+        if ring_path:
+            if os.path.lexists(shared_ring_path):
+                os.remove(shared_ring_path)
+            os.symlink(os.path.abspath(ring_path), shared_ring_path)
+            self.ring = None
+        else:
+            self.ring = SampleRing(shared_ring_path, capacity=capacity)
+        # The main segment last: its file tells that the collector is up
+        self.segments = {}
+        for section in reversed(SHARED_STATE_SECTIONS):
+            self.segments[section] = StateSegment(os.path.join(directory, state_filename(section)), create=True)
+        self.state_interval = state_interval
+        self._last_state_time = None
+        self._last_alerts_key = None
+        self._section_keys = {}
+
+    def publish_sample(self, sample_time, memory, swap, paging=None):
+        """Publish one sample to the ring (the tracker writes a linked ring itself)."""
+        if self.ring:
+            self.ring.append(sample_time, memory, swap, paging)
+
+    def publish_state(self, tracker, now):
+        """
+        Publish the tracker state if alerts changed or it is due.
+
+        Each section is serialized only when its change key moved since it
+        was last published.
+        """
+        alerts_key = (tracker.alert_count, len(tracker.active_alerts))
+        due = self._last_state_time is None or \
+            (now - self._last_state_time).total_seconds() >= self.state_interval
+        if not due and alerts_key == self._last_alerts_key:
+            return
+
+        for section, segment in self.segments.items():
+            key = tracker._shared_state_key(section, now)
+            if key is not None and self._section_keys.get(section) == key:
+                continue
+            payload = json.dumps(tracker._export_shared_state(section), default=str).encode('utf-8')
+            if segment.write(payload):
+                self._section_keys[section] = key
+        self._last_state_time = now
+        self._last_alerts_key = alerts_key
+
+    def close(self):
+        """Close the shared files."""
+        if self.ring:
+            self.ring.close()
+        for segment in self.segments.values():
+            segment.close()
+
+
+class SharedMemoryTracker(MemoryTracker):
+    """MemoryTracker for web workers that reads what a collector process publishes."""
+
+    def __init__(self, directory, **kwargs):
+        """
+        Initialize a reader for a shared directory.
+
+        Args:
+            directory: Shared directory written by the collector process
+            **kwargs: MemoryTracker arguments (the collector thread never starts,
+                and the history file and paging counters are left to the collector)
+
+        Raises:
+            ValueError: allocation_tracking is set; workers never run the
+                collector loop that takes the snapshots, and the collector
+                process would only trace itself
+        """
+        if kwargs.get('allocation_tracking'):
+            raise ValueError("allocation_tracking is not supported with a shared collector process, "
+                             "turn it off in the tracker configuration")
+        kwargs['autostart'] = False
+        kwargs.pop('history_file', None)
+        kwargs['vmstat_path'] = None
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.ring = None
+        self.state_segments = {}
+        self._state_seqs = {}
+        self._sync_lock = threading.Lock()
+
+    def _attach(self):
+        """Map the shared files once the collector has created them."""
+        try:
+            if self.ring is None:
+                self.ring = SampleRing(os.path.join(self.directory, RING_FILENAME))
+            for section in SHARED_STATE_SECTIONS:
+                if section not in self.state_segments:
+                    self.state_segments[section] = StateSegment(
+                        os.path.join(self.directory, state_filename(section)))
+        except (FileNotFoundError, ValueError):
+            return False
+        return True
+
+    def sync(self):
+        """Pull new samples and state published by the collector."""
+        with self._sync_lock:
+            if not self._attach():
+                return
+
+            index, samples = self.ring.read_since(self.sample_count, limit=self.max_samples)
+            if index < self.sample_count:
+                # The collector restarted with a fresh ring
+                with self.lock:
+                    self.memory_history.clear()
+                    self.swap_history.clear()
+                    self.paging_history.clear()
+                    self.timestamps.clear()
+                    self.sample_times.clear()
+                index, samples = self.ring.read_since(0, limit=self.max_samples)
+
+            for sample_time, memory, swap, paging in samples:
+                self._append_sample(datetime.fromtimestamp(sample_time), memory, swap, paging)
+            with self.lock:
+                self.sample_count = index
+
+            # The main section first, it creates the cgroups the histories belong to
+            for section in SHARED_STATE_SECTIONS:
+                seq, payload = self.state_segments[section].read_if_changed(self._state_seqs.get(section))
+                self._state_seqs[section] = seq
+                if payload:
+                    self._import_shared_state(json.loads(payload), section)
+
+    def get_current_memory_data(self):
+        self.sync()
+        return self.latest_sample or super().get_current_memory_data()
+
+    def get_history(self, *args, **kwargs):
+        self.sync()
+        return super().get_history(*args, **kwargs)
+
+    def get_batch(self, *args, **kwargs):
+        self.sync()
+        batch = super().get_batch(*args, **kwargs)
+        if 'processes' in batch:
+            batch['processes-age'] = self.get_process_sweep_age()
+        return batch
+
+    def get_process_memory_usage(self, top_n=10):
+        """Serve the top processes of the collector's last sweep, however old."""
+        self.sync()
+        return self.process_ranking[:top_n]
+
+    def get_alerts(self, *args, **kwargs):
+        self.sync()
+        return super().get_alerts(*args, **kwargs)
+
+    def get_process_groups(self, *args, **kwargs):
+        self.sync()
+        return super().get_process_groups(*args, **kwargs)
+
+    def get_process_group_history(self, *args, **kwargs):
+        self.sync()
+        return super().get_process_group_history(*args, **kwargs)
+
+    def get_process_group_leaks(self, *args, **kwargs):
+        self.sync()
+        return super().get_process_group_leaks(*args, **kwargs)
+
+    def get_heavy_hitters(self, *args, **kwargs):
+        self.sync()
+        return super().get_heavy_hitters(*args, **kwargs)
+
+    def get_forecast(self, *args, **kwargs):
+        self.sync()
+        return super().get_forecast(*args, **kwargs)
+
+    def get_sampling_info(self, *args, **kwargs):
+        self.sync()
+        return super().get_sampling_info(*args, **kwargs)
+
+    def get_long_term_history(self, *args, **kwargs):
+        self.sync()
+        return super().get_long_term_history(*args, **kwargs)
+
+    def get_possible_memory_leaks(self, *args, **kwargs):
+        self.sync()
+        return super().get_possible_memory_leaks(*args, **kwargs)
+
+    def get_cgroup_usage(self, *args, **kwargs):
+        self.sync()
+        return super().get_cgroup_usage(*args, **kwargs)
+
+    def get_cgroup_history(self, *args, **kwargs):
+        self.sync()
+        return super().get_cgroup_history(*args, **kwargs)
+
+    def get_cgroup_leaks(self, *args, **kwargs):
+        self.sync()
+        return super().get_cgroup_leaks(*args, **kwargs)
+
+    def get_notification_stats(self, *args, **kwargs):
+        self.sync()
+        return super().get_notification_stats(*args, **kwargs)
+
+    def get_paging_rates(self, *args, **kwargs):
+        self.sync()
+        return super().get_paging_rates(*args, **kwargs)
+
+    def simulate_paging(self, *args, **kwargs):
+        self.sync()
+        return super().simulate_paging(*args, **kwargs)
+
+
+def default_shared_dir():
+    """Create a private shared directory, in /dev/shm when available."""
+    parent = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    return tempfile.mkdtemp(prefix='memtrack-', dir=parent)
+
+
+class CollectorSupervisor:
+    def __init__(self, directory, command=None, check_interval=1, max_restart_delay=60):
+        """
+        Run the collector process and restart it whenever it exits.
+
+        Args:
+            directory: Shared directory the collector publishes into
+            command: Collector command line (python -m shared_state <directory> by default)
+            check_interval: Seconds between checks of the process
+            max_restart_delay: Longest wait before restarting a collector that
+                keeps exiting; the wait doubles with each quick exit
+        """
+        self.shared_dir = directory
+        self.command = command or [sys.executable, '-m', 'shared_state', directory]
+        self.check_interval = check_interval
+        self.max_restart_delay = max_restart_delay
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def _spawn(self):
+        self.process = subprocess.Popen(self.command, cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.started_at = time.monotonic()
+
+    def start(self, timeout=10):
+        """
+        Start the collector and wait until it has created its files.
+
+        Raises:
+            RuntimeError: The collector exited or did not create its files in time
+        """
+        self._spawn()
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(os.path.join(self.shared_dir, STATE_FILENAME)):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.process.kill()
+                raise RuntimeError("Memory collector process failed to start")
+            time.sleep(0.05)
+
+        self.thread = threading.Thread(target=self._watch, name='collector-supervisor')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _watch(self):
+        """Restart the collector when it exits, backing off if it keeps exiting."""
+        delay = self.check_interval
+        while not self.stopping.wait(self.check_interval):
+            code = self.process.poll()
+            if code is None:
+                continue
+            lived = time.monotonic() - self.started_at
+            delay = self.check_interval if lived > self.max_restart_delay else \
+                min(delay * 2, self.max_restart_delay)
+            logger.error(f"Memory collector process {self.process.pid} exited with code {code}, "
+                         f"restarting it in {delay:.0f}s")
+            if self.stopping.wait(delay):
+                return
+            try:
+                self._spawn()
+                self.restarts += 1
+            except OSError as e:
+                logger.error(f"Error restarting the memory collector process: {str(e)}")
+
+    def stop(self, timeout=5):
+        """Stop supervising, then stop the collector."""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def start_collector_process(directory=None, timeout=10):
+    """
+    Start the collector in its own interpreter and point workers at it.
+
+    The directory is exported through MEMTRACK_SHARED_DIR, so processes forked
+    afterwards (e.g. gunicorn workers) pick it up. If the variable is already
+    set, an external collector is assumed and nothing is started. The
+    collector is restarted if it exits; workers keep serving the last
+    published state meanwhile.
+
+    Args:
+        directory: Shared directory, a private temporary one by default
+        timeout: Seconds to wait for the collector to create its files
+
+    Returns:
+        The CollectorSupervisor, or None if an external collector is used
+    """
+    if os.environ.get(SHARED_DIR_ENV):
+        logger.info(f"Using external collector in {os.environ[SHARED_DIR_ENV]}")
+        return None
+
+    supervisor = CollectorSupervisor(directory or default_shared_dir())
+    supervisor.start(timeout)
+    os.environ[SHARED_DIR_ENV] = supervisor.shared_dir
+
+    logger.info(f"Started memory collector process {supervisor.pid} publishing to {supervisor.shared_dir}")
+    return supervisor
+
+
+def stop_collector_process(supervisor, timeout=5):
+    """Stop a collector started by start_collector_process and remove its files."""
+    if supervisor is None:
+        return
+
+    supervisor.stop(timeout)
+    shutil.rmtree(supervisor.shared_dir, ignore_errors=True)
+
+
+def run_collector(directory):
+    """Run the single sampling tracker until SIGTERM/SIGINT."""
+    tracker = MemoryTracker(**TRACKER_CONFIG, autostart=False)
+    if tracker.history_file:
+        # Readers map the ring file, so it has to exist before the first sample
+        tracker._open_history_file(tracker.history_file)
+    ring_path = tracker.history_ring.path if tracker.history_ring else None
+    tracker.publisher = SharedStatePublisher(directory, capacity=tracker.max_samples,
+                                             ring_path=ring_path)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    tracker.start()
+    while not stop.wait(1):
+        pass
+
+    tracker.stop()
+    tracker.publisher.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    run_collector(sys.argv[1] if len(sys.argv) > 1 else default_shared_dir())
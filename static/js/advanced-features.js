@@ -187,6 +187,81 @@ function checkMemoryLeaks() {
         });
 }
 
+/**
+ * Fetch the Python allocation sites that changed most between snapshots
+ */
+function fetchAllocations() {
+    const groupBy = document.getElementById('allocation-group-by').value;
+    const compare = document.getElementById('allocation-compare').value;
+    const tableBody = document.getElementById('allocations-table-body');
+    const status = document.getElementById('allocations-status');
+    
+    if (!tableBody) return;
+    
+    const showMessage = (message, className = '') => {
+        tableBody.innerHTML = `<tr><td colspan="5" class="text-center ${className}"></td></tr>`;
+        tableBody.querySelector('td').textContent = message;
+    };
+    
+    fetch(`/api/memory/allocations?group_by=${groupBy}&compare=${compare}&top_n=25`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                showMessage(data.error, 'text-danger');
+                return;
+            }
+            if (!data.enabled) {
+                showMessage('Allocation tracking is disabled. Create the tracker with allocation_tracking=True.');
+                return;
+            }
+            
+            // Snapshot schedule and the cost of tracing
+            const latest = data.latest;
+            status.textContent = latest ?
+                `Snapshot ${data.snapshot_time} (${data.snapshots} taken, every ${data.interval}s, ${data.frames} frame(s), ` +
+                `sampling ${Math.round(data.sampling * 100)}%): ${latest.traced_mb} MB traced in ${latest.traces} blocks, ` +
+                `tracemalloc uses ${latest.tracemalloc_mb} MB, snapshot took ${latest.snapshot_ms} ms` :
+                `Waiting for the first snapshot at ${data.next_snapshot}`;
+            
+            if (data.sites.length === 0) {
+                showMessage('No allocation changes to show yet.');
+                return;
+            }
+            
+            tableBody.innerHTML = '';
+            data.sites.forEach(site => {
+                const row = document.createElement('tr');
+                if (site.size_diff_kb > 1024) {
+                    row.className = 'table-warning';
+                }
+                
+                const formatChange = kb => (kb < 0 ? '-' : '+') + formatBytes(Math.abs(kb) * 1024);
+                const cells = [
+                    site.site,
+                    formatBytes(site.size_kb * 1024),
+                    formatChange(site.size_diff_kb),
+                    site.count,
+                    (site.count_diff > 0 ? '+' : '') + site.count_diff
+                ];
+                cells.forEach((value, index) => {
+                    const cell = document.createElement('td');
+                    cell.textContent = value;
+                    if (index === 0) {
+                        // Source line and call chain on hover, the site can be long
+                        cell.className = 'text-break font-monospace small';
+                        cell.title = site.traceback ? site.traceback.join('\n') : (site.line || '');
+                    }
+                    row.appendChild(cell);
+                });
+                tableBody.appendChild(row);
+            });
+        })
+        .catch(error => {
+            console.error('Error fetching allocation data:', error);
+            showMessage('Error loading allocation sites', 'text-danger');
+        });
+}
+
 /**
  * Filter processes based on criteria
  */
@@ -302,7 +377,7 @@ function fetchLongTermHistory(period = 'daily') {
     }
     
     // Fetch long-term history data
-    fetch(`/api/memory/long-term?period=${period}`)
+    fetch(`/api/memory/long-term?period=${period}&max_points=${CHART_MAX_POINTS}`)
         .then(response => response.json())
         .then(data => {
             if (data.length === 0) {
@@ -477,6 +552,8 @@ document.addEventListener('DOMContentLoaded', function() {
             // Handle specific tabs
             if (activeTab === 'longterm-tab') {
                 fetchLongTermHistory('daily');
+            } else if (activeTab === 'allocations-tab') {
+                fetchAllocations();
             }
         });
     }
@@ -504,6 +581,14 @@ document.addEventListener('DOMContentLoaded', function() {
         checkLeaksBtn.addEventListener('click', checkMemoryLeaks);
     }
     
+    // Allocation sites controls
+    const refreshAllocationsBtn = document.getElementById('refresh-allocations-btn');
+    if (refreshAllocationsBtn) {
+        refreshAllocationsBtn.addEventListener('click', fetchAllocations);
+        document.getElementById('allocation-group-by').addEventListener('change', fetchAllocations);
+        document.getElementById('allocation-compare').addEventListener('change', fetchAllocations);
+    }
+    
     // Process filter button
     const applyFiltersBtn = document.getElementById('apply-filters-btn');
     if (applyFiltersBtn) {
@@ -781,32 +866,50 @@ function renderPagingSimulation(data, container) {
             <div class="card mb-4">
                 <div class="card-header d-flex justify-content-between align-items-center">
                     <h5 class="card-title mb-0">Swap Space Activity</h5>
-                    <span class="badge bg-info">${data.swap_status.pages_swapped.toLocaleString()} pages swapped</span>
+                    <div>
+                        ${data.swap_status.swap_in_per_sec !== null ? `
+                            <span class="badge bg-success">${data.swap_status.swap_in_per_sec.toFixed(1)} pages/s in</span>
+                            <span class="badge bg-danger">${data.swap_status.swap_out_per_sec.toFixed(1)} pages/s out</span>
+                            <span class="badge bg-warning text-dark">${data.swap_status.major_faults_per_sec.toFixed(1)} major faults/s</span>
+                        ` : ''}
+                        <span class="badge bg-info">${data.swap_status.pages_swapped.toLocaleString()} pages swapped</span>
+                    </div>
                 </div>
                 <div class="card-body">
                     <div class="row">
-                        <div class="col-md-6">
+                        <div class="col-md-4">
                             <h6 class="border-bottom pb-2">Recently Swapped Out</h6>
                             <ul class="list-group">
                                 ${data.swap_status.recently_swapped_out.map(swap => `
                                     <li class="list-group-item d-flex justify-content-between align-items-center">
-                                        ${swap.process_name} (PID: ${swap.pid})
+                                        ${swap.time}
                                         <span class="badge bg-danger rounded-pill">${swap.pages} pages</span>
                                     </li>
                                 `).join('') || '<li class="list-group-item">No recent swap-out activity</li>'}
                             </ul>
                         </div>
-                        <div class="col-md-6">
+                        <div class="col-md-4">
                             <h6 class="border-bottom pb-2">Recently Swapped In</h6>
                             <ul class="list-group">
                                 ${data.swap_status.recently_swapped_in.map(swap => `
                                     <li class="list-group-item d-flex justify-content-between align-items-center">
-                                        ${swap.process_name} (PID: ${swap.pid})
+                                        ${swap.time}
                                         <span class="badge bg-success rounded-pill">${swap.pages} pages</span>
                                     </li>
                                 `).join('') || '<li class="list-group-item">No recent swap-in activity</li>'}
                             </ul>
                         </div>
+                        <div class="col-md-4">
+                            <h6 class="border-bottom pb-2">Most Major Faults</h6>
+                            <ul class="list-group">
+                                ${data.swap_status.top_faulting.map(proc => `
+                                    <li class="list-group-item d-flex justify-content-between align-items-center">
+                                        ${proc.process_name} (PID: ${proc.pid})
+                                        <span class="badge bg-warning text-dark rounded-pill">${proc.major_faults_per_sec.toFixed(1)}/s</span>
+                                    </li>
+                                `).join('') || '<li class="list-group-item">No process is faulting</li>'}
+                            </ul>
+                        </div>
                     </div>
                 </div>
             </div>
@@ -818,7 +921,8 @@ function renderPagingSimulation(data, container) {
         `<div class="text-muted small mt-4">
             <i class="fas fa-info-circle me-1"></i>
             This simulation is based on actual system memory data but uses simulated paging structures
-            for educational purposes. Page faults are randomly simulated.
+            for educational purposes. Page table faults are randomly simulated; swap activity and
+            major fault rates are measured from the kernel's counters.
         </div>`;
 }
 
@@ -7,6 +7,61 @@
 let memoryPieChart = null;
 let memoryHistoryChart = null;
 
+// Point budget for line charts; longer series are reduced with LTTB (by the
+// server, or here for the live history the dashboard extends itself)
+const CHART_MAX_POINTS = 1000;
+
+/**
+ * Select the points to draw with Largest-Triangle-Three-Buckets, as downsampling.py does
+ * @param {ArrayLike} xs - Ascending x values
+ * @param {ArrayLike} ys - Values driving the selection
+ * @param {number} maxPoints - Maximum number of points to keep
+ * @returns {Array|null} Ascending indices to keep, null to keep every point
+ */
+function lttbIndices(xs, ys, maxPoints) {
+    const n = ys.length;
+    if (maxPoints >= n) return null;
+    if (maxPoints < 3) return [0, n - 1].slice(0, Math.max(maxPoints, 0));
+    
+    const bucketSize = (n - 2) / (maxPoints - 2);
+    const indices = [0];
+    let a = 0;
+    
+    for (let i = 0; i < maxPoints - 2; i++) {
+        // Average point of the next bucket (the last point for the final bucket)
+        const avgStart = Math.floor((i + 1) * bucketSize) + 1;
+        const avgEnd = Math.min(Math.floor((i + 2) * bucketSize) + 1, n);
+        let avgX = 0;
+        let avgY = 0;
+        for (let j = avgStart; j < avgEnd; j++) {
+            avgX += xs[j];
+            avgY += ys[j] ?? 0;
+        }
+        avgX /= avgEnd - avgStart;
+        avgY /= avgEnd - avgStart;
+        
+        // Pick the point in this bucket with the largest triangle area
+        const rangeStart = Math.floor(i * bucketSize) + 1;
+        const rangeEnd = Math.floor((i + 1) * bucketSize) + 1;
+        const ax = xs[a];
+        const ay = ys[a] ?? 0;
+        let maxArea = -1;
+        let selected = rangeStart;
+        for (let j = rangeStart; j < rangeEnd; j++) {
+            const area = Math.abs((ax - avgX) * ((ys[j] ?? 0) - ay) - (ax - xs[j]) * (avgY - ay));
+            if (area > maxArea) {
+                maxArea = area;
+                selected = j;
+            }
+        }
+        indices.push(selected);
+        a = selected;
+    }
+    
+    indices.push(n - 1);
+    return indices;
+}
+
 /**
  * Initialize all charts with default/empty data
  */
@@ -69,6 +124,26 @@ function initCharts() {
                     borderWidth: 2,
                     tension: 0.2,
                     fill: true
+                },
+                {
+                    label: 'Major Faults/s',
+                    data: [],
+                    backgroundColor: 'rgba(153, 102, 255, 0.2)',
+                    borderColor: 'rgba(153, 102, 255, 1)',
+                    borderWidth: 1,
+                    tension: 0.2,
+                    fill: false,
+                    yAxisID: 'rates'
+                },
+                {
+                    label: 'Swap In+Out Pages/s',
+                    data: [],
+                    backgroundColor: 'rgba(255, 159, 64, 0.2)',
+                    borderColor: 'rgba(255, 159, 64, 1)',
+                    borderWidth: 1,
+                    tension: 0.2,
+                    fill: false,
+                    yAxisID: 'rates'
                 }
             ]
         },
@@ -84,6 +159,17 @@ function initCharts() {
                         text: 'Usage %'
                     }
                 },
+                rates: {
+                    position: 'right',
+                    beginAtZero: true,
+                    grid: {
+                        drawOnChartArea: false
+                    },
+                    title: {
+                        display: true,
+                        text: 'Per second'
+                    }
+                },
                 x: {
                     title: {
                         display: true,
@@ -129,23 +215,130 @@ function updateMemoryPieChart(memoryData) {
 
 /**
  * Update the history chart with timeline data
- * @param {Object} historyData - History data from the API
+ * @param {Object} historyData - Raw history with times (epoch ms), timestamps, memoryPercent,
+ *                               swapPercent, majorFaults and swapPages (rates per second,
+ *                               null where unknown); reduced to CHART_MAX_POINTS for drawing
  */
 function updateMemoryHistoryChart(historyData) {
     if (!memoryHistoryChart) return;
     
-    // Extract data for the memory history chart
-    const timestamps = historyData.timestamps;
-    const memoryPercents = historyData.memory.map(m => m.percent);
-    const swapPercents = historyData.swap.map(s => s.percent);
+    // Driven by RAM usage like the server-side reduction, so its peaks are kept
+    const indices = lttbIndices(historyData.times, historyData.memoryPercent, CHART_MAX_POINTS);
+    const points = values => indices ? indices.map(i => values[i]) : values;
     
     // Update chart data
-    memoryHistoryChart.data.labels = timestamps;
-    memoryHistoryChart.data.datasets[0].data = memoryPercents;
-    memoryHistoryChart.data.datasets[1].data = swapPercents;
+    memoryHistoryChart.data.labels = points(historyData.timestamps);
+    memoryHistoryChart.data.datasets[0].data = points(historyData.memoryPercent);
+    memoryHistoryChart.data.datasets[1].data = points(historyData.swapPercent);
+    memoryHistoryChart.data.datasets[2].data = points(historyData.majorFaults);
+    memoryHistoryChart.data.datasets[3].data = points(historyData.swapPages);
     memoryHistoryChart.update();
 }
 
+// Compact columnar wire format (see wire_format.py)
+const COLUMNAR_MIMETYPE = 'application/vnd.memtrack.columnar';
+const COLUMNAR_HEADER_BYTES = 16;
+const COLUMNAR_KIND_HISTORY = 1;
+const COLUMNAR_VERSION = 2;
+
+// Paging rate columns of the history, in the order of vmstat.VMSTAT_COUNTERS
+const PAGING_COUNTERS = ['pgfault', 'pgmajfault', 'pswpin', 'pswpout', 'pgscan', 'pgsteal',
+                         'allocstall', 'workingset_refault', 'oom_kill'];
+
+// Typed array views use the platform byte order, the format is little-endian
+const IS_LITTLE_ENDIAN = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+/**
+ * Read and validate the header of a columnar payload
+ * @param {ArrayBuffer} buffer - Response body
+ * @param {number} expectedKind - Expected payload kind
+ * @returns {Object} Row count and cursor
+ */
+function readColumnarHeader(buffer, expectedKind) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    const version = view.getUint8(4);
+    const kind = view.getUint8(5);
+    
+    if (magic !== 'MTWF' || version !== COLUMNAR_VERSION || kind !== expectedKind) {
+        throw new Error('Unsupported columnar payload');
+    }
+    
+    return {
+        count: view.getUint32(8, true),
+        cursor: view.getUint32(12, true)
+    };
+}
+
+/**
+ * Decode a columnar history payload into typed arrays without copying
+ * @param {ArrayBuffer} buffer - Response body from /api/memory/history
+ * @returns {Object} Typed array columns (paging rates under paging) plus count, cursor and totals
+ */
+function decodeColumnarHistory(buffer) {
+    const { count, cursor } = readColumnarHeader(buffer, COLUMNAR_KIND_HISTORY);
+    const scalars = new Float64Array(buffer, COLUMNAR_HEADER_BYTES, 3);
+    let offset = COLUMNAR_HEADER_BYTES + 3 * 8;
+    
+    const float64Column = () => {
+        const column = new Float64Array(buffer, offset, count);
+        offset += count * 8;
+        return column;
+    };
+    const float32Column = () => {
+        const column = new Float32Array(buffer, offset, count);
+        offset += count * 4;
+        return column;
+    };
+    
+    const history = {
+        count: count,
+        cursor: cursor,
+        memoryTotal: scalars[1],
+        swapTotal: scalars[2],
+        memoryAvailable: float64Column(),
+        memoryUsed: float64Column(),
+        memoryFree: float64Column(),
+        memoryBuffers: float64Column(),
+        memoryCached: float64Column(),
+        swapUsed: float64Column(),
+        swapFree: float64Column(),
+        memoryPercent: float32Column(),
+        swapPercent: float32Column(),
+        // Rates per second keyed by counter, NaN where unknown
+        paging: Object.fromEntries(PAGING_COUNTERS.map(counter => [counter, float32Column()]))
+    };
+    
+    // Undo the delta encoding of the timestamps
+    const deltas = new Int32Array(buffer, offset, count);
+    const times = new Float64Array(count);
+    let time = scalars[0];
+    for (let i = 0; i < count; i++) {
+        time += deltas[i];
+        times[i] = time;
+    }
+    history.times = times;
+    
+    return history;
+}
+
+/**
+ * Fetch an endpoint in the columnar format, falling back to JSON on
+ * big-endian platforms where typed array views would be misread
+ * @param {string} url - API endpoint supporting content negotiation
+ * @param {Function} decode - Columnar decoder for the endpoint
+ * @returns {Promise<Object>} Decoded columns, or null when JSON was used
+ */
+function fetchColumnar(url, decode) {
+    if (!IS_LITTLE_ENDIAN) {
+        return Promise.resolve(null);
+    }
+    
+    return fetch(url, { headers: { 'Accept': COLUMNAR_MIMETYPE } })
+        .then(response => response.arrayBuffer())
+        .then(decode);
+}
+
 /**
  * Create a bar chart showing top process memory usage
  * This function is kept separate as it might be used in a modal or separate view
@@ -425,7 +618,7 @@ function createApplicationsMemoryChart(appData, canvasId) {
                 
                 // Add this process's memory to the app's total
                 appMemoryData[app].totalMemoryMb += process.memory_mb;
-                appMemoryData[app].processCount += 1;
+                appMemoryData[app].processCount += process.count ?? 1;
                 
                 // We found a match, no need to check other app names
                 break;
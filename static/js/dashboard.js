@@ -8,6 +8,13 @@ let refreshInterval = 3000; // Default refresh rate: 3 seconds
 let refreshTimer = null;
 let autoSortProcesses = true; // Default: auto-sort enabled
 
+// Locally held raw history window, extended incrementally via the batch cursor
+// and trimmed to the server's window by time; reduced only when drawn
+const HISTORY_COLUMNS = ['times', 'timestamps', 'memoryPercent', 'swapPercent', 'majorFaults', 'swapPages'];
+let historyData = emptyHistory();
+let historyCursor = null;
+let systemInfoLoaded = false;
+
 // DOM elements
 const refreshBtn = document.getElementById('refresh-btn');
 const refreshRateLinks = document.querySelectorAll('.refresh-rate');
@@ -19,8 +26,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize charts
     initCharts();
     
-    // Load initial data
-    refreshData();
+    // Seed the history window in the compact format, then load the rest
+    loadInitialHistory().finally(refreshData);
     
     // Start auto-refresh
     startAutoRefresh();
@@ -411,7 +418,7 @@ function updateProcessTable(processes) {
                 </div>
             </td>
             <td>${process.username}</td>
-            <td>${formatBytes(process.memory_mb * 1024 * 1024)}</td>
+            <td ${process.uss_mb !== undefined ? `title="USS ${formatBytes(process.uss_mb * 1024 * 1024)}, PSS ${formatBytes(process.pss_mb * 1024 * 1024)} (${process.uss_age}s ago)"` : ''}>${formatBytes(process.memory_mb * 1024 * 1024)}</td>
             <td>
                 <div class="d-flex align-items-center">
                     <div class="progress flex-grow-1 me-2" style="height: 6px;">
@@ -441,16 +448,21 @@ function updateProcessTable(processes) {
         }
     }
     
-    // Create or update the applications memory chart
-    if (processes.length > 0 && document.getElementById('applicationsMemoryChart')) {
+    // Store current processes for next comparison
+    previousProcesses = [...processes];
+}
+
+/**
+ * Update the applications memory chart
+ * @param {Array} groups - Processes aggregated by name, from the batch API
+ */
+function updateApplicationsChart(groups) {
+    if (groups.length > 0 && document.getElementById('applicationsMemoryChart')) {
         if (window.applicationsMemoryChart) {
             window.applicationsMemoryChart.destroy();
         }
-        window.applicationsMemoryChart = createApplicationsMemoryChart(processes, 'applicationsMemoryChart');
+        window.applicationsMemoryChart = createApplicationsMemoryChart(groups, 'applicationsMemoryChart');
     }
-    
-    // Store current processes for next comparison
-    previousProcesses = [...processes];
 }
 
 /**
@@ -485,6 +497,72 @@ function toggleLoadingOverlay(show) {
     }
 }
 
+/**
+ * Create an empty local history window
+ * @returns {Object} One empty array per column of HISTORY_COLUMNS
+ */
+function emptyHistory() {
+    return Object.fromEntries(HISTORY_COLUMNS.map(column => [column, []]));
+}
+
+/**
+ * Load the full raw history window using the compact columnar encoding.
+ * If it is unavailable the first batch request returns the full window instead.
+ * @returns {Promise} Resolves once the history window has been seeded
+ */
+function loadInitialHistory() {
+    return fetchColumnar('/api/memory/history', decodeColumnarHistory)
+        .then(history => {
+            if (!history) return;
+            
+            historyData = {
+                times: Array.from(history.times),
+                timestamps: Array.from(history.times, t => new Date(t).toTimeString().slice(0, 8)),
+                memoryPercent: Array.from(history.memoryPercent),
+                swapPercent: Array.from(history.swapPercent),
+                majorFaults: Array.from(history.paging.pgmajfault, rate => isNaN(rate) ? null : rate),
+                swapPages: Array.from(history.paging.pswpin,
+                                      (rate, i) => isNaN(rate) ? null : rate + history.paging.pswpout[i])
+            };
+            historyCursor = history.cursor;
+            updateMemoryHistoryChart(historyData);
+        })
+        .catch(error => {
+            console.error('Error fetching compact memory history:', error);
+        });
+}
+
+/**
+ * Merge a batch history section into the locally held history window
+ * @param {Object} history - History section from the batch API
+ */
+function mergeHistory(history) {
+    if (history.reset) {
+        historyData = emptyHistory();
+    }
+    
+    historyData.times.push(...history.times.map(t => t * 1000));
+    historyData.timestamps.push(...history.timestamps);
+    historyData.memoryPercent.push(...history.memory.map(m => m.percent));
+    historyData.swapPercent.push(...history.swap.map(s => s.percent));
+    historyData.majorFaults.push(...history.paging.map(p => p ? p.pgmajfault : null));
+    historyData.swapPages.push(...history.paging.map(p => p ? (p.pswpin ?? 0) + (p.pswpout ?? 0) : null));
+    
+    // Keep the same window as the server: drop what it no longer holds
+    if (history.oldest_time !== null) {
+        const cutoff = history.oldest_time * 1000;
+        let excess = 0;
+        while (excess < historyData.times.length && historyData.times[excess] < cutoff) {
+            excess++;
+        }
+        if (excess > 0) {
+            HISTORY_COLUMNS.forEach(column => historyData[column].splice(0, excess));
+        }
+    }
+    
+    historyCursor = history.cursor;
+}
+
 /**
  * Refresh all data from the API
  */
@@ -499,56 +577,41 @@ function refreshData() {
         pulseElement(refreshStatus);
     }
     
-    // Fetch current memory data
-    fetch('/api/memory/current')
-        .then(response => response.json())
-        .then(data => {
-            updateMemoryStats(data);
-            updateMemoryPieChart(data.memory);
-        })
-        .catch(error => {
-            console.error('Error fetching current memory data:', error);
-        });
+    // System information is static, so it is only requested once
+    const sections = ['current', 'history', 'processes', 'groups', 'alerts'];
+    if (!systemInfoLoaded) {
+        sections.push('system-info');
+    }
     
-    // Fetch memory history
-    fetch('/api/memory/history')
-        .then(response => response.json())
-        .then(data => {
-            updateMemoryHistoryChart(data);
-        })
-        .catch(error => {
-            console.error('Error fetching memory history:', error);
-        });
+    const params = new URLSearchParams({ sections: sections.join(',') });
+    if (historyCursor !== null) {
+        params.set('history_cursor', historyCursor);
+    }
+    const showActiveOnly = document.getElementById('show-active-alerts-only')?.checked ?? true;
+    params.set('active_only', showActiveOnly);
     
-    // Fetch processes
-    fetch('/api/memory/processes')
-        .then(response => response.json())
-        .then(data => {
-            updateProcessTable(data);
-        })
-        .catch(error => {
-            console.error('Error fetching process data:', error);
-        });
-        
-    // Fetch system information
-    fetch('/api/memory/system-info')
+    // Fetch every dashboard section in a single request
+    fetch(`/api/memory/batch?${params}`)
         .then(response => response.json())
         .then(data => {
-            updateSystemInfo(data);
-        })
-        .catch(error => {
-            console.error('Error fetching system info:', error);
-        });
-        
-    // Fetch alerts
-    const showActiveOnly = document.getElementById('show-active-alerts-only')?.checked || true;
-    fetch(`/api/memory/alerts?active_only=${showActiveOnly}`)
-        .then(response => response.json())
-        .then(data => {
-            updateAlerts(data);
+            updateMemoryStats(data.current);
+            updateMemoryPieChart(data.current.memory);
+            
+            mergeHistory(data.history);
+            updateMemoryHistoryChart(historyData);
+            
+            updateProcessTable(data.processes);
+            updateApplicationsChart(data.groups);
+            
+            if (data['system-info']) {
+                updateSystemInfo(data['system-info']);
+                systemInfoLoaded = true;
+            }
+            
+            updateAlerts(data.alerts.alerts);
         })
         .catch(error => {
-            console.error('Error fetching alerts data:', error);
+            console.error('Error fetching dashboard data:', error);
         })
         .finally(() => {
             // Reset refresh button
@@ -0,0 +1,79 @@
+import json
+import time
+
+from alert_dispatcher import AlertDispatcher
+
+
+def make_alert(key, message='Memory usage at 91%'):
+    return {'type': 'memory', 'key': key, 'level': 'critical', 'message': message,
+            'value': 91, 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def read_lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_alerts_are_delivered_after_a_restart(tmp_path):
+    path = tmp_path / 'alerts.log'
+    dispatcher = AlertDispatcher([f'file://{path}'])
+
+    dispatcher.submit(make_alert('a'))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+    assert dispatcher.thread is None
+
+    dispatcher.start()
+    dispatcher.submit(make_alert('b'))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert [n['key'] for n in read_lines(path)] == ['memory:a', 'memory:b']
+
+
+def test_alert_after_stop_restarts_the_worker(tmp_path):
+    path = tmp_path / 'alerts.log'
+    dispatcher = AlertDispatcher([f'file://{path}'])
+    dispatcher.submit(make_alert('a'))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    dispatcher.submit(make_alert('b'))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert len(read_lines(path)) == 2
+
+
+class SlowFailingSink:
+    name = 'slow://sink'
+
+    def __init__(self):
+        self.attempts = 0
+
+    def send(self, notifications):
+        self.attempts += 1
+        time.sleep(0.5)
+        raise OSError("timed out")
+
+
+def test_a_slow_sink_does_not_delay_the_others(tmp_path):
+    path = tmp_path / 'alerts.log'
+    slow = SlowFailingSink()
+    dispatcher = AlertDispatcher([slow, f'file://{path}'], coalesce_seconds=0, retry_backoff=0.01)
+
+    started = time.monotonic()
+    for key in 'abc':
+        dispatcher.submit(make_alert(key))
+        time.sleep(0.05)
+    while len(read_lines(path)) < 3 and time.monotonic() - started < 5:
+        time.sleep(0.01)
+    # The slow sink is still in its first delivery or retrying it
+    assert time.monotonic() - started < 1
+    assert sorted(n['key'] for n in read_lines(path)) == ['memory:a', 'memory:b', 'memory:c']
+
+    dispatcher.stop(timeout=0)
+    stats = {sink['name']: sink for sink in dispatcher.get_stats()['sinks']}
+    assert stats[f'file://{path}']['sent'] == 3
+    assert slow.attempts <= 2
@@ -0,0 +1,44 @@
+import tracemalloc
+
+import pytest
+
+from allocation_tracker import AllocationTracker, traceback_sizes
+from shared_state import SharedMemoryTracker
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(200)]
+
+
+def test_sites_are_summed_per_traceback():
+    tracemalloc.start(1)
+    try:
+        kept = allocate()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    sizes = traceback_sizes(snapshot)
+    assert sum(size for size, _ in sizes.values()) == sum(trace.size for trace in snapshot.traces)
+    line = allocate.__code__.co_firstlineno + 1
+    size, count = sizes[((__file__, line),)]
+    assert count >= len(kept)
+    assert size >= 200 * 1024
+
+
+def test_snapshots_report_the_allocating_lines():
+    tracker = AllocationTracker(interval=1)
+    tracker.start(now=0)
+    try:
+        kept = allocate()
+        assert tracker.tick(1)
+    finally:
+        tracker.stop()
+    sites = tracker.get_top('lineno', 'none', top_n=50)
+    assert any(site['site'].startswith(__file__) for site in sites)
+    assert kept
+
+
+def test_shared_workers_reject_allocation_tracking(tmp_path):
+    with pytest.raises(ValueError):
+        SharedMemoryTracker(str(tmp_path), export_dir=str(tmp_path), allocation_tracking=True)
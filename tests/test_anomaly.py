@@ -0,0 +1,78 @@
+from anomaly import AnomalyDetector
+
+
+def feed_days(detector, days, noise):
+    """Samples of RAM percent alternating around 50% every 10 s, with an hourly rollup."""
+    now = 0
+    for _ in range(days):
+        for hour in range(24):
+            for i in range(360):
+                detector.update('memory.percent', 50 + (noise if i % 2 else -noise), now, hour=hour)
+                now += 10
+            detector.add_seasonal('memory.percent', hour, 50)
+    return now
+
+
+def test_seasonal_score_counts_the_noise_within_the_hour():
+    detector = AnomalyDetector(threshold=100, relative_floor=0.001)
+    now = feed_days(detector, 3, noise=2)
+
+    mean, std = detector.seasonal['memory.percent'].expected(5, detector.seasonal_min_days)
+    assert mean == 50
+    assert 1.9 < std < 2.1
+    # Usual noise for this hour, even though every hourly mean was exactly 50
+    assert detector.update('memory.percent', 53, now, hour=5) is None
+
+    anomaly = detector.update('memory.percent', 70, now + 10, hour=5)
+    assert anomaly['detector'] == 'seasonal'
+    assert anomaly['expected'] == 50
+
+
+def test_seasonal_baseline_waits_for_enough_days():
+    detector = AnomalyDetector(threshold=100, relative_floor=0.001)
+    now = feed_days(detector, 2, noise=2)
+    assert detector.update('memory.percent', 90, now, hour=5) is None
+
+
+def feed_steady(detector, key, count, value=1000.0, jitter=10.0, start=0, step=1):
+    now = start
+    for i in range(count):
+        assert detector.update(key, value + (jitter if i % 2 else -jitter), now) is None
+        now += step
+    return now
+
+
+def test_a_spike_is_flagged_by_both_detectors():
+    detector = AnomalyDetector()
+    now = feed_steady(detector, 'memory.cached', 200)
+
+    anomaly = detector.update('memory.cached', 2000.0, now)
+    assert anomaly['detector'] == 'ewma+mad'
+    assert anomaly['expected'] == 1000.0
+    assert anomaly['score'] >= detector.threshold
+    assert [a['key'] for a in detector.get_active(now)] == ['memory.cached']
+
+
+def test_nothing_is_flagged_during_warmup():
+    detector = AnomalyDetector(warmup=30)
+    now = feed_steady(detector, 'memory.cached', 10)
+    assert detector.update('memory.cached', 5000.0, now) is None
+
+
+def test_a_flat_series_does_not_fire_on_noise():
+    detector = AnomalyDetector()
+    now = feed_steady(detector, 'memory.used', 200, jitter=0.0)
+    # 0.5% off a series that never moved, within the relative floor
+    assert detector.update('memory.used', 1005.0, now) is None
+
+
+def test_anomalies_are_held_then_expire():
+    detector = AnomalyDetector(hold_seconds=60, expire_seconds=600)
+    now = feed_steady(detector, 'memory.cached', 200)
+    detector.update('memory.cached', 2000.0, now)
+
+    assert detector.get_active(now + 60)
+    assert detector.get_active(now + 61) == []
+    # A series that stopped reporting is forgotten
+    detector.get_active(now + 1000)
+    assert 'memory.cached' not in detector.series
@@ -0,0 +1,97 @@
+import os
+import resource
+import shutil
+
+import pytest
+
+from cgroup_collector import CgroupCollector
+
+
+def make_cgroup(directory, current, limit='max'):
+    os.makedirs(directory, exist_ok=True)
+    files = {
+        'memory.current': f'{current}\n',
+        'memory.max': f'{limit}\n',
+        'memory.stat': 'anon 4096\nfile 8192\nshmem 0\n',
+        'memory.events': 'low 0\nhigh 0\nmax 0\noom 0\noom_kill 0\n',
+    }
+    for name, content in files.items():
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+@pytest.fixture
+def cgroup_root(tmp_path):
+    root = tmp_path / 'cgroup'
+    root.mkdir()
+    (root / 'cgroup.controllers').write_text('memory\n')
+    for i in range(20):
+        make_cgroup(root / 'system.slice' / f'unit{i}.service', (i + 1) * 1024 * 1024,
+                    limit=64 * 1024 * 1024)
+    return root
+
+
+def test_discovery_and_sampling(cgroup_root):
+    collector = CgroupCollector(str(cgroup_root), stat_interval=0)
+    assert CgroupCollector.is_available(str(cgroup_root))
+    try:
+        collector.sample(1000)
+        assert len(collector.cgroups) == 20
+        cgroup = collector.cgroups['/system.slice/unit0.service']
+        assert cgroup.current == 1024 * 1024
+        assert cgroup.max == 64 * 1024 * 1024
+        assert cgroup.stat['anon'] == 4096
+        assert cgroup.events['oom_kill'] == 0
+
+        make_cgroup(cgroup_root / 'user.slice', 2048)
+        collector.sample(1000 + collector.discovery_interval)
+        assert '/user.slice' in collector.cgroups
+    finally:
+        collector.close()
+
+
+def test_removed_cgroups_are_dropped(cgroup_root):
+    collector = CgroupCollector(str(cgroup_root), discovery_interval=0)
+    try:
+        collector.sample(1000)
+        shutil.rmtree(cgroup_root / 'system.slice' / 'unit3.service')
+        collector.sample(1001)
+        assert '/system.slice/unit3.service' not in collector.cgroups
+        assert len(collector.cgroups) == 19
+    finally:
+        collector.close()
+
+
+def test_one_descriptor_per_cgroup(cgroup_root):
+    before = open_fds()
+    collector = CgroupCollector(str(cgroup_root), stat_interval=0)
+    try:
+        collector.sample(1000)
+        collector.sample(1001)
+        assert open_fds() - before == len(collector.cgroups)
+    finally:
+        collector.close()
+    assert open_fds() == before
+
+
+def test_descriptor_exhaustion_keeps_cgroups(cgroup_root):
+    collector = CgroupCollector(str(cgroup_root), stat_interval=3600)
+    collector.discover()
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        # Room for half the cgroups: the others fail with EMFILE
+        resource.setrlimit(resource.RLIMIT_NOFILE, (open_fds() + 10, hard))
+        collector.sample(1000)
+        assert len(collector.cgroups) == 20
+        assert sum(1 for cgroup in collector.cgroups.values() if cgroup.current) < 20
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    try:
+        collector.sample(1001)
+        assert all(cgroup.current for cgroup in collector.cgroups.values())
+    finally:
+        collector.close()
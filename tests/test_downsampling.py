@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from downsampling import lttb_indices, take
+
+
+def wave(n):
+    xs = list(range(n))
+    return xs, [math.sin(x / 50) for x in xs]
+
+
+def test_keeps_the_endpoints_and_the_point_count():
+    xs, ys = wave(1000)
+    indices = lttb_indices(xs, ys, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert indices == sorted(set(indices))
+
+
+def test_a_spike_survives_the_reduction():
+    xs, ys = wave(1000)
+    ys[437] = 50.0
+    indices = lttb_indices(xs, ys, 50)
+    assert 437 in indices
+    assert max(take(ys, indices)) == 50.0
+
+
+@pytest.mark.parametrize('max_points', [1000, 5000, None])
+def test_no_reduction_when_everything_fits(max_points):
+    xs, ys = wave(1000)
+    assert lttb_indices(xs, ys, max_points) == list(range(1000))
+
+
+@pytest.mark.parametrize('max_points, expected', [(-1, []), (0, []), (1, [0]), (2, [0, 999])])
+def test_tiny_limits(max_points, expected):
+    xs, ys = wave(1000)
+    assert lttb_indices(xs, ys, max_points) == expected
+
+
+def test_take_gathers_every_column_alike():
+    xs, ys = wave(300)
+    indices = lttb_indices(xs, ys, 30)
+    assert take(xs, indices) == indices
+    assert take([str(x) for x in xs], indices) == [str(i) for i in indices]
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from forecast import MIN_POINTS_WEEKLY, Forecaster, SeasonalTrendModel
+from memory_tracker import MemoryTracker
+
+
+def test_weekly_terms_wait_for_two_weeks_of_effective_history():
+    model = SeasonalTrendModel()
+    for hour in range(MIN_POINTS_WEEKLY + 24):
+        model.add(hour, 50.0)
+    # More points than the weekly terms need, but the oldest are partly forgotten
+    assert model.count > MIN_POINTS_WEEKLY
+    assert model.seasonality() == ['daily']
+    coefficients = model.fit()
+    assert coefficients[-2:] == [0.0, 0.0]
+
+    while model.weight < MIN_POINTS_WEEKLY:
+        model.add(model.count, 50.0)
+    assert model.seasonality() == ['daily', 'weekly']
+
+
+def make_tracker(tmp_path, span_seconds, growth_mb, available_mb):
+    tracker = MemoryTracker(export_dir=str(tmp_path), heavy_hitters=False, autostart=False)
+    now = datetime.now()
+    times = [now - timedelta(seconds=span_seconds * (1 - i / 59)) for i in range(60)]
+    tracker.latest_processes = [{'pid': 42, 'name': 'leaky', 'memory_mb': 100 + growth_mb}]
+    tracker.latest_processes_time = now
+    tracker.process_history = {42: {
+        'name': 'leaky', 'username': 'app', 'start_time': times[0], 'timestamps': times,
+        'memory_usage': [100 + growth_mb * i / 59 for i in range(60)]
+    }}
+    tracker.latest_sample = {'memory': {'available': available_mb * 1024 * 1024}}
+    return tracker
+
+
+def test_process_exhaustion_needs_enough_history(tmp_path):
+    # 100 MB in 2 minutes: plenty of growth, too little history
+    forecast = make_tracker(tmp_path, 120, 100, 1000)._forecast_processes(10)[0]
+    assert forecast['growth_mb_per_hour'] > 0
+    assert forecast['hours_to_exhaustion'] is None
+
+
+def test_process_exhaustion_is_not_extrapolated_far(tmp_path):
+    # 5 minutes of history, 1200 MB/h against 100 GB available: days away
+    forecast = make_tracker(tmp_path, 300, 100, 100000)._forecast_processes(10)[0]
+    assert forecast['span_minutes'] == 5
+    assert forecast['hours_to_exhaustion'] is None
+
+    # ...and against 500 MB available: 25 minutes away
+    forecast = make_tracker(tmp_path, 300, 100, 500)._forecast_processes(10)[0]
+    assert forecast['hours_to_exhaustion'] == 0.4
+
+
+def feed(forecaster, start, values):
+    forecaster.update([
+        {'timestamp': (start + timedelta(hours=i)).strftime('%Y-%m-%d %H:00:00'),
+         'memory_percent': value, 'swap_percent': 0.0}
+        for i, value in enumerate(values)
+    ])
+
+
+def test_system_crossing_is_not_extrapolated_far():
+    start = datetime(2026, 3, 2, 0, 0)
+    now = start + timedelta(hours=8)
+
+    # Eight hours growing 1 point per hour from 40%: 90% is about 42 hours away,
+    # further than 4 times the history
+    forecaster = Forecaster()
+    feed(forecaster, start, [40.0 + i for i in range(8)])
+    forecast = forecaster.forecast('memory_percent', 90, now)
+    assert forecast['reliable_hours'] == 31
+    assert forecast['values'][-1] > 90
+    assert forecast['threshold_time'] is None
+    assert forecast['hours_to_threshold'] is None
+
+    # ...but 50% is a few hours away
+    forecast = forecaster.forecast('memory_percent', 50, now)
+    assert 0 < forecast['hours_to_threshold'] <= 4
+
+
+def test_forecast_rejects_a_negative_top_n(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path), heavy_hitters=False, autostart=False)
+    with pytest.raises(ValueError):
+        tracker.get_forecast(top_n=-1)
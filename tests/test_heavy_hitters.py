@@ -0,0 +1,123 @@
+import math
+import random
+
+import pytest
+
+from heavy_hitters import CountMinSketch, DAY, HeavyHitters, HOUR, SpaceSaving
+
+
+def skewed_stream(keys=2000, events=20000, seed=7):
+    """(key, weight) pairs where a few keys carry most of the weight."""
+    rng = random.Random(seed)
+    stream = [(f'key{int(keys * rng.random() ** 4)}', rng.uniform(1, 10)) for _ in range(events)]
+    truth = {}
+    for key, weight in stream:
+        truth[key] = truth.get(key, 0.0) + weight
+    return stream, truth
+
+
+def test_space_saving_bounds():
+    stream, truth = skewed_stream()
+    total = sum(truth.values())
+    summary = SpaceSaving(50)
+    for key, weight in stream:
+        summary.add(key, weight)
+
+    assert len(summary.counters) == 50
+    for key, (count, error) in summary.counters.items():
+        assert count - error <= truth[key] + 1e-6
+        assert truth[key] <= count + 1e-6
+    floor = summary.floor()
+    assert floor <= total / 50
+    for key, weight in truth.items():
+        if key not in summary.counters:
+            assert weight <= floor + 1e-6
+        # Every key above the guarantee is kept
+        if weight > total / 50:
+            assert key in summary.counters
+
+
+def test_space_saving_merge_keeps_the_bounds():
+    stream, truth = skewed_stream()
+    halves = SpaceSaving(50), SpaceSaving(50)
+    for i, (key, weight) in enumerate(stream):
+        halves[i % 2].add(key, weight)
+    merged = halves[0]
+    merged.merge(halves[1])
+
+    assert len(merged.counters) == 50
+    for key, (count, error) in merged.counters.items():
+        assert count - error <= truth[key] + 1e-6 <= count + 2e-6
+
+
+def test_count_min_error_bound():
+    stream, truth = skewed_stream()
+    total = sum(truth.values())
+    sketch = CountMinSketch(128, 4)
+    for key, weight in stream:
+        sketch.add(key, weight)
+
+    over = 0
+    for key, weight in truth.items():
+        estimate = sketch.estimate(key)
+        assert estimate >= weight - 1e-6
+        if estimate - weight > math.e / sketch.width * total:
+            over += 1
+    # The bound holds with probability 1 - exp(-depth) per key
+    assert over <= len(truth) * math.exp(-sketch.depth) * 2
+
+    copy = CountMinSketch(128, 4)
+    copy.load_state(sketch.export_state())
+    assert copy.estimate('key0') == sketch.estimate('key0')
+    with pytest.raises(ValueError):
+        CountMinSketch(64, 4).load_state(sketch.export_state())
+
+
+def sweep(hitters, now, memory_mb=100.0):
+    return hitters.update({'name': {'python': memory_mb}, 'username': {'alice': memory_mb}}, now)
+
+
+def test_buckets_rotate_into_days():
+    hitters = HeavyHitters(hours=3, days=2)
+    start = 10 * DAY
+    rotations = []
+    for t in range(start, start + 5 * DAY, 60):
+        rotations.append(sweep(hitters, t))
+
+    # True once per completed hour
+    assert sum(rotations) == 5 * 24 - 1
+    assert len(hitters.hourly) == 3
+    assert [b.length for b in hitters.hourly] == [HOUR] * 3
+    # Expired hours were folded into days, and days older than the limit dropped
+    assert all(b.length == DAY for b in hitters.daily)
+    assert len(hitters.daily) <= 3
+    assert hitters.daily[-1].start == hitters.hourly[0].start - hitters.hourly[0].start % DAY
+
+    # A whole past day: 24 hours of 100 MB
+    day = hitters.daily[-2]
+    result = hitters.query('name', day.start, day.start + DAY)
+    assert result['hitters'][0]['key'] == 'python'
+    assert result['hitters'][0]['average_mb'] == 100.0
+    assert result['observed_seconds'] == DAY
+
+
+def test_gaps_are_not_attributed():
+    hitters = HeavyHitters(max_gap=300)
+    sweep(hitters, HOUR)
+    sweep(hitters, HOUR + 60)
+    sweep(hitters, HOUR + 60 + 3000)   # The collector was suspended
+    result = hitters.query('name', HOUR, 2 * HOUR)
+    assert result['observed_seconds'] == 60
+    assert result['total_mb_seconds'] == 6000
+
+
+def test_state_round_trip():
+    hitters = HeavyHitters(hours=3, days=2)
+    for t in range(DAY, DAY + 6 * HOUR, 60):
+        sweep(hitters, t)
+
+    copy = HeavyHitters(hours=3, days=2)
+    copy.load_state(hitters.export_state())
+    assert copy.query('username', DAY, DAY + 6 * HOUR) == hitters.query('username', DAY, DAY + 6 * HOUR)
+    with pytest.raises(ValueError):
+        HeavyHitters(capacity=10).load_state(hitters.export_state())
@@ -0,0 +1,95 @@
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from memory_tracker import MemoryTracker
+
+
+def test_stopped_tracker_does_not_trace_allocations(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path), allocation_tracking=True, autostart=False)
+    try:
+        assert not tracemalloc.is_tracing()
+        tracker.start()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracker.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_alerts_are_delivered_after_stop_and_start(tmp_path):
+    path = tmp_path / 'alerts.log'
+    tracker = MemoryTracker(export_dir=str(tmp_path), alert_sinks=[f'file://{path}'],
+                            heavy_hitters=False, autostart=False)
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    tracker.start()
+    tracker._record_alert({'type': 'memory', 'level': 'warning', 'message': 'first',
+                           'value': 85, 'timestamp': timestamp})
+    tracker.stop()
+
+    tracker.start()
+    tracker._record_alert({'type': 'swap', 'level': 'warning', 'message': 'second',
+                           'value': 85, 'timestamp': timestamp})
+    try:
+        assert tracker.alert_dispatcher.flush(timeout=5)
+    finally:
+        tracker.stop()
+
+    messages = [json.loads(line)['message'] for line in path.read_text().splitlines()]
+    assert messages == ['first', 'second']
+
+
+def test_history_deltas_carry_times_and_the_window_start(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path), heavy_hitters=False, autostart=False)
+    memory = {'total': 100, 'available': 50, 'used': 50, 'free': 50, 'buffers': 0, 'cached': 0,
+              'percent': 50.0}
+    swap = {'total': 0, 'used': 0, 'free': 0, 'percent': 0.0}
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(tracker.max_samples + 5):
+        tracker._append_sample(start + timedelta(seconds=i), memory, swap)
+
+    with tracker.lock:
+        history = tracker._get_history_since(tracker.sample_count - 3)
+    assert len(history['times']) == len(history['timestamps']) == 3
+    assert history['times'][-1] == (start + timedelta(seconds=tracker.max_samples + 4)).timestamp()
+    # The window dropped the first 5 samples
+    assert history['oldest_time'] == (start + timedelta(seconds=5)).timestamp()
+
+
+def test_batch_cursors_return_only_newer_entries(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path), heavy_hitters=False, autostart=False)
+    memory = {'total': 100, 'available': 50, 'used': 50, 'free': 50, 'buffers': 0, 'cached': 0,
+              'percent': 50.0}
+    swap = {'total': 0, 'used': 0, 'free': 0, 'percent': 0.0}
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(10):
+        tracker._append_sample(start + timedelta(seconds=i), memory, swap)
+    tracker._record_alert({'type': 'memory', 'level': 'warning', 'message': 'first',
+                           'value': 85, 'timestamp': '2026-01-01 12:00:00'})
+
+    first = tracker.get_batch(sections=['history', 'alerts'])
+    assert len(first['history']['times']) == 10
+    assert [a['message'] for a in first['alerts']['alerts']] == ['first']
+
+    tracker._append_sample(start + timedelta(seconds=10), memory, swap)
+    tracker._record_alert({'type': 'swap', 'level': 'warning', 'message': 'second',
+                           'value': 85, 'timestamp': '2026-01-01 12:00:10'})
+    cursors = {section: first[section]['cursor'] for section in ('history', 'alerts')}
+    second = tracker.get_batch(sections=['history', 'alerts'], cursors=cursors)
+    assert second['history']['times'] == [(start + timedelta(seconds=10)).timestamp()]
+    assert not second['history']['reset']
+    assert [a['message'] for a in second['alerts']['alerts']] == ['second']
+
+    # A cursor from before a collector restart resets the client's history
+    restarted = tracker.get_batch(sections=['history'], cursors={'history': tracker.sample_count + 5})
+    assert restarted['history']['reset']
+    assert len(restarted['history']['times']) == 11
+
+
+def test_batch_rejects_unknown_sections(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path), heavy_hitters=False, autostart=False)
+    with pytest.raises(ValueError):
+        tracker.get_batch(sections=['history', 'bogus'])
@@ -0,0 +1,82 @@
+import pytest
+
+from process_groups import ProcessGroups
+
+
+def proc(pid, name, memory_mb, ppid=1, username='alice'):
+    return {'pid': pid, 'ppid': ppid, 'name': name, 'username': username, 'memory_mb': memory_mb}
+
+
+def sizes(groups, dimension):
+    return {g['name']: (g['memory_mb'], g['count']) for g in groups.get_groups(dimension)}
+
+
+def test_workers_join_their_master_tree():
+    groups = ProcessGroups()
+    groups.update([
+        proc(10, 'gunicorn', 50.0),
+        proc(11, 'gunicorn', 120.5, ppid=10),
+        proc(12, 'gunicorn', 130.25, ppid=10),
+        # A gunicorn started by a shell is a tree of its own
+        proc(20, 'bash', 5.0),
+        proc(21, 'gunicorn', 40.0, ppid=20, username='bob'),
+    ], 0)
+
+    assert sizes(groups, 'tree') == {'gunicorn (10)': (300.75, 3), 'gunicorn (21)': (40.0, 1),
+                                     'bash (20)': (5.0, 1)}
+    assert sizes(groups, 'name') == {'gunicorn': (340.75, 4), 'bash': (5.0, 1)}
+    assert sizes(groups, 'username') == {'alice': (305.75, 4), 'bob': (40.0, 1)}
+
+
+def test_sweeps_are_applied_as_diffs():
+    groups = ProcessGroups()
+    groups.update([proc(10, 'python', 100.0), proc(11, 'python', 0.1)], 0)
+    # 11 exits, 10 grows, 12 starts, 13 exec'd into another program
+    groups.update([proc(10, 'python', 150.0), proc(12, 'python', 0.2), proc(13, 'node', 30.0)], 60)
+    assert sizes(groups, 'name') == {'python': (150.2, 2), 'node': (30.0, 1)}
+
+    # Hundredths of a MB, so many small changes leave no rounding drift
+    for i in range(1000):
+        groups.update([proc(10, 'python', 150.0 + (i % 3) * 0.01)], 120 + i)
+    groups.update([proc(10, 'python', 150.0)], 2000)
+    assert sizes(groups, 'name') == {'python': (150.0, 1)}
+
+
+def test_empty_groups_expire():
+    groups = ProcessGroups(expire_seconds=300)
+    groups.update([proc(10, 'cron', 10.0)], 0)
+    groups.update([], 100)
+    assert 'cron' in groups.groups['name']
+    assert groups.get_groups('name') == []
+    groups.update([], 401)
+    assert 'cron' not in groups.groups['name']
+
+
+def test_growing_groups_are_possible_leaks():
+    groups = ProcessGroups()
+    for i in range(5):
+        groups.update([proc(10, 'leaky', 100.0 + 20 * i), proc(11, 'steady', 100.0)], i * 60)
+
+    leaks = groups.get_possible_leaks('name', 240)
+    assert [leak['name'] for leak in leaks] == ['leaky']
+    assert leaks[0]['growth_percent'] == 80.0
+    assert groups.get_possible_leaks('name', 240, min_time_seconds=300) == []
+    assert groups.get_history('name', 'leaky')['memory_mb'] == [100.0, 120.0, 140.0, 160.0, 180.0]
+
+
+def test_state_round_trip():
+    groups = ProcessGroups()
+    for i in range(30):
+        groups.update([proc(10, 'python', 100.0 + i)], i)
+
+    copy = ProcessGroups()
+    copy.load_state(groups.export_state(max_points=10))
+    assert copy.get_groups('tree') == groups.get_groups('tree')
+    history = copy.get_history('name', 'python')
+    assert len(history['times']) == 10
+    assert history['times'][-1] == 29
+
+
+def test_unknown_dimension():
+    with pytest.raises(ValueError):
+        ProcessGroups().get_groups('host')
@@ -0,0 +1,46 @@
+import pytest
+
+from sample_ring import HEADER, HEADER_SIZE, MAGIC, RECORD_V1, SampleRing
+
+
+def write_v1_ring(path, capacity, count):
+    """Write a ring in the version 1 layout, without the paging columns."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 1, RECORD_V1.size, capacity, 0, count, 0).ljust(HEADER_SIZE, b'\0'))
+        f.write(b'\0' * capacity * RECORD_V1.size)
+        for i in range(max(0, count - capacity), count):
+            f.seek(HEADER_SIZE + (i % capacity) * RECORD_V1.size)
+            f.write(RECORD_V1.pack(1000.0 + i, 8 << 30, 4 << 30, i, 1, 2, 3, 50.0, 2 << 30, i, 7, 25.0))
+
+
+@pytest.mark.parametrize('old_capacity, count, capacity', [
+    (100, 40, 100),     # partly filled
+    (100, 250, 100),    # wrapped around
+    (100, 250, 30),     # migrated and shrunk
+])
+def test_v1_rings_are_migrated(tmp_path, old_capacity, count, capacity):
+    path = str(tmp_path / 'history.ring')
+    write_v1_ring(path, old_capacity, count)
+
+    ring = SampleRing(path, capacity=capacity)
+    try:
+        index, samples = ring.read_since(0)
+        assert index == count
+        kept = min(count, old_capacity, capacity)
+        assert [s[0] for s in samples] == [1000.0 + i for i in range(count - kept, count)]
+        sample_time, memory, swap, paging = samples[-1]
+        assert memory['used'] == count - 1 and memory['percent'] == 50.0
+        assert swap['used'] == count - 1 and swap['percent'] == 25.0
+        assert paging is None
+
+        ring.append(2000.0, memory, swap, {'pgmajfault': 5.0})
+        assert ring.read_since(count)[1][0][3] == {'pgmajfault': 5.0}
+    finally:
+        ring.close()
+
+    # A reader now sees a current ring
+    reader = SampleRing(path)
+    try:
+        assert reader.read_since(0)[0] == count + 1
+    finally:
+        reader.close()
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import memory_tracker
+from memory_tracker import MemoryTracker
+from shared_state import (CollectorSupervisor, SharedMemoryTracker, SharedStatePublisher, StateSegment,
+                          STATE_FILENAME, STATE_SEQ, STATE_SEQ_OFFSET)
+
+
+@pytest.fixture
+def collector(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path / 'exports'), heavy_hitters=False, autostart=False)
+    tracker.publisher = SharedStatePublisher(str(tmp_path / 'shared'), capacity=tracker.max_samples)
+    tracker._update_process_history()
+    # A sweep older than the collector's process interval
+    tracker.latest_processes_time = datetime.now() - timedelta(seconds=tracker.process_interval * 4)
+    tracker.publisher.publish_state(tracker, datetime.now())
+    yield tracker
+    tracker.publisher.close()
+
+
+def test_workers_serve_the_published_sweep(collector, tmp_path, monkeypatch):
+    worker = SharedMemoryTracker(str(tmp_path / 'shared'), export_dir=str(tmp_path / 'worker'),
+                                 heavy_hitters=False)
+
+    def no_sweep():
+        raise AssertionError("a worker swept the processes")
+    monkeypatch.setattr(worker, '_scan_processes', no_sweep)
+    monkeypatch.setattr(memory_tracker.psutil, 'process_iter', no_sweep)
+
+    processes = worker.get_process_memory_usage(top_n=50)
+    assert [p['pid'] for p in processes] == [p['pid'] for p in collector.process_ranking[:50]]
+
+    batch = worker.get_batch(sections=['processes'], top_n=5)
+    assert [p['pid'] for p in batch['processes']] == [p['pid'] for p in collector.process_ranking[:5]]
+    assert batch['processes-age'] >= collector.process_interval * 4
+
+
+def test_reader_keeps_the_last_state_of_a_writer_that_died_mid_write(tmp_path):
+    path = str(tmp_path / STATE_FILENAME)
+    writer = StateSegment(path, create=True, capacity=1024)
+    reader = StateSegment(path)
+    try:
+        writer.write(b'{"a": 1}')
+        seq, payload = reader.read_if_changed(None)
+        assert payload == b'{"a": 1}'
+
+        # The writer bumped seq to odd and never finished
+        STATE_SEQ.pack_into(writer._map, STATE_SEQ_OFFSET, seq + 1, 0)
+        started = time.monotonic()
+        assert reader.read_if_changed(seq) == (seq, None)
+        assert time.monotonic() - started < 5
+
+        # A restarted writer resumes after the dead one's seq
+        writer.close()
+        writer = StateSegment(path, create=True, capacity=1024)
+        writer.write(b'{"a": 2}')
+        assert reader.read_if_changed(seq)[1] == b'{"a": 2}'
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_supervisor_restarts_a_collector_that_exits(tmp_path):
+    # Stand-in collector: create the state file, then exit after a moment
+    script = f"open({str(tmp_path / STATE_FILENAME)!r}, 'a').close(); import time; time.sleep(0.2)"
+    supervisor = CollectorSupervisor(str(tmp_path), command=[sys.executable, '-c', script],
+                                     check_interval=0.05, max_restart_delay=0.1)
+    supervisor.start()
+    first_pid = supervisor.pid
+    try:
+        deadline = time.monotonic() + 10
+        while supervisor.restarts < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert supervisor.restarts >= 2
+        assert supervisor.pid != first_pid
+    finally:
+        supervisor.stop()
+    assert supervisor.process.poll() is not None
+    assert os.path.exists(tmp_path / STATE_FILENAME)
+
+
+def test_segment_grows_for_a_larger_payload(tmp_path):
+    path = str(tmp_path / STATE_FILENAME)
+    writer = StateSegment(path, create=True, capacity=1024)
+    reader = StateSegment(path)
+    try:
+        writer.write(b'x' * 100)
+        seq, _ = reader.read_if_changed(None)
+
+        payload = b'y' * 5000
+        assert writer.write(payload)
+        assert writer.capacity >= 5000
+        assert reader.read_if_changed(seq)[1] == payload
+
+        # A restarted writer never shrinks the segment readers map
+        writer.close()
+        writer = StateSegment(path, create=True, capacity=1024)
+        assert writer.capacity == reader.capacity >= 5000
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_slow_sections_are_published_only_when_they_change(collector, tmp_path):
+    worker = SharedMemoryTracker(str(tmp_path / 'shared'), export_dir=str(tmp_path / 'worker'),
+                                 heavy_hitters=False)
+    worker.sync()
+    seqs = dict(worker._state_seqs)
+
+    later = datetime.now() + timedelta(seconds=collector.publisher.state_interval)
+    collector.publisher.publish_state(collector, later)
+    worker.sync()
+    assert worker._state_seqs['state'] != seqs['state']
+    assert worker._state_seqs['rollups'] == seqs['rollups']
+
+    collector.hourly_memory_data.append({'timestamp': '2026-01-01 00:00:00', 'memory_percent': 50})
+    collector.last_hourly_store = later
+    collector.publisher.publish_state(collector, later + timedelta(seconds=collector.publisher.state_interval))
+    worker.sync()
+    assert worker._state_seqs['rollups'] != seqs['rollups']
+    assert worker.hourly_memory_data == collector.hourly_memory_data
+
+
+def test_closed_heavy_hitter_buckets_are_published_on_rotation(tmp_path):
+    tracker = MemoryTracker(export_dir=str(tmp_path / 'exports'), autostart=False)
+    tracker.heavy_hitters_loaded = True
+    tracker.publisher = SharedStatePublisher(str(tmp_path / 'shared'), capacity=tracker.max_samples)
+    worker = SharedMemoryTracker(str(tmp_path / 'shared'), export_dir=str(tmp_path / 'worker'))
+    now = datetime.now()
+    hour = 3600 * 1000
+    try:
+        def sweep(t, memory_mb):
+            nonlocal now
+            tracker.heavy_hitters.update({'name': {'python': memory_mb}, 'username': {}}, t)
+            now += timedelta(seconds=tracker.publisher.state_interval)
+            tracker.publisher.publish_state(tracker, now)
+            worker.sync()
+
+        sweep(hour, 100)
+        sweep(hour + 60, 100)
+        seqs = dict(worker._state_seqs)
+        sweep(hour + 120, 100)
+        # Within the hour only the main section, with the open bucket, changes
+        assert worker._state_seqs['heavy_hitters'] == seqs['heavy_hitters']
+        assert worker.heavy_hitters.query('name', hour, hour + 3600)['total_mb_seconds'] == 12000
+
+        sweep(hour + 3600, 100)
+        assert worker._state_seqs['heavy_hitters'] != seqs['heavy_hitters']
+        assert [b.start for b in worker.heavy_hitters.hourly] == [hour, hour + 3600]
+        assert worker.heavy_hitters.query('name', hour, hour + 3600)['total_mb_seconds'] == 12000
+    finally:
+        tracker.publisher.close()
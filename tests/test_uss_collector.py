@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import uss_collector
+from uss_collector import UssCollector
+
+
+def make_proc(root, pids):
+    os.makedirs(root / 'self')
+    (root / 'self' / 'smaps_rollup').write_text('')
+    for pid in pids:
+        os.makedirs(root / str(pid))
+        (root / str(pid) / 'smaps_rollup').write_text(
+            '00400000-7fff0000 ---p 00000000 00:00 0 [rollup]\n'
+            f'Rss: {pid * 8} kB\n'
+            f'Pss: {pid * 6} kB\n'
+            f'Private_Clean: {pid} kB\n'
+            f'Private_Dirty: {pid * 3} kB\n'
+            'Swap: 0 kB\n'
+        )
+
+
+@pytest.fixture
+def sweep(tmp_path):
+    pids = range(100, 400)
+    make_proc(tmp_path, pids)
+    return tmp_path, [{'pid': pid, 'memory_mb': pid / 10} for pid in pids]
+
+
+def test_reads_everything_with_a_large_budget(sweep):
+    root, processes = sweep
+    collector = UssCollector(budget=10, proc_root=str(root))
+    assert collector.refresh(processes, 1000) == len(processes)
+    assert collector.cache[200]['uss'] == 200 * 4 * 1024
+    assert collector.cache[200]['pss'] == 200 * 6 * 1024
+
+    annotated = collector.annotate([{'pid': 200}], 1005)
+    assert annotated[0]['uss_age'] == 5
+
+
+def test_plan_is_built_once_per_sweep(sweep, monkeypatch):
+    root, processes = sweep
+    collector = UssCollector(budget=10, priority_count=5, proc_root=str(root))
+    plans = []
+    plan = collector._plan
+    monkeypatch.setattr(collector, '_plan', lambda *args: plans.append(1) or plan(*args))
+
+    # Each tick reads a few processes, the round-robin covers them all
+    clock = iter(range(1000000))
+    monkeypatch.setattr(uss_collector.time, 'perf_counter', lambda: next(clock) * 0.001)
+    collector.refresh(processes, 1000, budget=0.01)
+    # The largest processes are read first
+    assert set(collector.cache) >= {395, 396, 397, 398, 399}
+    assert len(collector.cache) < len(processes)
+
+    now = 1001
+    while len(collector.cache) < len(processes):
+        assert collector.refresh(processes, now, budget=0.01) > 0
+        now += 1
+    assert len(plans) == 1
+
+    # A new sweep gets a new plan that forgets exited processes
+    collector.refresh(processes[:-10], now, budget=0.01)
+    assert len(plans) == 2
+    assert 399 not in collector.cache
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from vmstat import parse_vmstat, ProcessFaults, VmstatCollector, VMSTAT_COUNTERS
+
+VMSTAT = """pgfault {pgfault}
+pgmajfault {pgmajfault}
+pswpin 0
+pswpout 0
+pgscan_kswapd 100
+pgscan_direct 20
+pgscan_direct_throttle 5
+pgscan_anon 60
+pgscan_file 60
+pgsteal_kswapd 80
+pgsteal_direct 10
+pgsteal_anon 45
+pgsteal_file 45
+allocstall_normal 3
+allocstall_movable 4
+workingset_refault_anon 7
+workingset_refault_file 8
+workingset_activate_anon 99
+oom_kill 0
+"""
+
+
+def test_parse_sums_the_per_reclaimer_counters():
+    counters = parse_vmstat(VMSTAT.format(pgfault=1000, pgmajfault=10))
+    assert counters == {'pgfault': 1000, 'pgmajfault': 10, 'pswpin': 0, 'pswpout': 0, 'pgscan': 120,
+                        'pgsteal': 90, 'allocstall': 7, 'workingset_refault': 15, 'oom_kill': 0}
+    assert set(counters) == set(VMSTAT_COUNTERS)
+
+
+def test_parse_reads_older_kernels():
+    counters = parse_vmstat("pgfault 5\nworkingset_refault 12\nallocstall 2\n")
+    assert counters == {'pgfault': 5, 'workingset_refault': 12, 'allocstall': 2}
+
+
+@pytest.fixture
+def vmstat_file(tmp_path):
+    path = tmp_path / 'vmstat'
+
+    def write(pgfault, pgmajfault):
+        # Rewritten in place: the collector keeps its descriptor open
+        with open(path, 'r+' if path.exists() else 'w') as f:
+            f.truncate()
+            f.write(VMSTAT.format(pgfault=pgfault, pgmajfault=pgmajfault))
+    write(1000, 10)
+    return path, write
+
+
+def test_rates_between_samples(vmstat_file):
+    path, write = vmstat_file
+    collector = VmstatCollector(str(path))
+    try:
+        assert collector.sample(now=100.0) is None
+        write(1500, 16)
+        rates = collector.sample(now=102.0)
+        assert rates['pgfault'] == 250.0
+        assert rates['pgmajfault'] == 3.0
+        assert rates['pgscan'] == 0.0
+        # A reading at the same time gives no rates
+        assert collector.sample(now=102.0) is None
+    finally:
+        collector.close()
+
+
+def test_a_counter_going_back_counts_as_no_events(vmstat_file):
+    path, write = vmstat_file
+    collector = VmstatCollector(str(path))
+    try:
+        collector.sample(now=0.0)
+        # pgfault wrapped around, pgmajfault kept counting
+        write(3, 20)
+        rates = collector.sample(now=1.0)
+        assert rates['pgfault'] == 0.0
+        assert rates['pgmajfault'] == 10.0
+    finally:
+        collector.close()
+
+
+def test_missing_file_is_unavailable(tmp_path):
+    collector = VmstatCollector(str(tmp_path / 'missing'))
+    assert not collector.available
+    assert collector.sample(now=1.0) is None
+
+
+def write_stat(proc_root, pid, minor, major, start):
+    os.makedirs(proc_root / str(pid), exist_ok=True)
+    # Fields after the command name: state, ppid, ..., minflt at 7, majflt at 9, starttime at 19
+    fields = ['S', '1'] + ['0'] * 5 + [str(minor), '0', str(major)] + ['0'] * 9 + [str(start), '0']
+    (proc_root / str(pid) / 'stat').write_text(f"{pid} (odd) name) {' '.join(fields)}\n")
+
+
+def test_process_fault_rates(tmp_path):
+    os.makedirs(tmp_path / 'self')
+    (tmp_path / 'self' / 'stat').write_text('')
+    faults = ProcessFaults(str(tmp_path))
+
+    write_stat(tmp_path, 42, 100, 5, 777)
+    write_stat(tmp_path, 43, 100, 5, 888)
+    faults.annotate([{'pid': 42}, {'pid': 43}], now=10.0)
+
+    write_stat(tmp_path, 42, 300, 9, 777)
+    # 43 exited and its pid was reused
+    write_stat(tmp_path, 43, 10, 0, 999)
+    processes = [{'pid': 42}, {'pid': 43}, {'pid': 44}]
+    faults.annotate(processes, now=14.0)
+    assert processes[0] == {'pid': 42, 'minor_faults_per_sec': 50.0, 'major_faults_per_sec': 1.0}
+    assert processes[1] == {'pid': 43}
+    assert processes[2] == {'pid': 44}
@@ -0,0 +1,76 @@
+import math
+import struct
+from array import array
+
+from vmstat import VMSTAT_COUNTERS
+from wire_format import (encode_history, FORMAT_VERSION, HEADER, HISTORY_MEMORY_COLUMNS,
+                         HISTORY_SCALARS, HISTORY_SWAP_COLUMNS, KIND_HISTORY, MAGIC)
+
+
+def decode_history(payload):
+    """Read a payload back the way the dashboard does, with typed views over the body."""
+    magic, version, kind, _, count, cursor = HEADER.unpack_from(payload)
+    offset = HEADER.size
+    base_time_ms, memory_total, swap_total = HISTORY_SCALARS.unpack_from(payload, offset)
+    offset += HISTORY_SCALARS.size
+
+    def column(typecode):
+        nonlocal offset
+        values = array(typecode)
+        assert offset % values.itemsize == 0
+        values.frombytes(payload[offset:offset + count * values.itemsize])
+        offset += count * values.itemsize
+        return list(values)
+
+    decoded = {'magic': magic, 'version': version, 'kind': kind, 'cursor': cursor,
+               'base_time_ms': base_time_ms, 'memory_total': memory_total, 'swap_total': swap_total}
+    for key in HISTORY_MEMORY_COLUMNS:
+        decoded[f'memory.{key}'] = column('d')
+    for key in HISTORY_SWAP_COLUMNS:
+        decoded[f'swap.{key}'] = column('d')
+    decoded['memory.percent'] = column('f')
+    decoded['swap.percent'] = column('f')
+    for key in VMSTAT_COUNTERS:
+        decoded[f'paging.{key}'] = column('f')
+    decoded['deltas_ms'] = column('i')
+    assert offset == len(payload)
+    return decoded
+
+
+def make_history(count):
+    times = [1767268800.0 + i * 1.5 for i in range(count)]
+    memory = [{'total': 16e9, 'available': 8e9 - i, 'used': 7e9 + i, 'free': 1e9, 'buffers': 1e8,
+               'cached': 2e9 + i, 'percent': 50.25 + i} for i in range(count)]
+    swap = [{'total': 4e9, 'used': 1e6 * i, 'free': 4e9 - 1e6 * i, 'percent': 0.5 * i} for i in range(count)]
+    # The first sample has no paging rates yet
+    paging = [dict.fromkeys(VMSTAT_COUNTERS, 2.5) if i else None for i in range(count)]
+    return {'memory': memory, 'swap': swap, 'paging': paging, 'times': times, 'cursor': 1234}
+
+
+def test_history_round_trip():
+    history = make_history(5)
+    decoded = decode_history(encode_history(history))
+
+    assert (decoded['magic'], decoded['version'], decoded['kind']) == (MAGIC, FORMAT_VERSION, KIND_HISTORY)
+    assert decoded['cursor'] == 1234
+    assert decoded['base_time_ms'] == history['times'][0] * 1000
+    assert (decoded['memory_total'], decoded['swap_total']) == (16e9, 4e9)
+    for key in HISTORY_MEMORY_COLUMNS:
+        assert decoded[f'memory.{key}'] == [m[key] for m in history['memory']]
+    for key in HISTORY_SWAP_COLUMNS:
+        assert decoded[f'swap.{key}'] == [s[key] for s in history['swap']]
+    # Percentages travel as float32
+    assert decoded['memory.percent'] == [struct.unpack('<f', struct.pack('<f', m['percent']))[0]
+                                         for m in history['memory']]
+    assert decoded['swap.percent'] == [s['percent'] for s in history['swap']]
+    for key in VMSTAT_COUNTERS:
+        rates = decoded[f'paging.{key}']
+        assert math.isnan(rates[0])
+        assert rates[1:] == [2.5] * 4
+    assert decoded['deltas_ms'] == [0, 1500, 1500, 1500, 1500]
+
+
+def test_empty_history():
+    decoded = decode_history(encode_history(make_history(0)))
+    assert decoded['base_time_ms'] == 0
+    assert decoded['deltas_ms'] == []
@@ -0,0 +1,197 @@
+"""
+Unique and proportional set size (USS/PSS) of processes.
+
+RSS counts shared pages (libraries, shared memory) in full for every process
+that maps them, which overstates multi-process applications. USS counts only
+the pages private to a process, the memory freed if it exits; PSS splits
+shared pages between the processes mapping them, so PSS values add up.
+
+Both come from /proc/<pid>/smaps_rollup (Linux 4.14+), or from psutil's
+memory_full_info(), which walks the whole smaps file, where that is missing.
+Either is far costlier than reading RSS, so the collector spends a fixed time
+budget per tick: the largest processes are refreshed first, then the rest in
+round-robin order, and every value is cached with the time it was read.
+"""
+import logging
+import os
+import time
+from bisect import bisect_right
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# smaps_rollup fields (in kB) and what they add up to
+PRIVATE_FIELDS = ('Private_Clean', 'Private_Dirty', 'Private_Hugetlb')
+
+# Retry processes we may not read (other users' processes) this rarely
+DENIED_RETRY_SECONDS = 300
+
+
+def read_smaps_rollup(pid, proc_root='/proc'):
+    """
+    Read USS, PSS and swap of a process from smaps_rollup.
+
+    Returns:
+        Dictionary with uss, pss and swap in bytes
+
+    Raises:
+        FileNotFoundError: The process exited or the kernel has no smaps_rollup
+        PermissionError: The process belongs to another user
+    """
+    with open(os.path.join(proc_root, str(pid), 'smaps_rollup'), 'rb') as f:
+        text = f.read().decode('ascii', 'replace')
+
+    fields = {}
+    for line in text.splitlines()[1:]:
+        key, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            fields[key] = int(parts[0]) * 1024
+    if 'Pss' not in fields:
+        # Kernel threads have an empty rollup
+        raise FileNotFoundError(f"No smaps_rollup data for {pid}")
+
+    return {
+        'uss': sum(fields.get(key, 0) for key in PRIVATE_FIELDS),
+        'pss': fields['Pss'],
+        'swap': fields.get('Swap', 0)
+    }
+
+
+def read_memory_full_info(pid):
+    """Read USS, PSS and swap of a process through psutil."""
+    try:
+        info = psutil.Process(pid).memory_full_info()
+    except psutil.NoSuchProcess:
+        raise FileNotFoundError(f"No process {pid}")
+    except psutil.AccessDenied:
+        raise PermissionError(f"Access denied to process {pid}")
+    return {
+        'uss': info.uss,
+        'pss': getattr(info, 'pss', info.uss),
+        'swap': getattr(info, 'swap', 0)
+    }
+
+
+class UssCollector:
+    def __init__(self, budget=0.02, priority_count=20, priority_max_age=10, proc_root='/proc'):
+        """
+        Initialize the collector.
+
+        Args:
+            budget: Seconds that may be spent reading per refresh() call
+            priority_count: Number of largest processes (by RSS) refreshed first
+            priority_max_age: Age in seconds after which a priority value is refreshed
+            proc_root: Mount point of procfs
+        """
+        self.budget = budget
+        self.priority_count = priority_count
+        self.priority_max_age = priority_max_age
+        self.proc_root = proc_root
+        self.use_rollup = os.path.exists(os.path.join(proc_root, 'self', 'smaps_rollup'))
+
+        self.cache = {}       # pid -> {'uss', 'pss', 'swap', 'time'}
+        self.denied = {}      # pid -> time the read was denied
+
+        # Refresh plan of the current process sweep, built once per sweep
+        self.sweep = None     # The process list the plan was built from
+        self.priority = []    # Pids of the largest processes
+        self.order = []       # Every pid, in pid order
+        self.position = 0     # Next index of order the round-robin pass reads
+
+    def _read(self, pid):
+        """Read one process, None if it exited or may not be read."""
+        try:
+            if self.use_rollup:
+                return read_smaps_rollup(pid, self.proc_root)
+            return read_memory_full_info(pid)
+        except PermissionError:
+            self.denied[pid] = time.time()
+        except (FileNotFoundError, ProcessLookupError, OSError):
+            pass
+        return None
+
+    def _plan(self, processes, now):
+        """Forget exited processes and order the pids of a new sweep."""
+        # Kernel threads have no memory of their own to measure
+        live = {p['pid'] for p in processes if p['memory_mb'] > 0}
+        for pid in [pid for pid in self.cache if pid not in live]:
+            del self.cache[pid]
+        for pid in [pid for pid, t in self.denied.items() if pid not in live or now - t > DENIED_RETRY_SECONDS]:
+            del self.denied[pid]
+
+        largest = sorted(processes, key=lambda p: p['memory_mb'], reverse=True)[:self.priority_count]
+        self.priority = [p['pid'] for p in largest if p['pid'] in live]
+
+        # Resume the round-robin after the last pid it reached in the previous sweep
+        last = self.order[self.position - 1] if self.order and self.position else -1
+        self.order = sorted(live)
+        self.position = bisect_right(self.order, last) % len(self.order) if self.order else 0
+        self.sweep = processes
+
+    def refresh(self, processes, now, budget=None):
+        """
+        Refresh cached values within the time budget.
+
+        The refresh plan (largest processes first, then everyone in pid order)
+        is built when a new sweep is passed, so the other calls only read.
+
+        Args:
+            processes: Latest process sweep, dictionaries with pid and memory_mb
+            now: Current time in epoch seconds
+            budget: Seconds to spend, defaults to the collector's budget
+
+        Returns:
+            Number of processes read
+        """
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        if processes is not self.sweep:
+            self._plan(processes, now)
+
+        read = 0
+        for pid in self.priority:
+            if time.perf_counter() >= deadline:
+                return read
+            if pid in self.denied or now - self.cache.get(pid, {}).get('time', 0) < self.priority_max_age:
+                continue
+            self._store(pid, now)
+            read += 1
+
+        # Then everyone else, in pid order from where the last call stopped, at most one pass
+        for _ in range(len(self.order)):
+            if time.perf_counter() >= deadline:
+                break
+            pid = self.order[self.position]
+            self.position = (self.position + 1) % len(self.order)
+            if pid in self.denied or self.cache.get(pid, {}).get('time') == now:
+                continue
+            self._store(pid, now)
+            read += 1
+        return read
+
+    def _store(self, pid, now):
+        values = self._read(pid)
+        if values:
+            values['time'] = now
+            self.cache[pid] = values
+
+    def annotate(self, processes, now):
+        """
+        Add the cached USS/PSS of each process to its dictionary.
+
+        Adds uss_mb, pss_mb, swap_mb and uss_age (seconds since the values were
+        read) to the processes that have been read at least once.
+        """
+        for proc in processes:
+            values = self.cache.get(proc['pid'])
+            if values:
+                proc['uss_mb'] = round(values['uss'] / (1024 * 1024), 2)
+                proc['pss_mb'] = round(values['pss'] / (1024 * 1024), 2)
+                proc['swap_mb'] = round(values['swap'] / (1024 * 1024), 2)
+                proc['uss_age'] = round(now - values['time'], 1)
+        return processes
+
+    def coverage(self):
+        """Number of processes with cached values."""
+        return len(self.cache)
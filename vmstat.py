@@ -0,0 +1,190 @@
+"""
+Paging, swap and reclaim rates from the kernel's event counters.
+
+/proc/vmstat holds counters that only grow from boot, one per line:
+
+    pgfault 123456789
+    pgmajfault 12345
+    pswpin 0
+    ...
+
+Their differences between two samples give rates. The ones that show
+thrashing, where the working set no longer fits in RAM and the system spends
+its time moving pages instead of running tasks:
+    * pgfault / pgmajfault: page faults, and those that had to wait for I/O
+    * pswpin / pswpout: pages read from and written to swap
+    * pgscan / pgsteal: pages scanned and reclaimed by kswapd and by tasks
+      reclaiming directly (the sum of the per-reclaimer counters)
+    * allocstall: allocations that had to reclaim memory themselves
+    * workingset_refault: evicted pages needed again soon after
+    * oom_kill: processes killed by the OOM killer
+
+Per-process fault counters are in /proc/<pid>/stat; ProcessFaults turns them
+into rates between process sweeps.
+"""
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+VMSTAT_PATH = '/proc/vmstat'
+
+READ_SIZE = 16384
+
+# Counters reported, in the order of the history columns
+VMSTAT_COUNTERS = ('pgfault', 'pgmajfault', 'pswpin', 'pswpout', 'pgscan', 'pgsteal',
+                   'allocstall', 'workingset_refault', 'oom_kill')
+
+# Counters summed from the per-reclaimer (or per-zone, on old kernels) ones;
+# the excluded ones break the same pages down another way
+SUMMED_COUNTERS = {
+    'pgscan': ('pgscan_direct_throttle', 'pgscan_anon', 'pgscan_file'),
+    'pgsteal': ('pgsteal_anon', 'pgsteal_file'),
+    'allocstall': (),
+    'workingset_refault': (),
+}
+
+
+def parse_vmstat(text):
+    """
+    Parse the content of /proc/vmstat.
+
+    Returns:
+        Dictionary of the VMSTAT_COUNTERS the kernel has (older kernels lack some)
+    """
+    counters = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(' ')
+        if key in VMSTAT_COUNTERS:
+            counters[key] = int(value)
+            continue
+        base, _, suffix = key.partition('_')
+        if base == 'workingset':
+            # workingset_refault (before 5.9) or workingset_refault_anon/_file
+            base = 'workingset_refault' if suffix.startswith('refault') else None
+        elif base not in SUMMED_COUNTERS:
+            continue
+        if base and key != base and key not in SUMMED_COUNTERS[base]:
+            counters[base] = counters.get(base, 0) + int(value)
+    return counters
+
+
+class VmstatCollector:
+    def __init__(self, path=VMSTAT_PATH):
+        """
+        Open /proc/vmstat for repeated reads.
+
+        Args:
+            path: vmstat file
+        """
+        self.path = path
+        self.available = False
+        self.previous = None  # (monotonic seconds, counters) of the last sample
+        self._fd = None
+
+        try:
+            self._fd = os.open(path, os.O_RDONLY)
+            self.available = True
+        except OSError as e:
+            logger.info(f"Paging counters unavailable ({path}): {str(e)}")
+
+    def read(self):
+        """Read the current counters (None if unavailable)."""
+        if not self.available:
+            return None
+        try:
+            return parse_vmstat(os.pread(self._fd, READ_SIZE, 0).decode('ascii', 'replace'))
+        except OSError as e:
+            logger.error(f"Error reading {self.path}: {str(e)}")
+            return None
+
+    def sample(self, now=None):
+        """
+        Read the counters and compute their rates since the previous sample.
+
+        Args:
+            now: Monotonic time of the reading (defaults to time.monotonic())
+
+        Returns:
+            Dictionary of counter -> events per second, or None on the first
+            sample and when the counters cannot be read
+        """
+        counters = self.read()
+        if counters is None:
+            return None
+        now = time.monotonic() if now is None else now
+
+        previous, self.previous = self.previous, (now, counters)
+        if previous is None or now <= previous[0]:
+            return None
+        elapsed = now - previous[0]
+        old = previous[1]
+        # Counters only go back on overflow, which counts as no events
+        return {key: round(max(counters[key] - old[key], 0) / elapsed, 2)
+                for key in VMSTAT_COUNTERS if key in counters and key in old}
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.available = False
+
+
+def read_process_faults(pid, proc_root='/proc'):
+    """
+    Read the fault counters of a process from /proc/<pid>/stat.
+
+    Returns:
+        Tuple of (minor faults, major faults, start time in clock ticks)
+
+    Raises:
+        FileNotFoundError: The process exited
+    """
+    with open(os.path.join(proc_root, str(pid), 'stat'), 'rb') as f:
+        text = f.read()
+    # The command name may contain spaces and parentheses, the fields follow the last ')'
+    fields = text[text.rindex(b')') + 2:].split()
+    return int(fields[7]), int(fields[9]), int(fields[19])
+
+
+class ProcessFaults:
+    def __init__(self, proc_root='/proc'):
+        """
+        Per-process page fault rates between process sweeps.
+
+        Args:
+            proc_root: Mount point of procfs
+        """
+        self.proc_root = proc_root
+        self.available = os.path.exists(os.path.join(proc_root, 'self', 'stat'))
+        self.previous = {}  # pid -> (monotonic seconds, minor, major, start time)
+
+    def annotate(self, processes, now=None):
+        """
+        Add minor_faults_per_sec and major_faults_per_sec to process dictionaries.
+
+        Processes seen for the first time (or whose pid was reused) get rates
+        from the next sweep on.
+
+        Args:
+            processes: Process dictionaries with a 'pid', e.g. a full sweep
+            now: Monotonic time of the sweep (defaults to time.monotonic())
+        """
+        if not self.available:
+            return
+        now = time.monotonic() if now is None else now
+        current = {}
+        for proc in processes:
+            pid = proc['pid']
+            try:
+                minor, major, start = read_process_faults(pid, self.proc_root)
+            except (OSError, ValueError, IndexError):
+                continue
+            current[pid] = (now, minor, major, start)
+            previous = self.previous.get(pid)
+            if previous and previous[3] == start and now > previous[0]:
+                elapsed = now - previous[0]
+                proc['minor_faults_per_sec'] = round(max(minor - previous[1], 0) / elapsed, 1)
+                proc['major_faults_per_sec'] = round(max(major - previous[2], 0) / elapsed, 1)
+        self.previous = current
@@ -0,0 +1,98 @@
+"""
+Compact columnar wire format for history payloads.
+
+Every payload starts with a 16 byte header followed by little-endian typed
+columns, ordered so each column starts on a multiple of its element size.
+A browser can therefore wrap the response body in Float64Array/Float32Array/
+Int32Array views without copying or parsing.
+
+Header (16 bytes):
+    magic     4s      b'MTWF'
+    version   uint8   FORMAT_VERSION
+    kind      uint8   KIND_HISTORY
+    reserved  uint16
+    count     uint32  number of rows
+    cursor    uint32  history cursor (sample count)
+
+History body:
+    base_time_ms   float64         time of the first sample (epoch ms)
+    memory_total   float64         latest total RAM in bytes
+    swap_total     float64         latest total swap in bytes
+    float64[count] x 7             memory available/used/free/buffers/cached,
+                                   swap used/free (bytes)
+    float32[count] x 2             memory percent, swap percent
+    float32[count] x 9             paging rates per second, NaN where unknown,
+                                   in the order of vmstat.VMSTAT_COUNTERS
+    int32[count]                   ms since the previous sample (first is 0)
+"""
+import math
+import struct
+import sys
+from array import array
+
+from vmstat import VMSTAT_COUNTERS
+
+COLUMNAR_MIMETYPE = 'application/vnd.memtrack.columnar'
+
+MAGIC = b'MTWF'
+FORMAT_VERSION = 2
+KIND_HISTORY = 1
+
+HEADER = struct.Struct('<4sBBHII')
+HISTORY_SCALARS = struct.Struct('<ddd')
+
+HISTORY_MEMORY_COLUMNS = ('available', 'used', 'free', 'buffers', 'cached')
+HISTORY_SWAP_COLUMNS = ('used', 'free')
+
+
+def _column(typecode, values):
+    """Pack values into a little-endian typed column."""
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode_history(history):
+    """
+    Encode a history payload into the columnar format.
+
+    Args:
+        history: Dictionary from MemoryTracker.get_history(with_times=True)
+
+    Returns:
+        Encoded payload as bytes
+    """
+    memory = history['memory']
+    swap = history['swap']
+    times = history['times']
+    count = len(times)
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, KIND_HISTORY, 0, count, history['cursor'])]
+
+    base_time_ms = times[0] * 1000 if count else 0.0
+    memory_total = memory[-1]['total'] if count else 0
+    swap_total = swap[-1]['total'] if count else 0
+    parts.append(HISTORY_SCALARS.pack(base_time_ms, memory_total, swap_total))
+
+    for key in HISTORY_MEMORY_COLUMNS:
+        parts.append(_column('d', [m[key] for m in memory]))
+    for key in HISTORY_SWAP_COLUMNS:
+        parts.append(_column('d', [s[key] for s in swap]))
+
+    parts.append(_column('f', [m['percent'] for m in memory]))
+    parts.append(_column('f', [s['percent'] for s in swap]))
+
+    paging = [p or {} for p in history['paging']]
+    for key in VMSTAT_COUNTERS:
+        parts.append(_column('f', [p.get(key, math.nan) for p in paging]))
+
+    # Delta-encode timestamps in milliseconds
+    deltas = []
+    previous = times[0] if count else 0
+    for t in times:
+        deltas.append(int(round((t - previous) * 1000)))
+        previous = t
+    parts.append(_column('i', deltas))
+
+    return b''.join(parts)